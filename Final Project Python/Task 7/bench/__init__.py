@@ -0,0 +1 @@
+"""Headless scale benchmarks for the hospital domain (see run_bench.py)."""
@@ -0,0 +1,9 @@
+"""Make core/ importable and keep Qt off the display before ui.py is loaded."""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core")
+if CORE_DIR not in sys.path:
+    sys.path.insert(0, CORE_DIR)
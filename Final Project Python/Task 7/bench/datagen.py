@@ -0,0 +1,78 @@
+"""Deterministic hospital generator for benchmarks."""
+import random
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from bench import _env  # noqa: F401  (sets sys.path / Qt platform)
+from hospital import Hospital
+from department import Department
+from patient import Patient
+from staff import Staff
+from ui import Appointment, AppointmentManager, AppointmentStatus
+
+BASE_DAY = datetime(2025, 1, 6, 8, 0)
+POSITIONS = ["Doctor", "Nurse", "Technician", "Therapist", "Surgeon"]
+FIRST = ["Alice", "Bob", "Carol", "Dan", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+         "Omar", "Layla", "Youssef", "Mona", "Karim", "Nour"]
+LAST = ["Johnson", "Smith", "Miller", "Wilson", "Hassan", "Ali", "Mahmoud", "Ibrahim",
+        "Brown", "Davis", "Saleh", "Farouk"]
+
+
+def department_count(n_patients: int) -> int:
+    return max(4, min(200, n_patients // 5000))
+
+
+def _hex_id(rng: random.Random) -> str:
+    return f"{rng.getrandbits(32):08x}"
+
+
+def build_hospital(n_patients: int, seed: int = 0, staff_ratio: float = 0.05,
+                   days: int = 90) -> Tuple[Hospital, AppointmentManager]:
+    """Hospital with ``n_patients`` patients, matching staff and one appointment request per patient.
+
+    The same (n_patients, seed) always yields the same ids, names, dates and bookings.
+    """
+    rng = random.Random(seed)
+    h = Hospital("Benchmark General", "Nowhere", with_defaults=False)
+    depts: List[Department] = []
+    for i in range(department_count(n_patients)):
+        d = Department(f"Dept-{i:04d}", capacity=max(10, n_patients))
+        h.attach_department(d)
+        depts.append(d)
+
+    for i in range(n_patients):
+        d = depts[i % len(depts)]
+        p = Patient(f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.randint(1, 99), "Routine checkup")
+        p.id = _hex_id(rng)
+        p.patient_id = f"PAT-{p.id[:5]}"
+        p.created_at = BASE_DAY - timedelta(days=rng.randint(0, 365))
+        p.admission_date = p.created_at
+        if rng.random() < 0.6:
+            p.is_discharged = True
+            p.discharge_date = p.admission_date + timedelta(days=rng.randint(1, 30))
+        d.attach_patient(p)
+
+    n_staff = max(len(depts), int(n_patients * staff_ratio))
+    for i in range(n_staff):
+        d = depts[i % len(depts)]
+        s = Staff(f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.randint(22, 65), rng.choice(POSITIONS), d.name)
+        s.id = _hex_id(rng)
+        s.staff_id = f"STF-{s.id[:5]}"
+        s.created_at = BASE_DAY
+        if rng.random() < 0.1:
+            s.is_active = False
+        d.attach_staff(s)
+
+    appts = AppointmentManager(h)
+    rows = []
+    for d in depts:
+        for p in d.patients:
+            s = rng.choice(d.staff)
+            start = BASE_DAY + timedelta(days=rng.randrange(days), minutes=15 * rng.randrange(40))
+            rows.append(Appointment(
+                patient_person_id=p.id, staff_person_id=s.id, dept_name=d.name,
+                start=start, end=start + timedelta(minutes=15 * rng.randint(1, 4)),
+                status=rng.choice(AppointmentStatus.all()), appt_id=f"{rng.getrandbits(40):010x}",
+            ))
+    appts.add_many(rows)
+    return h, appts
@@ -0,0 +1,114 @@
+"""Measure bytes per patient/staff object: slotted domain classes versus the old __dict__ layout.
+
+Usage (from the Task 7 folder):
+    python -m bench.mem_bench --count 100000 --output mem_results.json
+"""
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from bench import _env  # noqa: F401  (sets sys.path / Qt platform)
+from bench.datagen import BASE_DAY, FIRST, LAST, POSITIONS, _hex_id
+from patient import Patient
+from staff import Staff
+
+
+class DictPatient:
+    """Patient as it was laid out before __slots__: every field in a per-instance __dict__."""
+    def __init__(self, id, name, age, record, created_at, admission_date, is_discharged, discharge_date):
+        self.id = id
+        self.name = name
+        self.age = age
+        self.created_at = created_at
+        self._dept = None
+        self.medical_record = record
+        self.admission_date = admission_date
+        self.is_discharged = is_discharged
+        self.discharge_date = discharge_date
+        self.patient_id = f"PAT-{id[:5]}"
+
+
+class DictStaff:
+    """Staff as it was laid out before __slots__."""
+    def __init__(self, id, name, age, position, department, is_active, created_at):
+        self.id = id
+        self.name = name
+        self.age = age
+        self.created_at = created_at
+        self._dept = None
+        self.position = position
+        self.department = department
+        self.staff_id = f"STF-{id[:5]}"
+        self.is_active = is_active
+
+
+def patient_fields(n: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        created = BASE_DAY - timedelta(days=rng.randint(0, 365))
+        discharged = rng.random() < 0.6
+        rows.append((_hex_id(rng), f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.randint(1, 99),
+                     "Routine checkup", created, created, discharged,
+                     created + timedelta(days=rng.randint(1, 30)) if discharged else None))
+    return rows
+
+
+def staff_fields(n: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    return [(_hex_id(rng), f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.randint(22, 65),
+             rng.choice(POSITIONS), "Dept-0000", rng.random() >= 0.1, BASE_DAY) for _ in range(n)]
+
+
+def slotted_patient(id, name, age, record, created_at, admission_date, is_discharged, discharge_date):
+    return Patient.restore(id, None, name, age, record, created_at, admission_date, is_discharged, discharge_date)
+
+
+def slotted_staff(id, name, age, position, department, is_active, created_at):
+    return Staff.restore(id, None, name, age, position, department, is_active, created_at)
+
+
+def bytes_per_object(make: Callable, rows: List[tuple]) -> float:
+    """Traced allocations for building one object per row (inputs excluded), per object."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objs = [make(*r) for r in rows]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list itself is not part of the per-object cost
+    return (after - before - sys.getsizeof(objs)) / len(rows)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--count", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", default=None)
+    args = ap.parse_args(argv)
+
+    cases = [
+        ("patient", patient_fields(args.count, args.seed), DictPatient, slotted_patient),
+        ("staff", staff_fields(args.count, args.seed), DictStaff, slotted_staff),
+    ]
+    results: List[Dict[str, object]] = []
+    for kind, rows, before, after in cases:
+        old = bytes_per_object(before, rows)
+        new = bytes_per_object(after, rows)
+        results.append({"kind": kind, "count": args.count, "dict_bytes": round(old, 1),
+                        "slots_bytes": round(new, 1), "saved_pct": round(100 * (1 - new / old), 1)})
+        print(f"  {kind:<8} __dict__ {old:8.1f} B   __slots__ {new:8.1f} B   ({100 * (1 - new / old):.0f}% less)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Time the hot hospital-domain operations at several scales and write JSON results.
+
+Usage (from the Task 7 folder):
+    python -m bench.run_bench --sizes 10000 100000 1000000 --output bench_results.json
+"""
+import argparse
+import json
+import platform
+import random
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from bench import _env  # noqa: F401  (sets sys.path / Qt platform)
+from bench.datagen import BASE_DAY, build_hospital
+from sqlite_store import SqliteStore
+import binary_snapshot
+from ui import (Appointment, AppointmentManager, AppointmentStatus, HospitalStreamLoader,
+                binary_snapshot_bytes, hospital_from_dict, hospital_to_dict, read_binary_snapshot)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    runs: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {"min_s": min(runs), "median_s": statistics.median(runs), "repeat": repeat}
+
+
+def bench_size(n: int, seed: int, queries: int, repeat: int) -> List[dict]:
+    results: List[dict] = []
+
+    def record(op: str, calls: int, fn: Callable[[], object], rep: int = repeat):
+        r = timed(fn, rep)
+        r.update(size=n, op=op, calls=calls, per_call_us=r["median_s"] / max(1, calls) * 1e6)
+        results.append(r)
+        print(f"  {op:<28} {r['median_s'] * 1000:10.2f} ms  ({r['per_call_us']:.2f} us/call)")
+
+    t0 = time.perf_counter()
+    h, appts = build_hospital(n, seed)
+    built = time.perf_counter() - t0
+    results.append({"size": n, "op": "build", "calls": 1, "min_s": built,
+                    "median_s": built, "repeat": 1, "per_call_us": built * 1e6})
+    print(f"size={n}: {len(h.departments)} departments, {h.staff_count} staff, {len(appts)} appointments")
+
+    rng = random.Random(seed + 1)
+    names = [d.name for d in h.departments.values()]
+    lookups = [rng.choice([nm, nm.lower(), nm.upper()]) for nm in (rng.choice(names) for _ in range(queries))]
+    record("find_department", len(lookups), lambda: [h.find_department(x) for x in lookups])
+
+    depts = list(h.departments.values())
+    record("get_active_patients", len(depts), lambda: [d.get_active_patients() for d in depts])
+    record("find_patients_age", len(depts), lambda: [d.find_patients(None, 30, 50) for d in depts])
+    # The same search answered from the column store (active listings never use it)
+    for d in depts:
+        d.use_store()
+    record("find_patients_age_store", len(depts), lambda: [d.find_patients(None, 30, 50) for d in depts])
+    for d in depts:
+        d.use_store(False)
+
+    people = [(d.patients[rng.randrange(len(d.patients))].id, rng.choice(d.staff).id)
+              for d in (rng.choice(depts) for _ in range(queries)) if d.patients]
+    windows = []
+    for pid, sid in people:
+        start = BASE_DAY + timedelta(days=rng.randrange(90), minutes=15 * rng.randrange(40))
+        windows.append((pid, sid, start, start + timedelta(minutes=30)))
+    record("find_conflicts", len(windows),
+           lambda: [appts.find_conflicts(pid, sid, s, e) for pid, sid, s, e in windows])
+
+    filters = [((BASE_DAY + timedelta(days=rng.randrange(90))).date(),
+                rng.choice(names + ["__ALL__"]),
+                rng.choice(AppointmentStatus.all() + ["__ALL__"])) for _ in range(queries)]
+    record("list_filtered", len(filters), lambda: [appts.list_filtered(*f) for f in filters])
+
+    record("hospital_to_dict", 1, lambda: hospital_to_dict(h), rep=max(1, repeat // 2))
+    data = {"hospital": hospital_to_dict(h), "appointments": appts.to_dict()}
+    record("hospital_from_dict", 1, lambda: hospital_from_dict(data["hospital"]), rep=max(1, repeat // 2))
+
+    def appts_round_trip():
+        ap = AppointmentManager(h)
+        ap.from_dict(appts.to_dict())
+    record("appointments_round_trip", 1, appts_round_trip, rep=max(1, repeat // 2))
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        record("stream_load", 1, lambda: HospitalStreamLoader(path).load(), rep=max(1, repeat // 2))
+        results.append({"size": n, "op": "json_bytes", "bytes": os.path.getsize(path)})
+    finally:
+        os.remove(path)
+
+    blob = binary_snapshot_bytes(h, appts)
+    results.append({"size": n, "op": "binary_bytes", "bytes": len(blob)})
+    record("binary_encode", 1, lambda: binary_snapshot_bytes(h, appts), rep=max(1, repeat // 2))
+    record("binary_decode", 1, lambda: binary_snapshot.decode(blob, Appointment), rep=max(1, repeat // 2))
+    fd, path = tempfile.mkstemp(suffix=".hosp")
+    os.close(fd)
+    try:
+        binary_snapshot.write_atomic(path, blob)
+        record("binary_load", 1, lambda: read_binary_snapshot(path), rep=max(1, repeat // 2))
+    finally:
+        os.remove(path)
+
+    tmpdir = tempfile.mkdtemp()
+    db = os.path.join(tmpdir, "bench.sqlite")
+    try:
+        store = SqliteStore(db)
+        record("sqlite_save_full", 1, lambda: store.save(h, appts), rep=1)
+        record("sqlite_save_unchanged", 1, lambda: store.save(h, appts), rep=max(1, repeat // 2))
+        store.close()
+
+        def sqlite_load():
+            st = SqliteStore(db)
+            h2, d = st.load()
+            AppointmentManager(h2).from_dict(d)
+            st.close()
+        record("sqlite_load", 1, sqlite_load, rep=max(1, repeat // 2))
+    finally:
+        for f in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, f))
+        os.rmdir(tmpdir)
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--queries", type=int, default=1000, help="lookups per query benchmark")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--output", default="bench_results.json")
+    args = ap.parse_args(argv)
+
+    results: List[dict] = []
+    for n in args.sizes:
+        results.extend(bench_size(n, args.seed, args.queries, args.repeat))
+
+    out = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "queries": args.queries,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
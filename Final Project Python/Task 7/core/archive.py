@@ -0,0 +1,235 @@
+"""Read-only, memory-mapped archive of discharged patients.
+
+Layout: header (MAGIC, u16 version, u16 flags, u32 count, then u64 offsets of
+the key, index, search and line-start blocks), the entries as UTF-8 JSON, the
+patient ids sorted bytewise, one fixed-size index entry per id (entry offset,
+entry length, key offset, key length), a lowercased "name patient_id" line per
+entry for substring search, and the start of each of those lines. Lookups
+binary-search the index inside the mapping; nothing is loaded up front.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from patient import Patient
+
+MAGIC = b"HOSPARCH"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQQ")
+ENTRY = struct.Struct("<QIIH")
+CACHE_SIZE = 256
+
+Archived = Tuple[str, Patient]  # (department name, patient)
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    return dt.isoformat(timespec="seconds") if dt else None
+
+
+def _dt(s: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(s) if s else None
+
+
+def _encode(dept_name: str, p: Patient) -> Tuple[bytes, bytes, bytes]:
+    """(key, entry, search line) for one patient."""
+    entry = {
+        "dept": dept_name, "id": p.id, "patient_id": p.patient_id, "name": p.name, "age": p.age,
+        "created_at": _iso(p.created_at), "medical_record": p.medical_record,
+        "admission_date": _iso(p.admission_date), "discharge_date": _iso(p.discharge_date),
+    }
+    return (p.id.encode("utf-8"),
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            f"{p.name} {p.patient_id}".lower().replace("\n", " ").encode("utf-8") + b"\n")
+
+
+def _decode(raw: bytes) -> Archived:
+    e = json.loads(raw)
+    p = Patient.restore(e["id"], e["patient_id"], e["name"], e["age"], e["medical_record"],
+                        _dt(e["created_at"]), _dt(e["admission_date"]), True, _dt(e["discharge_date"]))
+    return e["dept"], p
+
+
+class PatientArchive:
+    """Discharged patients moved out of the live department lists, looked up by id or name."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+        self._mm: Optional[mmap.mmap] = None
+        self.count = 0
+        self._cache: "OrderedDict[str, Archived]" = OrderedDict()
+        # Guards the mapping: get() is also called from export threads while the
+        # UI thread may extend (remap) or close the archive
+        self._lock = threading.RLock()
+        self._open()
+
+    # ----- mapping -----
+    def _open(self):
+        if not os.path.exists(self.path):
+            return
+        self._f = open(self.path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, keys, index, search, starts = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._close()
+            raise ValueError(f"{self.path} is not a patient archive")
+        if version > VERSION:
+            self._close()
+            raise ValueError(f"Archive version {version} is newer than this program supports ({VERSION})")
+        self.count = count
+        self._keys, self._index, self._search, self._starts_off = keys, index, search, starts
+        starts_arr = array("I")
+        starts_arr.frombytes(self._mm[starts:starts + 4 * count])
+        if sys.byteorder == "big":
+            starts_arr.byteswap()
+        self._starts = starts_arr
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        self.count = 0
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int]:
+        return ENTRY.unpack_from(self._mm, self._index + i * ENTRY.size)
+
+    def _key(self, i: int) -> bytes:
+        _, _, key_off, key_len = self._entry(i)
+        return self._mm[self._keys + key_off:self._keys + key_off + key_len]
+
+    def _load(self, i: int) -> Archived:
+        off, length, _, _ = self._entry(i)
+        return _decode(self._mm[off:off + length])
+
+    def _find(self, key: bytes) -> int:
+        with self._lock:
+            lo, hi = 0, self.count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._key(mid) < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo if lo < self.count and self._key(lo) == key else -1
+
+    # ----- lookups -----
+    def __contains__(self, person_id: str) -> bool:
+        with self._lock:
+            return self.count > 0 and self._find(person_id.encode("utf-8")) >= 0
+
+    def get(self, person_id: str) -> Optional[Archived]:
+        """(department name, read-only patient copy) or None."""
+        with self._lock:
+            hit = self._cache.get(person_id)
+            if hit is not None:
+                self._cache.move_to_end(person_id)
+                return hit
+            i = self._find(person_id.encode("utf-8")) if self.count else -1
+            if i < 0:
+                return None
+            hit = self._cache[person_id] = self._load(i)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return hit
+
+    def search(self, term: str) -> Iterator[Archived]:
+        """Entries whose "name patient_id" contains ``term`` (case-insensitive)."""
+        needle = term.lower().encode("utf-8")
+        hits: List[Archived] = []
+        with self._lock:
+            if not self.count or not needle:
+                return iter(hits)
+            pos, end = self._search, self._starts_off
+            while True:
+                pos = self._mm.find(needle, pos, end)
+                if pos < 0:
+                    break
+                i = bisect_right(self._starts, pos - self._search) - 1
+                hits.append(self._load(i))
+                # One hit per line
+                pos = self._search + (self._starts[i + 1] if i + 1 < self.count else end - self._search)
+        return iter(hits)
+
+    # ----- writing -----
+    def extend(self, additions: Iterable[Archived]):
+        """Rewrite the archive with ``additions`` merged in (atomic replace), then remap it."""
+        with self._lock:
+            self._extend(additions)
+
+    def _extend(self, additions: Iterable[Archived]):
+        # key -> (entry source, search line); sources are (offset, length) in the old mapping or new bytes
+        merged = {}
+        for i in range(self.count):
+            off, length, _, _ = self._entry(i)
+            a = self._starts[i]
+            b = self._starts[i + 1] if i + 1 < self.count else self._starts_off - self._search
+            merged[bytes(self._key(i))] = ((off, length), self._mm[self._search + a:self._search + b])
+        for dept_name, p in additions:
+            key, raw, line = _encode(dept_name, p)
+            merged[key] = (raw, line)
+        keys = sorted(merged)
+        tmp = self._write_tmp(keys, merged)
+        self._close()
+        try:
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        finally:
+            self._open()
+
+    def _write_tmp(self, keys: List[bytes], merged: dict) -> str:
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(b"\0" * HEADER.size)
+                index = []
+                key_off = 0
+                for k in keys:
+                    src = merged[k][0]
+                    raw = self._mm[src[0]:src[0] + src[1]] if isinstance(src, tuple) else src
+                    index.append(ENTRY.pack(f.tell(), len(raw), key_off, len(k)))
+                    key_off += len(k)
+                    f.write(raw)
+                keys_at = f.tell()
+                f.write(b"".join(keys))
+                index_at = f.tell()
+                f.write(b"".join(index))
+                search_at = f.tell()
+                starts = array("I")
+                for k in keys:
+                    starts.append(f.tell() - search_at)
+                    f.write(merged[k][1])
+                starts_at = f.tell()
+                if sys.byteorder == "big":
+                    starts.byteswap()
+                f.write(starts.tobytes())
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, VERSION, 0, len(keys), keys_at, index_at, search_at, starts_at))
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return tmp
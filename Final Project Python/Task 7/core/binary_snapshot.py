@@ -0,0 +1,398 @@
+"""Versioned binary snapshot of a hospital and its appointments.
+
+Layout: MAGIC, u16 version, u16 flags, then blocks of (4-byte tag, u64 length,
+payload); unknown tags are skipped. Every string is stored once in a shared
+table and referenced by index (0 = None), datetimes are int64 epoch seconds,
+and departments, patients, staff and appointments are stored column by column
+as little-endian arrays. Medical records are either inline strings or, when a
+RecordSidecar is given, (offset, length) references into that file.
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate, repeat
+from operator import attrgetter, itemgetter, sub
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from hospital import Hospital
+from department import Department
+from patient import Patient
+from record_store import RecordSidecar
+from staff import Staff
+
+MAGIC = b"HOSPSNAP"
+VERSION = 2
+NULL_TIME = -(1 << 63)
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+_SWAP = sys.byteorder == "big"
+
+
+def is_binary_snapshot(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class AppointmentColumns(NamedTuple):
+    """Row-aligned appointment fields, so indexes can be built without visiting each appointment."""
+    ids: List[str]
+    patients: List[str]
+    staff: List[str]         # "" where there is none
+    statuses: List[str]
+    starts: List[datetime]
+    ends: List[datetime]
+    order: List[int]         # rows in (start, row) order
+
+    @classmethod
+    def of(cls, items: list) -> "AppointmentColumns":
+        starts = [a.start for a in items]
+        return cls([a.id for a in items], [a.patient_person_id for a in items],
+                   [a.staff_person_id or "" for a in items], [a.status for a in items],
+                   starts, [a.end for a in items], sorted(range(len(items)), key=starts.__getitem__))
+
+
+# ----- low-level blocks -----
+def _pack_arrays(cols: List[array]) -> bytes:
+    parts = [struct.pack("<I", len(cols))]
+    for col in cols:
+        if _SWAP and col.itemsize > 1:
+            col = array(col.typecode, col)
+            col.byteswap()
+        raw = col.tobytes()
+        parts.append(struct.pack("<cQ", col.typecode.encode("ascii"), len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def _unpack_arrays(buf: memoryview) -> List[array]:
+    (n,) = struct.unpack_from("<I", buf, 0)
+    pos = 4
+    cols = []
+    for _ in range(n):
+        code, size = struct.unpack_from("<cQ", buf, pos)
+        pos += 9
+        col = array(code.decode("ascii"))
+        col.frombytes(buf[pos:pos + size])
+        if _SWAP and col.itemsize > 1:
+            col.byteswap()
+        cols.append(col)
+        pos += size
+    return cols
+
+
+class _StringTable:
+    def __init__(self):
+        self._index: Dict[Optional[str], int] = {None: 0}
+        self.items: List[str] = []
+
+    def __call__(self, s: Optional[str]) -> int:
+        if s is None:
+            return 0
+        i = self._index.get(s)
+        if i is None:
+            self.items.append(s)
+            i = self._index[s] = len(self.items)
+        return i
+
+    def column(self, values: Sequence[Optional[str]]) -> array:
+        """Indexes of a whole column; new strings are added in first-seen order"""
+        index, items = self._index, self.items
+        new = [s for s in dict.fromkeys(values) if s not in index]
+        index.update(zip(new, range(len(items) + 1, len(items) + len(new) + 1)))
+        items.extend(new)
+        return array("I", list(map(index.__getitem__, values)))
+
+    def pack(self) -> bytes:
+        blob = "".join(self.items).encode("utf-8")
+        return _pack_arrays([array("I", [len(s) for s in self.items]), array("B", blob)])
+
+    @staticmethod
+    def unpack(buf: memoryview) -> List[Optional[str]]:
+        lens, blob = _unpack_arrays(buf)
+        text = blob.tobytes().decode("utf-8")
+        ends = list(accumulate(lens))
+        return [None] + [text[a:b] for a, b in zip([0] + ends[:-1], ends)]
+
+
+def _ts(dt: Optional[datetime]) -> int:
+    return NULL_TIME if dt is None else (dt - EPOCH) // ONE_SECOND
+
+
+def _stamps(col: Sequence[Optional[datetime]]) -> array:
+    if None in col:
+        return array("q", list(map(_ts, col)))
+    return array("q", list(map(ONE_SECOND.__rfloordiv__, map(sub, col, repeat(EPOCH)))))
+
+
+def _times(col: array) -> List[Optional[datetime]]:
+    return [None if t == NULL_TIME else EPOCH + timedelta(seconds=t) for t in col]
+
+
+# ----- encode / decode -----
+_PATIENT_FIELDS = attrgetter("id", "patient_id", "name", "age", "created_at",
+                             "admission_date", "is_discharged", "discharge_date")
+_STAFF_FIELDS = attrgetter("id", "staff_id", "name", "age", "position", "is_active", "created_at")
+_APPT_FIELDS = attrgetter("patient_person_id", "staff_person_id", "dept_name", "start", "end",
+                          "status", "notes", "id", "series_id")
+
+
+class SnapshotRows(NamedTuple):
+    """Plain values of a snapshot, taken by ``capture`` so ``encode_rows`` can run on any thread."""
+    hospital: Tuple[str, str]
+    depts: List[tuple]         # (name, capacity, patient count, staff count)
+    patient_objs: List[Patient]  # only to hand new record keys back (attach_records)
+    patients: List[tuple]      # _PATIENT_FIELDS
+    records: list              # per patient: the record text or its (source, key)
+    staff: List[tuple]         # _STAFF_FIELDS
+    appts: List[tuple]         # _APPT_FIELDS
+    series: List[dict]
+
+
+def capture(hospital: Hospital, appts) -> SnapshotRows:
+    """SnapshotRows of ``hospital`` and an AppointmentManager-like ``appts``."""
+    depts = list(hospital.departments.values())
+    patients = [p for d in depts for p in d.patients]
+    return SnapshotRows(
+        (hospital.name, hospital.location),
+        [(d.name, d.capacity, len(d.patients), len(d.staff)) for d in depts],
+        patients,
+        list(map(_PATIENT_FIELDS, patients)),
+        [p.record_ref() for p in patients],
+        list(map(_STAFF_FIELDS, (s for d in depts for s in d.staff))),
+        list(map(_APPT_FIELDS, appts.items)),
+        [sr.to_dict() for sr in appts.series.values()],
+    )
+
+
+def _columns(rows: List[tuple], width: int) -> List[list]:
+    return [list(map(itemgetter(k), rows)) for k in range(width)]
+
+
+def _text(ref) -> str:
+    return ref if isinstance(ref, str) else ref[0].get(ref[1])
+
+
+def _record_columns(refs: list, S: _StringTable, records: Optional[RecordSidecar], compact: bool
+                    ) -> Tuple[List[array], Optional[RecordSidecar], list]:
+    """(inline string, sidecar offset, sidecar length) columns, the sidecar used and each record's key.
+
+    Length -1 means inline. With ``compact``, a sidecar that is mostly replaced
+    bodies is first copied into its next generation, which is then used.
+    """
+    if records is None:
+        return ([S.column([_text(r) for r in refs]),
+                 array("q", [0] * len(refs)), array("q", [-1] * len(refs))], None, [])
+    keys = [None if isinstance(r, str) or r[0] is not records else r[1] for r in refs]
+    if compact:
+        live = [k for k in keys if k is not None]
+        if records.wants_compaction(live):
+            records, moved = records.compact(live)
+            keys = [None if k is None else moved[k] for k in keys]
+    # New and edited records go to the end of the sidecar
+    pending = [i for i, k in enumerate(keys) if k is None]
+    for i, k in zip(pending, records.append(_text(refs[i]) for i in pending)):
+        keys[i] = k
+    return ([array("I", [0] * len(refs)),
+             array("q", [k[0] for k in keys]), array("q", [k[1] for k in keys])], records, keys)
+
+
+def attach_records(rows: SnapshotRows, records: Optional[RecordSidecar], keys: list):
+    """Let the captured patients drop their record copies in favour of ``keys`` in ``records``.
+
+    Patients whose record changed since ``capture`` keep theirs. Call it on
+    the thread that edits the patients.
+    """
+    if records is None:
+        return
+    for p, ref, key in zip(rows.patient_objs, rows.records, keys):
+        if p.record_ref() is ref and (isinstance(ref, str) or ref[0] is not records):
+            p.attach_record(records, key)
+
+
+def encode(hospital: Hospital, appts, meta: Optional[dict] = None,
+           records: Optional[RecordSidecar] = None) -> bytes:
+    """Snapshot bytes for ``hospital`` and an AppointmentManager-like ``appts``.
+
+    With ``records``, medical records not yet in that sidecar are appended to it
+    and the snapshot only stores their positions.
+    """
+    rows = capture(hospital, appts)
+    data, records, keys = encode_rows(rows, meta, records)
+    attach_records(rows, records, keys)
+    return data
+
+
+def encode_rows(rows: SnapshotRows, meta: Optional[dict] = None, records: Optional[RecordSidecar] = None,
+                compact: bool = False) -> Tuple[bytes, Optional[RecordSidecar], list]:
+    """(snapshot bytes, sidecar used, record keys) for captured rows.
+
+    The sidecar's file name goes into META as "records"; pass the sidecar and
+    keys to attach_records afterwards. See _record_columns for ``compact``.
+    """
+    S = _StringTable()
+    rec_cols, records, keys = _record_columns(rows.records, S, records, compact)
+    rec_inline, rec_off, rec_len = rec_cols
+    if records is not None:
+        meta = dict(meta or {}, records=records.name)
+    p_id, p_pid, p_name, p_age, p_created, p_adm, p_dis, p_disdate = _columns(rows.patients, 8)
+    s_id, s_sid, s_name, s_age, s_pos, s_active, s_created = _columns(rows.staff, 7)
+    a_pat, a_staff, a_dept, a_start, a_end, a_status, a_notes, a_id, a_series = _columns(rows.appts, 9)
+    blocks = [
+        (b"HOSP", _pack_arrays([array("I", [S(rows.hospital[0]), S(rows.hospital[1])])])),
+        (b"DEPT", _pack_arrays([
+            array("I", [S(d[0]) for d in rows.depts]),
+            array("q", [d[1] for d in rows.depts]),
+            array("I", [d[2] for d in rows.depts]),
+            array("I", [d[3] for d in rows.depts]),
+        ])),
+        (b"PATI", _pack_arrays([
+            S.column(p_id),
+            S.column(p_pid),
+            S.column(p_name),
+            array("q", p_age),
+            _stamps(p_created),
+            rec_inline,
+            _stamps(p_adm),
+            array("B", [1 if d else 0 for d in p_dis]),
+            _stamps(p_disdate),
+            rec_off,
+            rec_len,
+        ])),
+        (b"STAF", _pack_arrays([
+            S.column(s_id),
+            S.column(s_sid),
+            S.column(s_name),
+            array("q", s_age),
+            S.column(s_pos),
+            array("B", [1 if a else 0 for a in s_active]),
+            _stamps(s_created),
+        ])),
+        (b"APPT", _pack_arrays([
+            S.column(a_pat),
+            S.column(a_staff),
+            S.column(a_dept),
+            _stamps(a_start),
+            _stamps(a_end),
+            S.column(a_status),
+            S.column(a_notes),
+            S.column(a_id),
+            S.column(a_series),
+        ])),
+        (b"SERI", json.dumps(rows.series, ensure_ascii=False).encode("utf-8")),
+        (b"META", json.dumps(meta or {}).encode("utf-8")),
+    ]
+    # The string table is complete only now, but readers need it first
+    blocks.insert(0, (b"STRS", S.pack()))
+    out = [MAGIC, struct.pack("<HH", VERSION, 0)]
+    for tag, payload in blocks:
+        out.append(tag + struct.pack("<Q", len(payload)))
+        out.append(payload)
+    return b"".join(out), records, keys
+
+
+def _blocks(data: bytes) -> Tuple[int, Dict[bytes, memoryview]]:
+    """(version, tag -> payload) of snapshot bytes"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a hospital snapshot file")
+    version, _ = struct.unpack_from("<HH", data, len(MAGIC))
+    if version > VERSION:
+        raise ValueError(f"Snapshot version {version} is newer than this program supports ({VERSION})")
+    view = memoryview(data)
+    blocks: Dict[bytes, memoryview] = {}
+    pos = len(MAGIC) + 4
+    while pos < len(data):
+        tag = bytes(view[pos:pos + 4])
+        (size,) = struct.unpack_from("<Q", data, pos + 4)
+        blocks[tag] = view[pos + 12:pos + 12 + size]
+        pos += 12 + size
+    return version, blocks
+
+
+def read_meta(data: bytes) -> dict:
+    """Just the META block, e.g. to find the record sidecar before decoding"""
+    return json.loads(bytes(_blocks(data)[1].get(b"META", b"{}")).decode("utf-8"))
+
+
+def decode(data: bytes, make_appointment: Callable,
+           records: Optional[RecordSidecar] = None
+           ) -> Tuple[Hospital, list, List[dict], dict, AppointmentColumns]:
+    """(hospital, appointments, series dicts, meta, appointment columns) from snapshot bytes.
+
+    ``make_appointment`` is called positionally like Appointment(patient_person_id,
+    staff_person_id, dept_name, start, end, status, notes, appt_id, series_id).
+    Records kept in a sidecar are attached to ``records`` and read on demand.
+    """
+    version, blocks = _blocks(data)
+
+    S = _StringTable.unpack(blocks[b"STRS"])
+    name, location = _unpack_arrays(blocks[b"HOSP"])[0]
+    h = Hospital(S[name], S[location], with_defaults=False)
+
+    d_name, d_cap, d_npat, d_nstaff = _unpack_arrays(blocks[b"DEPT"])
+    p_cols = _unpack_arrays(blocks[b"PATI"])
+    if version < 2:
+        p_cols += [array("q", [0] * len(p_cols[0])), array("q", [-1] * len(p_cols[0]))]
+    p_id, p_pid, p_name, p_age, p_created, p_record, p_adm, p_dis, p_disdate, p_roff, p_rlen = p_cols
+    if records is None and any(n >= 0 for n in p_rlen):
+        raise ValueError("Snapshot keeps medical records in a separate file")
+    patients = [
+        Patient.restore(S[i], S[pid], S[n], age, S[rec] or "", created, adm, bool(dis), disdate)
+        for i, pid, n, age, created, rec, adm, dis, disdate in zip(
+            p_id, p_pid, p_name, p_age, _times(p_created), p_record, _times(p_adm), p_dis, _times(p_disdate))
+    ]
+    for p, off, length in zip(patients, p_roff, p_rlen):
+        if length >= 0:
+            p.attach_record(records, (off, length))
+    s_id, s_sid, s_name, s_age, s_pos, s_active, s_created = _unpack_arrays(blocks[b"STAF"])
+    staff = [
+        Staff.restore(S[i], S[sid], S[n], age, S[position], None, bool(active), created)
+        for i, sid, n, age, position, active, created in zip(
+            s_id, s_sid, s_name, s_age, s_pos, s_active, _times(s_created))
+    ]
+    pi = si = 0
+    for n, cap, npat, nstaff in zip(d_name, d_cap, d_npat, d_nstaff):
+        dept = Department(S[n], cap)
+        for p in patients[pi:pi + npat]:
+            dept.attach_patient(p)
+        for s in staff[si:si + nstaff]:
+            dept.attach_staff(s)
+        pi += npat
+        si += nstaff
+        h.attach_department(dept)
+
+    a_pat, a_staff, a_dept, a_start, a_end, a_status, a_notes, a_id, a_series = _unpack_arrays(blocks[b"APPT"])
+    cols = AppointmentColumns(
+        [S[i] for i in a_id], [S[i] for i in a_pat], [S[i] or "" for i in a_staff],
+        [S[i] for i in a_status], _times(a_start), _times(a_end),
+        sorted(range(len(a_start)), key=a_start.__getitem__))
+    items = [
+        make_appointment(pat, st or None, S[dept], start, end, status, S[notes] or "", i, S[sid])
+        for pat, st, dept, start, end, status, notes, i, sid in zip(
+            cols.patients, cols.staff, a_dept, cols.starts, cols.ends, cols.statuses, a_notes, cols.ids, a_series)
+    ]
+    series = json.loads(bytes(blocks.get(b"SERI", b"[]")).decode("utf-8"))
+    meta = json.loads(bytes(blocks.get(b"META", b"{}")).decode("utf-8"))
+    return h, items, series, meta, cols
+
+
+def write_atomic(path: str, data: bytes):
+    """Temp file in the same folder, fsync, then os.replace over ``path``."""
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
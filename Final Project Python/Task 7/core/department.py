@@ -1,10 +1,17 @@
-from typing import List, Optional
+from datetime import datetime
+from functools import reduce
+from itertools import compress
+from typing import Dict, List, Optional
 from patient import Patient
+from patient_store import PatientStore, mask_and
 from staff import Staff
+from tracking import Tracked
 
-class Department:
+class Department(Tracked):
     """Enhanced Department class with capacity management."""
-    
+    # New departments keep a PatientStore column copy of their patients when set
+    columnar = False
+
     def __init__(self, name: str, capacity: int = 50):
         """
         Initialize department with configurable capacity.
@@ -16,27 +23,178 @@ class Department:
         self.name = name.strip()
         self.capacity = max(10, capacity)  # Minimum capacity 10
         self.patients: List[Patient] = []
+        # Admitted patients in admission order, keyed by id(); len() is the bed occupancy
+        self._active: Dict[int, Patient] = {}
         self.staff: List[Staff] = []
+        self.store: Optional[PatientStore] = PatientStore() if self.columnar else None
         self.dept_code = name[:3].upper() + str(hash(name) % 1000)
+        self._hospital = None  # Set by Hospital.attach_department
+        self.touch()
+
+        # Running counters, kept in sync by the methods below
+        self.patient_count = 0
+        self.active_patient_count = 0
+        self.discharged_patient_count = 0
+        self.staff_count = 0
+        self.active_staff_count = 0
+
+    def _rename(self, name: str) -> None:
+        """Set the name (Hospital.rename_department keeps its index in step)"""
+        self.name = name
+        self.touch()
+        for s in self.staff:
+            s.department = name
+            s.touch()
+        # Saved patient rows carry the department name
+        for p in self.patients:
+            p.touch()
+
+    def _count(self, **deltas: int) -> None:
+        """Apply counter deltas here and on the owning hospital"""
+        for key, delta in deltas.items():
+            setattr(self, key, getattr(self, key) + delta)
+        if self._hospital is not None:
+            self._hospital._count(**deltas)
+
+    def _register(self, person) -> None:
+        if self._hospital is not None:
+            self._hospital._register(person)
+
+    def _unregister(self, person) -> None:
+        if self._hospital is not None:
+            self._hospital._unregister(person)
+
+    def _emit(self, op: str, **objects) -> None:
+        if self._hospital is not None:
+            self._hospital._emit(op, **objects)
 
     def add_patient(self, patient: Patient) -> bool:
         """Admit patient if capacity allows"""
-        if len(self.patients) >= self.capacity:
+        if not self.has_room():
             print(f"Cannot admit {patient.name}. Department at capacity!")
             return False
             
-        self.patients.append(patient)
+        self.attach_patient(patient)
         print(f"Patient {patient.name} admitted to {self.name}")
         return True
 
+    def has_room(self) -> bool:
+        """Whether a bed is free; discharged patients don't occupy one"""
+        return len(self._active) < self.capacity
+
+    def attach_patient(self, patient: Patient) -> None:
+        """Add patient without capacity check or console output"""
+        self.patients.append(patient)
+        if self.store is not None:
+            self.store.append(patient)
+        patient._dept = self
+        self._register(patient)
+        patient.touch()
+        if patient.is_discharged:
+            self._count(patient_count=1, discharged_patient_count=1)
+        else:
+            self._active[id(patient)] = patient
+            self._count(patient_count=1, active_patient_count=1)
+        self._emit("admit", dept=self, patient=patient)
+
+    def detach_patient(self, patient: Patient) -> None:
+        """Remove patient from this department (e.g. before a move)"""
+        if self.store is not None:
+            row = self.store.row_of(patient, self.patients)
+            del self.patients[row]
+            self.store.remove(row)
+        else:
+            self.patients.remove(patient)
+        patient._dept = None
+        self._unregister(patient)
+        patient.touch()
+        if patient.is_discharged:
+            self._count(patient_count=-1, discharged_patient_count=-1)
+        else:
+            del self._active[id(patient)]
+            self._count(patient_count=-1, active_patient_count=-1)
+        self._emit("detach_patient", dept=self, patient=patient)
+
+    def detach_patients(self, patients: List[Patient]) -> None:
+        """Remove several patients with one pass over the list (e.g. when archiving)"""
+        gone = {id(p) for p in patients}
+        keep = [id(p) not in gone for p in self.patients]
+        self.patients[:] = compress(self.patients, keep)
+        if self.store is not None:
+            self.store.keep(keep)
+        discharged = sum(1 for p in patients if p.is_discharged)
+        self._count(patient_count=-len(patients), discharged_patient_count=-discharged,
+                    active_patient_count=discharged - len(patients))
+        for patient in patients:
+            self._active.pop(id(patient), None)
+            patient._dept = None
+            self._unregister(patient)
+            patient.touch()
+            self._emit("detach_patient", dept=self, patient=patient)
+
+    def _sync_row(self, patient: Patient) -> None:
+        if self.store is not None:
+            self.store.update(self.store.row_of(patient, self.patients), patient)
+
+    def _on_patient_discharged(self, patient: Patient, notes: str) -> None:
+        self._sync_row(patient)
+        del self._active[id(patient)]
+        self._count(active_patient_count=-1, discharged_patient_count=1)
+        self._emit("discharge", patient=patient, notes=notes)
+
+    def _on_patient_updated(self, patient: Patient, record_changed: bool) -> None:
+        self._sync_row(patient)
+        self._emit("update_patient", patient=patient, record_changed=record_changed)
+
     def add_staff(self, staff: Staff) -> None:
         """Assign staff member to department"""
         staff.transfer_department(self.name)
+        self.attach_staff(staff)
+
+    def attach_staff(self, staff: Staff) -> None:
+        """Add staff member without console output"""
+        staff.department = self.name
         self.staff.append(staff)
+        staff._dept = self
+        self._register(staff)
+        staff.touch()
+        self._count(staff_count=1, active_staff_count=1 if staff.is_active else 0)
+        self._emit("add_staff", dept=self, staff=staff)
+
+    def _on_staff_active_changed(self, staff: Staff) -> None:
+        self._count(active_staff_count=1 if staff.is_active else -1)
+        self._emit("staff_active", staff=staff)
+
+    def use_store(self, on: bool = True) -> None:
+        """Start (or stop) keeping a PatientStore for the current patients"""
+        self.store = PatientStore(self.patients) if on else None
 
     def get_active_patients(self) -> List[Patient]:
         """Return list of non-discharged patients"""
-        return [p for p in self.patients if not p.is_discharged]
+        return list(self._active.values())
+
+    def find_patients(self, discharged: Optional[bool] = None, age_min: Optional[int] = None,
+                      age_max: Optional[int] = None) -> List[Patient]:
+        """Patients with the given status and age range (None matches anything)"""
+        lo = 0 if age_min is None else age_min
+        hi = max(lo, 1 << 30) if age_max is None else age_max
+        if self.store is not None:
+            masks = []
+            if discharged is not None:
+                masks.append(self.store.with_status(discharged))
+            if age_min is not None or age_max is not None:
+                masks.append(self.store.aged(lo, hi))
+            if not masks:
+                return list(self.patients)
+            return list(compress(self.patients, reduce(mask_and, masks)))
+        return [p for p in self.patients
+                if (discharged is None or p.is_discharged == discharged) and lo <= p.age <= hi]
+
+    def discharged_before(self, cutoff: datetime) -> List[Patient]:
+        """Patients discharged before ``cutoff``"""
+        if self.store is not None:
+            return list(compress(self.patients, self.store.discharged_before(cutoff)))
+        return [p for p in self.patients if p.is_discharged and p.discharge_date and p.discharge_date < cutoff]
 
     def get_staff_by_position(self, position: str) -> List[Staff]:
         """Filter staff by position"""
@@ -1,21 +1,75 @@
-from typing import Dict, List, Optional
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from department import Department
+from patient import Patient
+from staff import Staff
+
+# Arabic harakat, Quranic marks and tatweel; alef/yeh/teh marbuta spellings that users mix up
+_ARABIC_MARKS = re.compile("[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06ed]")
+_ARABIC_LETTERS = str.maketrans({"\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627",
+                                 "\u0671": "\u0627", "\u0649": "\u064a", "\u0629": "\u0647"})
+
+
+@lru_cache(maxsize=4096)
+def department_key(name: str) -> str:
+    """Lookup key for a department name: NFKC, casefolded, Arabic-normalized, single-spaced"""
+    key = unicodedata.normalize("NFKC", name).casefold()
+    key = _ARABIC_MARKS.sub("", key).translate(_ARABIC_LETTERS)
+    return " ".join(key.split())
+
 
 class Hospital:
     """Enhanced Hospital class with default departments."""
     
-    def __init__(self, name: str, location: str):
+    def __init__(self, name: str, location: str, with_defaults: bool = True):
         """
         Initialize hospital with default departments.
         
         Args:
             name: Hospital name
             location: Physical address
+            with_defaults: Create the default departments (off when loading saved data)
         """
         self.name = name.strip()
         self.location = location.strip()
         self.departments: Dict[str, Department] = {}
-        self._initialize_default_departments()
+        # department_key(name) -> the department find_department returns for it: the only
+        # one with that key, or the first loaded when an older file has colliding names
+        self._by_key: Dict[str, Department] = {}
+        # person id -> everyone currently in a department (their department is person._dept)
+        self.patients_by_id: Dict[str, Patient] = {}
+        self.staff_by_id: Dict[str, Staff] = {}
+        # Called as listener(op, **objects) after each mutation (e.g. by the journal)
+        self.listener: Optional[Callable[..., None]] = None
+
+        # Hospital-wide running counters, fed by Department._count
+        self.patient_count = 0
+        self.active_patient_count = 0
+        self.discharged_patient_count = 0
+        self.staff_count = 0
+        self.active_staff_count = 0
+
+        if with_defaults:
+            self._initialize_default_departments()
+
+    def _count(self, **deltas: int) -> None:
+        for key, delta in deltas.items():
+            setattr(self, key, getattr(self, key) + delta)
+
+    def _register(self, person: Union[Patient, Staff]) -> None:
+        registry = self.patients_by_id if isinstance(person, Patient) else self.staff_by_id
+        registry[person.id] = person
+
+    def _unregister(self, person: Union[Patient, Staff]) -> None:
+        registry = self.patients_by_id if isinstance(person, Patient) else self.staff_by_id
+        if registry.get(person.id) is person:
+            del registry[person.id]
+
+    def _emit(self, op: str, **objects) -> None:
+        if self.listener is not None:
+            self.listener(op, **objects)
 
     def _initialize_default_departments(self) -> None:
         """Create common hospital departments"""
@@ -31,19 +85,84 @@ class Hospital:
 
     def add_department(self, department: Department) -> None:
         """Add a new department"""
+        self.check_department_name(department.name)
+        self.attach_department(department)
+        print(f"Department '{department.name}' added successfully")
+
+    def check_department_name(self, name: str, department: Optional[Department] = None) -> None:
+        """Refuse a new name that only differs from another department's in case or spelling variants"""
+        other = self._by_key.get(department_key(name))
+        if name in self.departments or (other is not None and other is not department):
+            raise ValueError(f"Department {name} already exists")
+
+    def attach_department(self, department: Department) -> None:
+        """Add department without console output; its counters join the totals.
+
+        Used when loading too, so names that collide only by key are kept (with
+        a warning) and find_department keeps returning the first of them.
+        """
         if department.name in self.departments:
             raise ValueError(f"Department {department.name} already exists")
-            
+        key = department_key(department.name)
+        first = self._by_key.setdefault(key, department)
+        if first is not department:
+            print(f"Warning: department '{department.name}' matches '{first.name}'; "
+                  f"lookups by name find '{first.name}'")
+
         self.departments[department.name] = department
-        print(f"Department '{department.name}' added successfully")
+        department._hospital = self
+        for person in department.patients + department.staff:
+            self._register(person)
+        self._count(
+            patient_count=department.patient_count,
+            active_patient_count=department.active_patient_count,
+            discharged_patient_count=department.discharged_patient_count,
+            staff_count=department.staff_count,
+            active_staff_count=department.active_staff_count,
+        )
+        self._emit("add_department", dept=department)
 
     def find_department(self, name: str) -> Optional[Department]:
-        """Find department by name (case-insensitive)"""
-        lower_name = name.lower()
-        for dept_name, dept in self.departments.items():
-            if dept_name.lower() == lower_name:
-                return dept
-        return None
+        """Find department by name (case-insensitive, Arabic spelling variants match)"""
+        return self._by_key.get(department_key(name))
+
+    def rename_department(self, department: Department, new_name: str) -> None:
+        """Rename a department, keeping its place in the order; its staff follow the new name.
+
+        Appointments refer to departments by name: with an AppointmentManager in
+        use, rename through AppointmentManager.rename_department instead.
+        """
+        new_name = new_name.strip()
+        old_name = department.name
+        if not new_name:
+            raise ValueError("Department name is required")
+        if new_name == old_name:
+            return
+        old_key, key = department_key(old_name), department_key(new_name)
+        if key != old_key:
+            self.check_department_name(new_name, department)
+        elif new_name in self.departments:
+            raise ValueError(f"Department {new_name} already exists")
+
+        items = [(new_name if name == old_name else name, d) for name, d in self.departments.items()]
+        self.departments.clear()
+        self.departments.update(items)
+        department._rename(new_name)
+
+        if key != old_key and self._by_key.get(old_key) is department:
+            del self._by_key[old_key]
+            # A loaded department that shared the old key takes it over
+            for d in self.departments.values():
+                if department_key(d.name) == old_key:
+                    self._by_key[old_key] = d
+                    break
+        self._by_key.setdefault(key, department)
+        self._emit("rename_department", dept=department, old_name=old_name)
+
+    def locate(self, person_id: str) -> Optional[Tuple[Union[Patient, Staff], Department]]:
+        """(person, department) for a patient or staff member id, or None"""
+        person = self.patients_by_id.get(person_id) or self.staff_by_id.get(person_id)
+        return (person, person._dept) if person is not None else None
 
     def get_all_patients(self) -> List[dict]:
         """Get summary of all patients across departments"""
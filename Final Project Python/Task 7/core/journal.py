@@ -0,0 +1,91 @@
+"""Append-only mutation journal.
+
+Entries are JSON objects, one per line, each carrying an increasing ``seq``.
+Appends are buffered and written + fsync'd in batches. A torn last line left
+by a crash is cut off when the journal is opened, and unreadable lines are
+skipped when reading.
+"""
+import json
+import os
+from typing import List
+
+
+class MutationJournal:
+    def __init__(self, path: str, seq: int = 0, batch_size: int = 256):
+        self.path = path
+        self.seq = seq
+        self.batch_size = batch_size
+        self._pending: List[str] = []
+        self._drop_torn_tail(path)
+        self._f = open(path, "a", encoding="utf-8")
+        # Entries written since the last rotation (i.e. not yet folded into a snapshot)
+        self.count = len(self.read(path))
+
+    def append(self, op: str, data: dict):
+        self.seq += 1
+        entry = {"seq": self.seq, "op": op}
+        entry.update(data)
+        self._pending.append(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        self.count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._f.write("\n".join(self._pending) + "\n")
+        self._pending.clear()
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def rotate(self, segment_path: str):
+        """Move everything written so far to ``segment_path`` and continue in an empty file."""
+        self.flush()
+        self._f.close()
+        if os.path.exists(segment_path):
+            # A previous compaction did not finish; keep its entries in front of ours
+            with open(self.path, "r", encoding="utf-8") as src, open(segment_path, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, segment_path)
+        self._f = open(self.path, "a", encoding="utf-8")
+        self.count = 0
+
+    def reset(self):
+        """Drop every entry; used once a snapshot containing them has been written."""
+        self._pending.clear()
+        self._f.truncate(0)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+    @staticmethod
+    def _drop_torn_tail(path: str):
+        """Truncate ``path`` after its last complete line so appends start on a fresh one."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def read(path: str) -> List[dict]:
+        entries: List[dict] = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
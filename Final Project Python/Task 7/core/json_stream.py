@@ -0,0 +1,107 @@
+"""Incremental JSON reading for large save files.
+
+JsonStreamReader walks a document one token at a time instead of loading it
+whole: callers step into the objects/arrays they care about and decode each
+small record (a patient, an appointment) with the stdlib decoder.
+"""
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Optional
+
+_WS = " \t\n\r"
+_NUM_TAIL = ".eE+-0123456789"
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamReader:
+    def __init__(self, f: BinaryIO, total_bytes: Optional[int] = None, chunk_size: int = 1 << 20):
+        self._f = f
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the file is exhausted."""
+        if self._eof:
+            return False
+        raw = self._f.read(self.chunk_size)
+        self.bytes_read += len(raw)
+        if not raw:
+            self._eof = True
+        text = self._utf8.decode(raw, final=self._eof)
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return bool(raw) or bool(text)
+
+    def _peek(self) -> str:
+        while True:
+            buf, pos, n = self._buf, self._pos, len(self._buf)
+            while pos < n and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+
+    def _expect(self, ch: str):
+        got = self._peek()
+        if got != ch:
+            raise ValueError(f"Expected {ch!r} but found {got!r} after byte {self.bytes_read}")
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        """Decode the complete value at the cursor (used for records and scalars)."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut at the buffer edge ("12" of "12.5e3") may continue in the next chunk
+            if (end == len(self._buf) or self._buf[end] in _NUM_TAIL) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield the keys of the object at the cursor; the caller consumes each value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key after byte {self.bytes_read}")
+            self._expect(":")
+            yield key
+            ch = self._peek()
+            self._pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {ch!r} after byte {self.bytes_read}")
+
+    def iter_array(self) -> Iterator[int]:
+        """Yield once per element of the array at the cursor; the caller consumes each element."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            ch = self._peek()
+            self._pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"Expected ',' or ']' but found {ch!r} after byte {self.bytes_read}")
@@ -4,7 +4,9 @@ from person import Person
 
 class Patient(Person):
     """Enhanced Patient class with medical record tracking."""
-    
+    __slots__ = ("_record", "admission_date", "is_discharged",
+                 "discharge_date", "_patient_id")
+
     def __init__(self, name: str, age: int, medical_record: str):
         """
         Initialize a patient with admission tracking.
@@ -17,16 +19,92 @@ class Patient(Person):
         self.admission_date = datetime.now()
         self.is_discharged = False
         self.discharge_date: Optional[datetime] = None
-        self.patient_id = f"PAT-{self.id[:5]}"  # Patient-specific ID
+        self._patient_id: Optional[str] = None  # Only set when it doesn't follow from id
+
+    @classmethod
+    def restore(cls, id: Optional[str], patient_id: Optional[str], name: str, age: int,
+                medical_record: str, created_at: Optional[datetime],
+                admission_date: Optional[datetime], is_discharged: bool,
+                discharge_date: Optional[datetime]) -> "Patient":
+        """Rebuild a saved patient without generating IDs or timestamps"""
+        p = cls.__new__(cls)
+        p._restore(id, name, age, created_at)
+        p.medical_record = medical_record
+        p.admission_date = admission_date
+        p.is_discharged = is_discharged
+        p.discharge_date = discharge_date
+        p.patient_id = patient_id
+        return p
+
+    @property
+    def patient_id(self) -> str:
+        """Patient-specific ID, derived from ``id`` unless saved data says otherwise"""
+        return self._patient_id or f"PAT-{self.id[:5]}"
+
+    @patient_id.setter
+    def patient_id(self, value: Optional[str]) -> None:
+        self._patient_id = None if value == f"PAT-{self.id[:5]}" else value
+
+    @property
+    def medical_record(self) -> str:
+        """Record text; read from its record store on demand when kept out of line"""
+        # The text, or a (source, key) pair; one slot so other threads never see half a swap
+        record = self._record
+        if isinstance(record, str):
+            return record
+        source, key = record
+        return source.get(key)
+
+    @medical_record.setter
+    def medical_record(self, value: str) -> None:
+        self._record = value
+        self.touch()
 
-    def discharge(self, notes: str = "") -> None:
-        """Mark patient as discharged with optional notes"""
+    def attach_record(self, source, key) -> None:
+        """Keep the record only in ``source`` under ``key`` and drop the in-memory copy"""
+        self._record = (source, key)
+
+    def record_ref(self):
+        """The record text, or the (source, key) pair it is kept under; compare by identity"""
+        return self._record
+
+    def record_key(self, source):
+        """Key of the unchanged record in ``source``, or None if it must be written there"""
+        record = self._record
+        if not isinstance(record, str) and record[0] is source:
+            return record[1]
+        return None
+
+    def load_record(self) -> None:
+        """Pull the record back into memory, e.g. before its store is closed (not an edit)"""
+        if not isinstance(self._record, str):
+            self._record = self.medical_record
+
+    def discharge(self, notes: str = "", when: Optional[datetime] = None) -> None:
+        """Mark patient as discharged with optional notes (``when`` defaults to now)"""
         if self.is_discharged:
             raise ValueError("Patient already discharged")
             
         self.is_discharged = True
-        self.discharge_date = datetime.now()
+        self.discharge_date = when or datetime.now()
         self.medical_record += f"\n[Discharge Note] {notes}"
+        self.touch()
+        if self._dept is not None:
+            self._dept._on_patient_discharged(self, notes)
+
+    def update_details(self, name: str, age: int, medical_record: str) -> None:
+        """Edit name, age and medical record"""
+        if age <= 0:
+            raise ValueError("Age must be a positive number")
+        self.name = name.strip()
+        self.age = age
+        medical_record = medical_record.strip()
+        record_changed = medical_record != self.medical_record
+        if record_changed:
+            self.medical_record = medical_record
+        self.touch()
+        if self._dept is not None:
+            self._dept._on_patient_updated(self, record_changed)
 
     def view_record(self) -> str:
         """Get formatted medical record with admission status"""
@@ -0,0 +1,84 @@
+"""Column copy of a department's patients for whole-department queries.
+
+The Patient objects stay the source of truth; status/age filters and the
+archive selection read the columns through byte masks and ``itertools.compress``.
+Name search, CSV export and occupancy still read the Patient objects.
+"""
+from array import array
+from datetime import datetime
+from itertools import compress
+from typing import Dict, Iterator, Optional, Sequence
+
+from patient import Patient
+
+NO_TIME = float("nan")  # compares false against every cutoff
+_FLIP = bytes([1, 0]) + bytes(254)
+
+
+def _epoch(dt: Optional[datetime]) -> float:
+    return dt.timestamp() if dt else NO_TIME
+
+
+def mask_and(a: bytes, b: bytes) -> bytes:
+    """Row-wise AND of two 0/1 masks of the same length"""
+    return (int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+class PatientStore:
+    """Age / admitted-flag / discharge-time columns parallel to a patient list."""
+
+    def __init__(self, patients: Sequence[Patient] = ()):
+        self.ages = array("q")
+        self.admitted = bytearray()      # 1 while the patient is not discharged
+        self.discharged_at = array("d")  # epoch seconds, NaN while admitted
+        # id(patient) -> row, rebuilt lazily after removals shift the rows
+        self._rows: Optional[Dict[int, int]] = {}
+        self.extend(patients)
+
+    def __len__(self) -> int:
+        return len(self.ages)
+
+    def row_of(self, patient: Patient, patients: Sequence[Patient]) -> int:
+        if self._rows is None:
+            self._rows = {id(p): i for i, p in enumerate(patients)}
+        return self._rows[id(patient)]
+
+    # ----- keeping in step with the list -----
+    def extend(self, patients: Sequence[Patient]) -> None:
+        for p in patients:
+            if self._rows is not None:
+                self._rows[id(p)] = len(self.ages)
+            self.ages.append(p.age)
+            self.admitted.append(0 if p.is_discharged else 1)
+            self.discharged_at.append(_epoch(p.discharge_date))
+
+    def append(self, patient: Patient) -> None:
+        self.extend((patient,))
+
+    def remove(self, row: int) -> None:
+        for col in (self.ages, self.admitted, self.discharged_at):
+            del col[row]
+        self._rows = None
+
+    def keep(self, selector: Sequence[bool]) -> None:
+        """Drop every row whose selector entry is false"""
+        self.ages = array("q", compress(self.ages, selector))
+        self.admitted = bytearray(compress(self.admitted, selector))
+        self.discharged_at = array("d", compress(self.discharged_at, selector))
+        self._rows = None
+
+    def update(self, row: int, patient: Patient) -> None:
+        """Refresh one row from its patient (after an edit or discharge)"""
+        self.ages[row] = patient.age
+        self.admitted[row] = 0 if patient.is_discharged else 1
+        self.discharged_at[row] = _epoch(patient.discharge_date)
+
+    # ----- masks (one 0/1 byte per row) -----
+    def with_status(self, discharged: bool) -> bytes:
+        return self.admitted.translate(_FLIP) if discharged else bytes(self.admitted)
+
+    def aged(self, age_min: int, age_max: int) -> bytes:
+        return bytes(map(range(age_min, age_max + 1).__contains__, self.ages))
+
+    def discharged_before(self, cutoff: datetime) -> Iterator[bool]:
+        return map(cutoff.timestamp().__gt__, self.discharged_at)
@@ -1,10 +1,12 @@
 import uuid
 from datetime import datetime
 from typing import Optional
+from tracking import Tracked
 
-class Person:
+class Person(Tracked):
     """Base class for all people in the hospital with improved features."""
-    
+    __slots__ = ("id", "name", "age", "created_at", "_dept", "_stamp")
+
     def __init__(self, name: str, age: int) -> None:
         """
         Initialize a person with auto-generated ID, name, and age.
@@ -20,6 +22,18 @@ class Person:
         self.name = name.strip()
         self.age = age
         self.created_at = datetime.now()
+        self._dept = None  # Department holding this person; maintained by Department
+        self.touch()
+
+    def _restore(self, id: Optional[str], name: str, age: int,
+                 created_at: Optional[datetime]) -> None:
+        """Set saved base fields directly, skipping validation and timestamping"""
+        self.id = id or self._generate_id()
+        self.name = name
+        self.age = age
+        self.created_at = created_at
+        self._dept = None
+        self.touch()
 
     def _generate_id(self) -> str:
         """Generate a unique 8-character ID using UUID"""
@@ -0,0 +1,186 @@
+"""Out-of-line storage for patient medical records.
+
+Record bodies are unbounded free text that only the details dialog and
+printing show, so the binary and SQLite backends keep them out of the patient
+objects: a patient holds a (source, key) reference and the body is read on
+demand. Each source keeps a bounded LRU cache of recently read bodies.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+CACHE_SIZE = 256
+SIDECAR_MAGIC = b"HOSPRECS"
+
+
+class RecordSource:
+    """Base for record stores: ``get`` goes through the LRU cache, ``_fetch`` reads storage."""
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> str:
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+            body = self._fetch(key)
+            self._cache[key] = body
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return body
+
+    def forget(self, key: Hashable):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def _fetch(self, key: Hashable) -> str:
+        raise NotImplementedError
+
+
+class RecordSidecar(RecordSource):
+    """Append-only file of UTF-8 record bodies next to a snapshot; keys are (offset, length).
+
+    Bodies are never rewritten; ``compact`` copies the live ones into the next
+    generation (``<data file>.records.<n>``). One instance per file.
+    """
+    _open: "weakref.WeakValueDictionary[str, RecordSidecar]" = weakref.WeakValueDictionary()
+    _open_lock = threading.Lock()
+    # Dead bytes below this never trigger a compaction
+    compact_min = 64 * 1024
+
+    def __init__(self, path: str, cache_size: int = CACHE_SIZE):
+        super().__init__(cache_size)
+        self.path = path
+        self._f = None
+
+    @property
+    def name(self) -> str:
+        """File name as recorded in the snapshot (relative to its folder)"""
+        return os.path.basename(self.path)
+
+    @classmethod
+    def _for_path(cls, path: str) -> "RecordSidecar":
+        with cls._open_lock:
+            sidecar = cls._open.get(path)
+            if sidecar is None:
+                sidecar = cls._open[path] = cls(path)
+            return sidecar
+
+    @classmethod
+    def for_snapshot(cls, snapshot_path: str, name: Optional[str] = None) -> "RecordSidecar":
+        """The sidecar ``name`` next to ``snapshot_path`` (the first generation by default)"""
+        base = os.path.abspath(snapshot_path)
+        return cls._for_path(os.path.join(os.path.dirname(base), name) if name else base + ".records")
+
+    @classmethod
+    def generations(cls, snapshot_path: str) -> List["RecordSidecar"]:
+        """Every record file on disk that belongs to ``snapshot_path``, oldest first."""
+        first = os.path.abspath(snapshot_path) + ".records"
+        folder, prefix = os.path.split(first)
+        found = []
+        for f in os.listdir(folder):
+            if f == prefix:
+                found.append((0, f))
+            elif f.startswith(prefix + ".") and f[len(prefix) + 1:].isdigit():
+                found.append((int(f[len(prefix) + 1:]), f))
+        return [cls._for_path(os.path.join(folder, f)) for _, f in sorted(found)]
+
+    @classmethod
+    def discard_stale(cls, snapshot_path: str, keep: "RecordSidecar"):
+        """Delete the generations of ``snapshot_path`` other than ``keep``."""
+        for sidecar in cls.generations(snapshot_path):
+            if sidecar is not keep:
+                sidecar.discard()
+
+    def _read(self, key: Tuple[int, int]) -> bytes:
+        offset, length = key
+        if length == 0:
+            return b""
+        if self._f is None:
+            self._f = open(self.path, "rb", buffering=0)
+        self._f.seek(offset)
+        data = self._f.read(length)
+        if len(data) != length:
+            raise ValueError(f"Record file {self.path} is truncated")
+        return data
+
+    def _fetch(self, key: Tuple[int, int]) -> str:
+        return self._read(key).decode("utf-8")
+
+    def append(self, bodies: Iterable[str]) -> List[Tuple[int, int]]:
+        """Write bodies at the end of the file (fsynced); returns their keys in order."""
+        raws = [b.encode("utf-8") for b in bodies]
+        keys: List[Tuple[int, int]] = []
+        if not any(raws):
+            return [(0, 0)] * len(raws)
+        with self._lock, open(self.path, "ab") as f:
+            pos = f.seek(0, os.SEEK_END)
+            if pos == 0:
+                f.write(SIDECAR_MAGIC)
+                pos = len(SIDECAR_MAGIC)
+            for raw in raws:
+                keys.append((pos, len(raw)) if raw else (0, 0))
+                pos += len(raw)
+            f.write(b"".join(raws))
+            f.flush()
+            os.fsync(f.fileno())
+        return keys
+
+    def wants_compaction(self, live_keys: Iterable[Tuple[int, int]]) -> bool:
+        """Whether bodies no longer at ``live_keys`` take up most of the file."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        live = sum(length for _, length in set(live_keys))
+        dead = size - len(SIDECAR_MAGIC) - live
+        return dead > max(live, self.compact_min)
+
+    def compact(self, live_keys: Iterable[Tuple[int, int]]
+                ) -> Tuple["RecordSidecar", Dict[Tuple[int, int], Tuple[int, int]]]:
+        """Copy the bodies at ``live_keys`` into the next generation file (fsynced).
+
+        Returns that sidecar and the old -> new key of every copied body. This
+        file is left alone, since the snapshot on disk still points into it.
+        """
+        snapshot_path = self.path[:self.path.rindex(".records")]
+        last = self.generations(snapshot_path)[-1].name
+        gen = int(last.rpartition(".records")[2][1:] or 0) + 1
+        fresh = self.for_snapshot(snapshot_path, f"{os.path.basename(snapshot_path)}.records.{gen}")
+        moved: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        tmp = fresh.path + ".tmp"
+        with self._lock, open(tmp, "wb") as f:
+            f.write(SIDECAR_MAGIC)
+            pos = len(SIDECAR_MAGIC)
+            for key in sorted(set(live_keys)):
+                if not key[1]:
+                    moved[key] = key
+                    continue
+                f.write(self._read(key))
+                moved[key] = (pos, key[1])
+                pos += key[1]
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, fresh.path)
+        return fresh, moved
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def discard(self):
+        """Delete the file and retire this instance; nothing may still point into it."""
+        with self._open_lock:
+            if self._open.get(self.path) is self:
+                del self._open[self.path]
+        self.close()
+        self._cache.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,287 @@
+"""SQLite storage for a hospital and its appointments.
+
+SqliteStore remembers the rows it last read or wrote; ``save`` compares the
+live objects against that snapshot and writes only new, changed and deleted
+rows, all inside one transaction. Objects whose change stamp (see tracking.py)
+has not moved since are not even turned back into rows. Medical records live in their own table and
+are read on demand (the store is the patients' RecordSource).
+"""
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from hospital import Hospital
+from record_store import RecordSource
+from department import Department
+from patient import Patient
+from staff import Staff
+
+SCHEMA_VERSION = 2
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS hospital (
+    id INTEGER PRIMARY KEY, ord INTEGER NOT NULL, name TEXT NOT NULL, location TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS departments (
+    name TEXT PRIMARY KEY, ord INTEGER NOT NULL, capacity INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS patients (
+    id TEXT PRIMARY KEY, ord INTEGER NOT NULL, patient_id TEXT, dept_name TEXT NOT NULL,
+    name TEXT NOT NULL, age INTEGER NOT NULL, created_at TEXT, medical_record TEXT,
+    admission_date TEXT, is_discharged INTEGER NOT NULL, discharge_date TEXT);
+CREATE INDEX IF NOT EXISTS patients_by_dept ON patients (dept_name, ord);
+CREATE INDEX IF NOT EXISTS patients_by_patient_id ON patients (patient_id);
+CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS staff (
+    id TEXT PRIMARY KEY, ord INTEGER NOT NULL, staff_id TEXT, dept_name TEXT NOT NULL,
+    name TEXT NOT NULL, age INTEGER NOT NULL, position TEXT, is_active INTEGER NOT NULL,
+    created_at TEXT);
+CREATE INDEX IF NOT EXISTS staff_by_dept ON staff (dept_name, ord);
+CREATE TABLE IF NOT EXISTS appointments (
+    id TEXT PRIMARY KEY, ord INTEGER NOT NULL, patient_person_id TEXT NOT NULL,
+    staff_person_id TEXT, dept_name TEXT NOT NULL, start TEXT NOT NULL, "end" TEXT NOT NULL,
+    status TEXT NOT NULL, notes TEXT, series_id TEXT);
+CREATE INDEX IF NOT EXISTS appointments_by_ord ON appointments (ord);
+CREATE INDEX IF NOT EXISTS appointments_by_patient ON appointments (patient_person_id, start);
+CREATE INDEX IF NOT EXISTS appointments_by_staff ON appointments (staff_person_id, start);
+CREATE INDEX IF NOT EXISTS appointments_by_day ON appointments (start);
+CREATE INDEX IF NOT EXISTS appointments_by_dept_status ON appointments (dept_name, status, start);
+CREATE TABLE IF NOT EXISTS series (
+    id TEXT PRIMARY KEY, ord INTEGER NOT NULL, patient_person_id TEXT NOT NULL,
+    staff_person_id TEXT, dept_name TEXT NOT NULL, start TEXT NOT NULL, "end" TEXT NOT NULL,
+    rule TEXT NOT NULL, status TEXT NOT NULL, notes TEXT);
+CREATE INDEX IF NOT EXISTS series_by_patient ON series (patient_person_id);
+CREATE INDEX IF NOT EXISTS series_by_staff ON series (staff_person_id);
+"""
+
+# table -> (key column, data columns); "ord" keeps list order between saves
+COLUMNS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "hospital": ("id", ("name", "location")),
+    "departments": ("name", ("capacity",)),
+    "patients": ("id", ("patient_id", "dept_name", "name", "age", "created_at",
+                        "admission_date", "is_discharged", "discharge_date")),
+    "staff": ("id", ("staff_id", "dept_name", "name", "age", "position", "is_active", "created_at")),
+    "appointments": ("id", ("patient_person_id", "staff_person_id", "dept_name", "start", "end",
+                            "status", "notes", "series_id")),
+    "series": ("id", ("patient_person_id", "staff_person_id", "dept_name", "start", "end",
+                      "rule", "status", "notes")),
+}
+
+# Row field that scopes the ord sequence: people only keep their order within a department
+ORD_GROUP = {"patients": 1, "staff": 1}
+
+Row = Tuple
+# (row, ord, change stamp of the object it was built from; None if unknown)
+Saved = Tuple[Row, int, Optional[int]]
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    return dt.isoformat(timespec="seconds") if dt else None
+
+
+def _dt(s: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(s) if s else None
+
+
+def is_sqlite_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+class SqliteStore(RecordSource):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            if int(self.get_meta("schema_version", SCHEMA_VERSION)) < 2:
+                # Version 1 kept records inline in the patients table
+                self.conn.execute("INSERT OR REPLACE INTO records SELECT id, medical_record FROM patients "
+                                  "WHERE medical_record IS NOT NULL")
+                self.conn.execute("UPDATE patients SET medical_record = NULL")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        # table -> key -> Saved as last read from / written to the database
+        self._saved: Dict[str, Dict[str, Saved]] = {t: {} for t in COLUMNS}
+        self._next_ord: Dict[str, int] = {t: 0 for t in COLUMNS}
+        self._saved_records: Set[str] = set()
+        self.last_written = 0
+
+    def close(self):
+        self.conn.close()
+
+    def _fetch(self, key: str) -> str:
+        row = self.conn.execute("SELECT body FROM records WHERE id = ?", (key,)).fetchone()
+        return row[0] if row else ""
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # ----- rows from live objects -----
+    @staticmethod
+    def _patient_row(p: Patient) -> Row:
+        return (p.patient_id, p._dept.name, p.name, p.age, _iso(p.created_at),
+                _iso(p.admission_date), int(p.is_discharged), _iso(p.discharge_date))
+
+    @staticmethod
+    def _staff_row(s: Staff) -> Row:
+        return (s.staff_id, s._dept.name, s.name, s.age, s.position, int(s.is_active), _iso(s.created_at))
+
+    @staticmethod
+    def _appointment_row(a) -> Row:
+        return (a.patient_person_id, a.staff_person_id, a.dept_name, _iso(a.start), _iso(a.end),
+                a.status, a.notes, a.series_id)
+
+    @staticmethod
+    def _series_row(sr) -> Row:
+        d = sr.to_dict()
+        return (d["patient_person_id"], d["staff_person_id"], d["dept_name"], d["start"],
+                d["end"], json.dumps(d["rule"], sort_keys=True), d["status"], d["notes"])
+
+    @classmethod
+    def _rows(cls, hospital: Hospital, appts) -> Dict[str, Iterator[tuple]]:
+        """table -> (key, change stamp, object, row builder) in list order."""
+        depts = hospital.departments.values()
+        return {
+            "hospital": iter([(1, None, hospital, lambda h: (h.name, h.location))]),
+            "departments": ((d.name, d._stamp, d, lambda d: (d.capacity,)) for d in depts),
+            "patients": ((p.id, p._stamp, p, cls._patient_row) for d in depts for p in d.patients),
+            "staff": ((s.id, s._stamp, s, cls._staff_row) for d in depts for s in d.staff),
+            "appointments": ((a.id, a._stamp, a, cls._appointment_row) for a in appts.items),
+            "series": ((sr.id, sr._stamp, sr, cls._series_row) for sr in appts.series.values()),
+        }
+
+    def _diff(self, table: str, rows: Iterable[tuple]):
+        """Rows to upsert and keys to delete, plus the snapshot after writing them."""
+        saved = self._saved[table]
+        next_ord = self._next_ord[table]
+        current: Dict[str, Saved] = {}
+        upserts: List[tuple] = []
+        group = ORD_GROUP.get(table)
+        last: Dict[object, int] = {}
+        for key, stamp, obj, make_row in rows:
+            old = saved.get(key)
+            unchanged = old is not None and stamp is not None and old[2] == stamp
+            row = old[0] if unchanged else make_row(obj)
+            g = row[group] if group is not None else None
+            # Keep the stored ord while the sequence stays increasing; moved/new rows go to the end
+            if old is not None and old[1] > last.get(g, -1):
+                ord_ = old[1]
+            else:
+                ord_ = next_ord
+                next_ord += 1
+            last[g] = ord_
+            current[key] = (row, ord_, stamp)
+            if old is None or old[:2] != (row, ord_):
+                upserts.append((key, ord_) + row)
+        deletes = [(k,) for k in saved if k not in current]
+        return upserts, deletes, current, next_ord
+
+    def save(self, hospital: Hospital, appts, meta: Optional[Dict[str, object]] = None) -> int:
+        """Write the changes since the last load/save in one transaction; returns rows written."""
+        pending = []
+        for table, rows in self._rows(hospital, appts).items():
+            pending.append((table,) + self._diff(table, rows))
+        # Records already in this store and untouched since are not even read
+        patients = [p for d in hospital.departments.values() for p in d.patients]
+        changed = [p for p in patients if p.record_key(self) is None]
+        current_ids = {p.id for p in patients}
+        dropped = [(k,) for k in self._saved_records if k not in current_ids]
+        written = 0
+        with self.conn:
+            if dropped:
+                self.conn.executemany("DELETE FROM records WHERE id = ?", dropped)
+            if changed:
+                self.conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?)",
+                                      ((p.id, p.medical_record) for p in changed))
+            written += len(dropped) + len(changed)
+            for k, v in (meta or {}).items():
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (k, str(v)))
+            for table, upserts, deletes, _, _ in pending:
+                key, cols = COLUMNS[table]
+                names = ", ".join(f'"{c}"' for c in (key, "ord") + cols)
+                marks = ", ".join("?" * (len(cols) + 2))
+                if deletes:
+                    self.conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", deletes)
+                if upserts:
+                    self.conn.executemany(f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})", upserts)
+                written += len(upserts) + len(deletes)
+        for table, _, _, current, next_ord in pending:
+            self._saved[table] = current
+            self._next_ord[table] = next_ord
+        self._saved_records = current_ids
+        for p in changed:
+            self.forget(p.id)
+            p.attach_record(self, p.id)
+        self.last_written = written
+        return written
+
+    def adopt(self, appts) -> None:
+        """Trust that ``appts`` was rebuilt from the last load() so the next save can skip it."""
+        for table, objs in (("appointments", appts.items), ("series", appts.series.values())):
+            saved = self._saved[table]
+            for o in objs:
+                old = saved.get(o.id)
+                if old is not None:
+                    saved[o.id] = old[:2] + (o._stamp,)
+
+    # ----- loading -----
+    def _select(self, table: str) -> Iterator[tuple]:
+        key, cols = COLUMNS[table]
+        names = ", ".join(f'"{c}"' for c in (key, "ord") + cols)
+        saved = self._saved[table] = {}
+        next_ord = 0
+        for r in self.conn.execute(f"SELECT {names} FROM {table} ORDER BY ord"):
+            saved[r[0]] = (tuple(r[2:]), r[1], None)
+            next_ord = r[1] + 1
+            yield r
+        self._next_ord[table] = next_ord
+
+    def load(self) -> Tuple[Hospital, dict]:
+        """Hospital plus appointment data in AppointmentManager.to_dict() form."""
+        info = list(self._select("hospital"))
+        if not info:
+            raise ValueError("No hospital stored in this database")
+        _, _, name, location = info[0]
+        h = Hospital(name, location, with_defaults=False)
+
+        depts: Dict[str, Department] = {}
+        for dname, _, capacity in self._select("departments"):
+            depts[dname] = Department(dname, capacity)
+        people: List = []
+        for (pid, _, patient_id, dname, pname, age, created_at,
+             admitted, discharged, discharge_date) in self._select("patients"):
+            p = Patient.restore(pid, patient_id, pname, age, "", _dt(created_at),
+                                _dt(admitted), bool(discharged), _dt(discharge_date))
+            p.attach_record(self, pid)
+            depts[dname].attach_patient(p)
+            people.append(("patients", p))
+        self._saved_records = {r[0] for r in self.conn.execute("SELECT id FROM records")}
+        for sid, _, staff_id, dname, sname, age, position, active, created_at in self._select("staff"):
+            s = Staff.restore(sid, staff_id, sname, age, position, dname, bool(active), _dt(created_at))
+            depts[dname].attach_staff(s)
+            people.append(("staff", s))
+        for d in depts.values():
+            h.attach_department(d)
+        # These objects match their rows until they are touched again
+        for table, obj in people + [("departments", d) for d in depts.values()]:
+            saved = self._saved[table]
+            key = obj.name if table == "departments" else obj.id
+            saved[key] = saved[key][:2] + (obj._stamp,)
+
+        appt_keys = ("id", "ord") + COLUMNS["appointments"][1]
+        items = [dict(zip(appt_keys, r)) for r in self._select("appointments")]
+        series_keys = ("id", "ord") + COLUMNS["series"][1]
+        series = []
+        for r in self._select("series"):
+            d = dict(zip(series_keys, r))
+            d["rule"] = json.loads(d["rule"])
+            series.append(d)
+        return h, {"items": items, "series": series}
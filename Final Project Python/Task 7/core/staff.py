@@ -1,9 +1,11 @@
+from datetime import datetime
 from person import Person
 from typing import Optional
 
 class Staff(Person):
     """Enhanced Staff class with department support."""
-    
+    __slots__ = ("position", "department", "is_active", "_staff_id")
+
     def __init__(self, name: str, age: int, position: str, department: Optional[str] = None):
         """
         Initialize staff member with professional details.
@@ -15,17 +17,49 @@ class Staff(Person):
         super().__init__(name, age)
         self.position = position.strip()
         self.department = department.strip() if department else "Unassigned"
-        self.staff_id = f"STF-{self.id[:5]}"  # Staff-specific ID
+        self._staff_id: Optional[str] = None  # Only set when it doesn't follow from id
         self.is_active = True
 
+    @classmethod
+    def restore(cls, id: Optional[str], staff_id: Optional[str], name: str, age: int,
+                position: str, department: Optional[str], is_active: bool,
+                created_at: Optional[datetime]) -> "Staff":
+        """Rebuild a saved staff member without generating IDs or timestamps"""
+        s = cls.__new__(cls)
+        s._restore(id, name, age, created_at)
+        s.position = position
+        s.department = department or "Unassigned"
+        s.is_active = is_active
+        s.staff_id = staff_id
+        return s
+
+    @property
+    def staff_id(self) -> str:
+        """Staff-specific ID, derived from ``id`` unless saved data says otherwise"""
+        return self._staff_id or f"STF-{self.id[:5]}"
+
+    @staff_id.setter
+    def staff_id(self, value: Optional[str]) -> None:
+        self._staff_id = None if value == f"STF-{self.id[:5]}" else value
+
     def transfer_department(self, new_department: str) -> None:
         """Transfer staff to a different department"""
         self.department = new_department.strip()
+        self.touch()
         print(f"{self.name} transferred to {self.department}")
 
+    def set_active(self, active: bool) -> None:
+        """Set active/inactive status without console output"""
+        if active == self.is_active:
+            return
+        self.is_active = active
+        self.touch()
+        if self._dept is not None:
+            self._dept._on_staff_active_changed(self)
+
     def toggle_active_status(self) -> None:
         """Toggle staff active/inactive status"""
-        self.is_active = not self.is_active
+        self.set_active(not self.is_active)
         status = "active" if self.is_active else "inactive"
         print(f"{self.name} is now {status}")
 
@@ -0,0 +1,18 @@
+"""Change stamps for domain objects.
+
+Each change gives the object a fresh stamp from one process-wide counter, so a
+saver can remember the stamp it last wrote for an object and skip it while the
+stamp stays the same (stamps are never reused, not even across objects).
+"""
+from itertools import count
+
+_stamps = count(1)
+
+
+class Tracked:
+    """Mixin for objects that report their own changes through ``touch``."""
+    __slots__ = ()
+
+    def touch(self) -> None:
+        """Mark this object as changed"""
+        self._stamp = next(_stamps)
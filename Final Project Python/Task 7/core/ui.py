@@ -1,7 +1,10 @@
 # UI.py
-import sys, json, uuid, csv, os
-from datetime import datetime, date
-from typing import Optional, List, Dict, Tuple
+import sys, json, uuid, csv, os, shutil, tempfile, threading
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappop, merge
+from operator import sub
+from datetime import datetime, date, time, timedelta
+from typing import Optional, List, Dict, Tuple, Callable, Iterable, Iterator
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QSplitter,
@@ -9,11 +12,12 @@ from PySide6.QtWidgets import (
     QSpinBox, QPlainTextEdit, QPushButton, QMessageBox, QTabWidget, QCheckBox,
     QInputDialog, QDialog, QDialogButtonBox, QFileDialog, QComboBox,
     QDateTimeEdit, QDateEdit, QToolBar, QStyle, QMenu, QAbstractItemView,
-    QTableView, QHeaderView, QStatusBar, QRadioButton, QGridLayout
+    QTableView, QHeaderView, QStatusBar, QRadioButton, QGridLayout, QProgressDialog
 )
 from PySide6.QtCore import (
     Qt, QDateTime, QDate, QObject, Signal, QSettings, QAbstractTableModel,
-    QModelIndex, QSortFilterProxyModel, QByteArray, QMimeData, QLocale, QTimer, QUrl
+    QModelIndex, QSortFilterProxyModel, QByteArray, QMimeData, QLocale, QTimer, QUrl,
+    QRunnable, QThreadPool
 )
 from PySide6.QtGui import (
     QFont, QPalette, QColor, QBrush, QAction, QShortcut, QKeySequence, QIcon, QTextDocument, QDesktopServices
@@ -34,6 +38,14 @@ from hospital import Hospital
 from department import Department
 from patient import Patient
 from staff import Staff
+from json_stream import JsonStreamReader
+from sqlite_store import SqliteStore, is_sqlite_file
+from journal import MutationJournal
+from record_store import RecordSidecar
+from tracking import Tracked
+from archive import PatientArchive
+import binary_snapshot
+from binary_snapshot import AppointmentColumns
 
 
 APP_VERSION = "1.1.0"
@@ -56,6 +68,14 @@ class I18nManager(QObject):
             "menu.file.save": {"ar": "حفظ", "en": "Save"},
             "menu.file.saveas": {"ar": "حفظ باسم...", "en": "Save As..."},
             "menu.file.export": {"ar": "تصدير", "en": "Export"},
+            "menu.file.storage": {"ar": "طريقة التخزين", "en": "Storage"},
+            "menu.file.storage.json": {"ar": "ملف JSON", "en": "JSON file"},
+            "menu.file.storage.sqlite": {"ar": "قاعدة بيانات SQLite", "en": "SQLite database"},
+            "menu.file.storage.binary": {"ar": "لقطة ثنائية مضغوطة", "en": "Compact binary snapshot"},
+            "menu.file.import_json": {"ar": "استيراد JSON...", "en": "Import JSON..."},
+            "menu.file.export_json": {"ar": "تصدير JSON...", "en": "Export JSON..."},
+            "menu.file.autosave": {"ar": "حفظ تلقائي", "en": "Autosave"},
+            "menu.file.archive": {"ar": "أرشفة المرضى المخرَجين القدامى", "en": "Archive old discharged patients"},
             "menu.file.export.patients_current": {"ar": "المرضى (القسم الحالي) CSV", "en": "Patients (current department) CSV"},
             "menu.file.export.patients_all": {"ar": "المرضى (كل الأقسام) CSV", "en": "Patients (all departments) CSV"},
             "menu.file.export.staff_current": {"ar": "الطاقم (القسم الحالي) CSV", "en": "Staff (current department) CSV"},
@@ -126,6 +146,7 @@ class I18nManager(QObject):
             "btn.discharge": {"ar": "إخراج", "en": "Discharge"},
             "btn.save": {"ar": "حفظ", "en": "Save"},
             "btn.close": {"ar": "إغلاق", "en": "Close"},
+            "btn.cancel": {"ar": "إلغاء", "en": "Cancel"},
             "btn.print": {"ar": "طباعة", "en": "Print"},
             "btn.export_pdf": {"ar": "تصدير PDF", "en": "Export PDF"},
             "btn.discharge_selected": {"ar": "إخراج المحددين", "en": "Discharge selected"},
@@ -140,6 +161,7 @@ class I18nManager(QObject):
             "col.pat.adm": {"ar": "الدخول", "en": "Admission"},
             "status.admitted": {"ar": "مقيم", "en": "Admitted"},
             "status.discharged": {"ar": "مخروج", "en": "Discharged"},
+            "status.archived": {"ar": "مؤرشف", "en": "Archived"},
             "ctx.p.details": {"ar": "تفاصيل", "en": "Details"},
             "ctx.p.discharge": {"ar": "خروج", "en": "Discharge"},
             "ctx.p.move": {"ar": "نقل إلى قسم...", "en": "Move to department..."},
@@ -157,6 +179,7 @@ class I18nManager(QObject):
             "col.stf.age": {"ar": "السن", "en": "Age"},
             "ctx.s.toggle": {"ar": "تبديل تفعيل", "en": "Toggle active"},
             "ctx.s.copyid": {"ar": "نسخ Staff ID", "en": "Copy Staff ID"},
+            "ctx.d.rename": {"ar": "إعادة تسمية...", "en": "Rename..."},
             "staff.active": {"ar": "نشط", "en": "Active"},
             "staff.inactive": {"ar": "موقّف", "en": "Inactive"},
 
@@ -180,7 +203,13 @@ class I18nManager(QObject):
             "field.start": {"ar": "بداية", "en": "Start"},
             "field.end": {"ar": "نهاية", "en": "End"},
             "field.notes": {"ar": "ملاحظات", "en": "Notes"},
+            "field.repeat": {"ar": "التكرار", "en": "Repeat"},
+            "field.repeat_count": {"ar": "عدد المرات", "en": "Occurrences"},
+            "repeat.none": {"ar": "بدون تكرار", "en": "Does not repeat"},
+            "repeat.daily": {"ar": "يوميًا", "en": "Daily"},
+            "repeat.weekly": {"ar": "أسبوعيًا", "en": "Weekly"},
             "btn.add_appt": {"ar": "إضافة موعد", "en": "Add appointment"},
+            "btn.find_slot": {"ar": "أقرب وقت متاح", "en": "Find free slot"},
             "group.appt_list": {"ar": "قائمة المواعيد", "en": "Appointments List"},
             "filter.date": {"ar": "التاريخ:", "en": "Date:"},
             "filter.dept": {"ar": "القسم:", "en": "Department:"},
@@ -229,14 +258,31 @@ class I18nManager(QObject):
             "dialog.export.csv.title": {"ar": "تصدير CSV", "en": "Export CSV"},
             "dialog.export.pdf.title": {"ar": "تصدير PDF", "en": "Export PDF"},
             "dialog.json.filter": {"ar": "JSON (*.json)", "en": "JSON (*.json)"},
+            "dialog.sqlite.filter": {"ar": "SQLite (*.sqlite *.db)", "en": "SQLite (*.sqlite *.db)"},
+            "dialog.binary.filter": {"ar": "لقطة المستشفى (*.hosp)", "en": "Hospital snapshot (*.hosp)"},
+            "dialog.data.filter": {"ar": "ملفات البيانات (*.json *.sqlite *.db *.hosp)", "en": "Data files (*.json *.sqlite *.db *.hosp)"},
             "dialog.csv.filter": {"ar": "CSV (*.csv)", "en": "CSV (*.csv)"},
             "dialog.pdf.filter": {"ar": "PDF (*.pdf)", "en": "PDF (*.pdf)"},
             "msg.loaded_ok": {"ar": "تم تحميل البيانات بنجاح", "en": "Data loaded successfully"},
             "msg.open.fail": {"ar": "فشل التحميل:\n{err}", "en": "Failed to load:\n{err}"},
+            "msg.open.progress": {"ar": "جارٍ تحميل البيانات...", "en": "Loading data..."},
+            "msg.open.cancelled": {"ar": "تم إلغاء التحميل", "en": "Loading cancelled"},
             "msg.save.ok": {"ar": "تم الحفظ", "en": "Saved"},
+            "msg.save.ok_rows": {"ar": "تم الحفظ ({n} سجل)", "en": "Saved ({n} rows written)"},
+            "msg.export.json_ok": {"ar": "تم التصدير إلى {path}", "en": "Exported to {path}"},
+            "msg.journal.replayed": {"ar": "تم استرجاع {n} تغيير غير محفوظ", "en": "Recovered {n} unsaved changes"},
+            "msg.journal.compacted": {"ar": "تم دمج سجل التغييرات في الملف", "en": "Change journal folded into the data file"},
+            "msg.journal.compact_fail": {"ar": "فشل دمج سجل التغييرات: {err}", "en": "Journal compaction failed: {err}"},
+            "msg.archive.done": {"ar": "تمت أرشفة {n} مريض", "en": "Archived {n} discharged patients"},
+            "msg.archive.none": {"ar": "لا يوجد مرضى للأرشفة", "en": "No discharged patients old enough to archive"},
+            "msg.archive.save_first": {"ar": "احفظ البيانات في ملف أولاً", "en": "Save the data to a file first"},
+            "msg.archive.fail": {"ar": "فشلت الأرشفة:\n{err}", "en": "Archiving failed:\n{err}"},
             "msg.save.fail": {"ar": "فشل الحفظ:\n{err}", "en": "Failed to save:\n{err}"},
+            "msg.save.running": {"ar": "جارٍ الحفظ في الخلفية...", "en": "Saving in the background..."},
             "msg.export.ok": {"ar": "تم التصدير", "en": "Exported"},
             "msg.export.fail": {"ar": "فشل التصدير:\n{err}", "en": "Failed to export:\n{err}"},
+            "msg.export.progress": {"ar": "جارٍ التصدير...", "en": "Exporting..."},
+            "msg.export.cancelled": {"ar": "تم إلغاء التصدير", "en": "Export cancelled"},
 
             "msg.select_department_first": {"ar": "اختار قسم أولًا", "en": "Select a department first"},
             "msg.patient.name_required": {"ar": "اسم المريض مطلوب", "en": "Patient name is required"},
@@ -249,10 +295,13 @@ class I18nManager(QObject):
             "dialog.discharge.notes_title": {"ar": "ملاحظات الخروج", "en": "Discharge notes"},
             "dialog.discharge.notes_prompt": {"ar": "أدخل ملاحظات الخروج (اختياري):", "en": "Enter discharge notes (optional):"},
             "msg.patient.discharged": {"ar": "تم خروج المريض {name}", "en": "Patient {name} discharged"},
+            "msg.appts.cancelled": {"ar": "أُلغيت المواعيد القادمة: {n}", "en": "Upcoming appointments cancelled: {n}"},
 
             "msg.no_other_departments": {"ar": "لا يوجد أقسام أخرى", "en": "No other departments available"},
             "dialog.move_patient.title": {"ar": "نقل مريض", "en": "Move patient"},
             "dialog.move_patient.prompt": {"ar": "اختر القسم الهدف:", "en": "Select target department:"},
+            "dialog.rename_dept.title": {"ar": "إعادة تسمية القسم", "en": "Rename department"},
+            "dialog.rename_dept.prompt": {"ar": "الاسم الجديد:", "en": "New name:"},
             "msg.dept.full_with_name": {"ar": "القسم {name} ممتلئ", "en": "Department {name} is full"},
             "msg.patient.moved_to": {"ar": "تم نقل {pname} إلى {dname}", "en": "{pname} moved to {dname}"},
 
@@ -263,6 +312,8 @@ class I18nManager(QObject):
             "msg.select_patient_for_appt": {"ar": "اختر مريض", "en": "Select a patient"},
             "msg.end_after_start": {"ar": "وقت النهاية يجب أن يكون بعد البداية", "en": "End time must be after start"},
             "msg.appt.created": {"ar": "تم إنشاء الموعد #{id}", "en": "Appointment #{id} created"},
+            "msg.appt.free_slot": {"ar": "أقرب وقت متاح: {start}", "en": "Next free slot: {start}"},
+            "msg.appt.no_free_slot": {"ar": "لا يوجد وقت متاح خلال الأسبوع القادم", "en": "No free slot within the next week"},
             "msg.select_appt": {"ar": "اختر موعدًا من الجدول", "en": "Select an appointment from the table"},
             "dialog.change_status.title": {"ar": "تغيير الحالة", "en": "Change status"},
             "dialog.change_status.prompt": {"ar": "اختر الحالة:", "en": "Pick a status:"},
@@ -276,6 +327,8 @@ class I18nManager(QObject):
             # Confirmations
             "confirm.discharge.title": {"ar": "تأكيد الخروج", "en": "Confirm discharge"},
             "confirm.discharge.body": {"ar": "هل تريد إخراج {n} مريض(ة)؟", "en": "Discharge {n} patient(s)?"},
+            "confirm.discharge.cancel_appts": {"ar": "لدى المريض {n} موعد(ًا) أو سلسلة مواعيد قادمة. هل تريد إلغاءها؟",
+                                               "en": "{n} upcoming appointment(s) or recurring series are booked. Cancel them?"},
             "confirm.delete_appt.title": {"ar": "تأكيد الحذف", "en": "Confirm delete"},
             "confirm.delete_appt.body": {"ar": "حذف {n} موعد(ًا)؟", "en": "Delete {n} appointment(s)?"},
             "chk.dont_ask_again": {"ar": "لا تسألني مرة أخرى", "en": "Don't ask again"},
@@ -422,6 +475,15 @@ def dt_to_str(dt: Optional[datetime]) -> Optional[str]:
 def dt_from_str(s: Optional[str]) -> Optional[datetime]:
     return datetime.fromisoformat(s) if s else None
 
+def qdt_to_py(dt: QDateTime) -> datetime:
+    try:
+        return dt.toPython()
+    except Exception:
+        return datetime.fromtimestamp(dt.toSecsSinceEpoch())
+
+def py_to_qdt(dt: datetime) -> QDateTime:
+    return QDateTime.fromSecsSinceEpoch(int(dt.timestamp()))
+
 def fmt_dt(dt: Optional[datetime], time_only: bool = False) -> str:
     if not dt:
         return "-"
@@ -433,6 +495,31 @@ def fmt_dt(dt: Optional[datetime], time_only: bool = False) -> str:
 
 
 # ================= JSON Serializer =================
+def patient_to_dict(p: Patient) -> dict:
+    return {
+        "id": p.id,
+        "patient_id": p.patient_id,
+        "name": p.name,
+        "age": p.age,
+        "created_at": dt_to_str(getattr(p, "created_at", None)),
+        "medical_record": p.medical_record,
+        "admission_date": dt_to_str(getattr(p, "admission_date", None)),
+        "is_discharged": p.is_discharged,
+        "discharge_date": dt_to_str(getattr(p, "discharge_date", None)),
+    }
+
+def staff_to_dict(s: Staff) -> dict:
+    return {
+        "id": s.id,
+        "staff_id": s.staff_id,
+        "name": s.name,
+        "age": s.age,
+        "position": s.position,
+        "department": s.department,
+        "is_active": s.is_active,
+        "created_at": dt_to_str(getattr(s, "created_at", None)),
+    }
+
 def hospital_to_dict(h: Hospital) -> dict:
     return {
         "name": h.name,
@@ -441,66 +528,144 @@ def hospital_to_dict(h: Hospital) -> dict:
             {
                 "name": d.name,
                 "capacity": d.capacity,
-                "patients": [
-                    {
-                        "id": p.id,
-                        "patient_id": p.patient_id,
-                        "name": p.name,
-                        "age": p.age,
-                        "created_at": dt_to_str(getattr(p, "created_at", None)),
-                        "medical_record": p.medical_record,
-                        "admission_date": dt_to_str(getattr(p, "admission_date", None)),
-                        "is_discharged": p.is_discharged,
-                        "discharge_date": dt_to_str(getattr(p, "discharge_date", None)),
-                    } for p in d.patients
-                ],
-                "staff": [
-                    {
-                        "id": s.id,
-                        "staff_id": s.staff_id,
-                        "name": s.name,
-                        "age": s.age,
-                        "position": s.position,
-                        "department": s.department,
-                        "is_active": s.is_active,
-                        "created_at": dt_to_str(getattr(s, "created_at", None)),
-                    } for s in d.staff
-                ],
+                "patients": [patient_to_dict(p) for p in d.patients],
+                "staff": [staff_to_dict(s) for s in d.staff],
             } for d in h.departments.values()
         ],
     }
 
+def patient_from_dict(pd: dict) -> Patient:
+    return Patient.restore(
+        id=pd.get("id"),
+        patient_id=pd.get("patient_id"),
+        name=pd["name"],
+        age=int(pd["age"]),
+        medical_record=pd.get("medical_record", ""),
+        created_at=dt_from_str(pd.get("created_at")),
+        admission_date=dt_from_str(pd.get("admission_date")),
+        is_discharged=bool(pd.get("is_discharged", False)),
+        discharge_date=dt_from_str(pd.get("discharge_date")),
+    )
+
+def staff_from_dict(sd: dict) -> Staff:
+    return Staff.restore(
+        id=sd.get("id"),
+        staff_id=sd.get("staff_id"),
+        name=sd["name"],
+        age=int(sd["age"]),
+        position=sd["position"],
+        department=sd.get("department"),
+        is_active=bool(sd.get("is_active", True)),
+        created_at=dt_from_str(sd.get("created_at")),
+    )
+
+def _department_from_parts(name: str, capacity: int, patients: List[Patient], staff: List[Staff]) -> Department:
+    dept = Department(name, capacity)
+    for p in patients:
+        dept.attach_patient(p)
+    for s in staff:
+        dept.attach_staff(s)
+    return dept
+
 def hospital_from_dict(data: dict) -> Hospital:
-    h = Hospital(data["name"], data["location"])
-    h.departments = {}
+    h = Hospital(data["name"], data["location"], with_defaults=False)
     for d in data.get("departments", []):
-        dept = Department(d["name"], int(d.get("capacity", 50)))
-        dept.patients = []
-        dept.staff = []
-
-        for pd in d.get("patients", []):
-            p = Patient(pd["name"], int(pd["age"]), pd.get("medical_record", ""))
-            p.id = pd.get("id", p.id)
-            p.patient_id = pd.get("patient_id", p.patient_id)
-            p.created_at = dt_from_str(pd.get("created_at"))
-            p.admission_date = dt_from_str(pd.get("admission_date"))
-            p.is_discharged = bool(pd.get("is_discharged", False))
-            p.discharge_date = dt_from_str(pd.get("discharge_date"))
-            dept.patients.append(p)
-
-        for sd in d.get("staff", []):
-            s = Staff(sd["name"], int(sd["age"]), sd["position"], dept.name)
-            s.id = sd.get("id", s.id)
-            s.staff_id = sd.get("staff_id", s.staff_id)
-            s.created_at = dt_from_str(sd.get("created_at"))
-            s.is_active = bool(sd.get("is_active", True))
-            s.department = dept.name
-            dept.staff.append(s)
-
-        h.departments[dept.name] = dept
+        h.attach_department(_department_from_parts(
+            d["name"], int(d.get("capacity", 50)),
+            [patient_from_dict(pd) for pd in d.get("patients", [])],
+            [staff_from_dict(sd) for sd in d.get("staff", [])],
+        ))
     return h
 
 
+# ================= Streaming JSON Loader =================
+class LoadCancelled(Exception):
+    pass
+
+
+class HospitalStreamLoader:
+    """Reads a saved hospital file record by record; ``progress`` returning False raises LoadCancelled."""
+    def __init__(self, path: str, progress: Optional[Callable[[int, int], bool]] = None,
+                 progress_every: int = 2000):
+        self.path = path
+        self.progress = progress
+        self.progress_every = progress_every
+        self.total_bytes = os.path.getsize(path)
+        self.records = 0
+        self.meta: Dict[str, object] = {}
+        self._reader: Optional[JsonStreamReader] = None
+
+    def _tick(self):
+        self.records += 1
+        if self.progress and self.records % self.progress_every == 0:
+            if self.progress(self._reader.bytes_read, self.total_bytes) is False:
+                raise LoadCancelled()
+
+    def load(self) -> Tuple[Hospital, "AppointmentManager"]:
+        h = None
+        items: List[Appointment] = []
+        series: List[AppointmentSeries] = []
+        with open(self.path, "rb") as f:
+            r = self._reader = JsonStreamReader(f, self.total_bytes)
+            for key in r.iter_object():
+                if key == "hospital":
+                    h = self._read_hospital()
+                elif key == "appointments":
+                    for k in r.iter_object():
+                        if k == "items":
+                            for _ in r.iter_array():
+                                items.append(Appointment.from_dict(r.read_value()))
+                                self._tick()
+                        elif k == "series":
+                            for _ in r.iter_array():
+                                series.append(AppointmentSeries.from_dict(r.read_value()))
+                                self._tick()
+                        else:
+                            r.read_value()
+                else:
+                    self.meta[key] = r.read_value()
+        if h is None:
+            raise KeyError("hospital")
+        ap = AppointmentManager(h)
+        ap.restore(items, series)
+        if self.progress:
+            self.progress(self.total_bytes, self.total_bytes)
+        return h, ap
+
+    def _read_hospital(self) -> Hospital:
+        r = self._reader
+        fields = {}
+        depts: List[Department] = []
+        for key in r.iter_object():
+            if key == "departments":
+                for _ in r.iter_array():
+                    depts.append(self._read_department())
+            else:
+                fields[key] = r.read_value()
+        h = Hospital(fields["name"], fields["location"], with_defaults=False)
+        for d in depts:
+            h.attach_department(d)
+        return h
+
+    def _read_department(self) -> Department:
+        r = self._reader
+        fields = {}
+        patients: List[Patient] = []
+        staff: List[Staff] = []
+        for key in r.iter_object():
+            if key == "patients":
+                for _ in r.iter_array():
+                    patients.append(patient_from_dict(r.read_value()))
+                    self._tick()
+            elif key == "staff":
+                for _ in r.iter_array():
+                    staff.append(staff_from_dict(r.read_value()))
+                    self._tick()
+            else:
+                fields[key] = r.read_value()
+        return _department_from_parts(fields["name"], int(fields.get("capacity", 50)), patients, staff)
+
+
 # ================= Appointments =================
 class AppointmentStatus:
     SCHEDULED = "scheduled"
@@ -533,11 +698,11 @@ class AppointmentStatus:
         return status in (AppointmentStatus.SCHEDULED, AppointmentStatus.CHECKED_IN)
 
 
-class Appointment:
+class Appointment(Tracked):
     def __init__(self, patient_person_id: str, staff_person_id: Optional[str],
                  dept_name: str, start: datetime, end: datetime,
                  status: str = AppointmentStatus.SCHEDULED, notes: str = "",
-                 appt_id: Optional[str] = None):
+                 appt_id: Optional[str] = None, series_id: Optional[str] = None):
         self.id = appt_id or uuid.uuid4().hex[:10]
         self.patient_person_id = patient_person_id
         self.staff_person_id = staff_person_id
@@ -546,6 +711,8 @@ class Appointment:
         self.end = end
         self.status = status
         self.notes = notes
+        self.series_id = series_id
+        self.touch()
 
     def to_dict(self) -> dict:
         return {
@@ -557,6 +724,7 @@ class Appointment:
             "end": dt_to_str(self.end),
             "status": self.status,
             "notes": self.notes,
+            "series_id": self.series_id,
         }
 
     @staticmethod
@@ -570,29 +738,709 @@ class Appointment:
             status=d.get("status", AppointmentStatus.SCHEDULED),
             notes=d.get("notes", ""),
             appt_id=d.get("id"),
+            series_id=d.get("series_id"),
         )
 
 
+class RecurrenceRule:
+    """Daily or weekly repetition every ``interval`` periods, bounded by an until-date or a count."""
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+    def __init__(self, freq: str, interval: int = 1, until: Optional[date] = None,
+                 count: Optional[int] = None, exceptions=None):
+        if freq not in (RecurrenceRule.DAILY, RecurrenceRule.WEEKLY):
+            raise ValueError(f"Unknown recurrence frequency: {freq}")
+        if interval < 1:
+            raise ValueError("Recurrence interval must be at least 1")
+        if until is None and count is None:
+            raise ValueError("Recurrence needs an until-date or a count")
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self.exceptions = set(exceptions or ())
+
+    @property
+    def step(self) -> timedelta:
+        return timedelta(days=self.interval * (7 if self.freq == RecurrenceRule.WEEKLY else 1))
+
+    def starts(self, first: datetime, span: timedelta,
+               lo: Optional[datetime] = None, hi: Optional[datetime] = None) -> List[datetime]:
+        """Occurrence starts whose [start, start + span) overlaps [lo, hi); unbounded sides are open."""
+        step = self.step
+        k_lo = 0 if lo is None else max(0, (lo - first - span) // step + 1)
+        k_hi = self._total(first)
+        if hi is not None:
+            k_hi = min(k_hi, -((first - hi) // step))
+        out = []
+        for k in range(k_lo, max(k_lo, k_hi)):
+            st = first + k * step
+            if st.date() not in self.exceptions:
+                out.append(st)
+        return out
+
+    def _total(self, first: datetime) -> int:
+        k_hi = self.count
+        if self.until is not None:
+            last = (datetime.combine(self.until, time.max) - first) // self.step + 1
+            k_hi = last if k_hi is None else min(k_hi, last)
+        return k_hi
+
+    def last_start(self, first: datetime) -> Optional[datetime]:
+        """Start of the final step (None when the rule allows none)."""
+        k = self._total(first)
+        return first + (k - 1) * self.step if k > 0 else None
+
+    def to_dict(self) -> dict:
+        return {
+            "freq": self.freq,
+            "interval": self.interval,
+            "until": self.until.isoformat() if self.until else None,
+            "count": self.count,
+            "exceptions": sorted(d.isoformat() for d in self.exceptions),
+        }
+
+    @staticmethod
+    def from_dict(d: dict) -> "RecurrenceRule":
+        return RecurrenceRule(
+            freq=d["freq"],
+            interval=int(d.get("interval", 1)),
+            until=date.fromisoformat(d["until"]) if d.get("until") else None,
+            count=d.get("count"),
+            exceptions=[date.fromisoformat(x) for x in d.get("exceptions", [])],
+        )
+
+
+class AppointmentSeries(Tracked):
+    """A recurring appointment stored once; occurrences are expanded on demand."""
+
+    def __init__(self, patient_person_id: str, staff_person_id: Optional[str],
+                 dept_name: str, start: datetime, end: datetime, rule: RecurrenceRule,
+                 status: str = AppointmentStatus.SCHEDULED, notes: str = "",
+                 series_id: Optional[str] = None):
+        self.id = series_id or uuid.uuid4().hex[:10]
+        self.patient_person_id = patient_person_id
+        self.staff_person_id = staff_person_id
+        self.dept_name = dept_name
+        self.start = start
+        self.end = end
+        self.rule = rule
+        self.status = status
+        self.notes = notes
+        self.touch()
+
+    def occurrence_id(self, day: date) -> str:
+        return f"{self.id}@{day.isoformat()}"
+
+    @staticmethod
+    def split_occurrence_id(appt_id: str) -> Optional[Tuple[str, date]]:
+        sid, sep, day = appt_id.partition("@")
+        if not sep:
+            return None
+        try:
+            return sid, date.fromisoformat(day)
+        except ValueError:
+            return None
+
+    def occurrence(self, start: datetime) -> Appointment:
+        return Appointment(
+            patient_person_id=self.patient_person_id,
+            staff_person_id=self.staff_person_id,
+            dept_name=self.dept_name,
+            start=start, end=start + (self.end - self.start),
+            status=self.status, notes=self.notes,
+            appt_id=self.occurrence_id(start.date()),
+            series_id=self.id,
+        )
+
+    def occurrences(self, lo: Optional[datetime] = None, hi: Optional[datetime] = None) -> List[Appointment]:
+        return [self.occurrence(st) for st in self.rule.starts(self.start, self.end - self.start, lo, hi)]
+
+    def runs_after(self, after: datetime) -> bool:
+        return any(st > after for st in self.rule.starts(self.start, self.end - self.start, after))
+
+    def spans(self, lo: datetime, hi: datetime) -> bool:
+        """Whether any step of the series could overlap [lo, hi)."""
+        last = self.rule.last_start(self.start)
+        return last is not None and self.start < hi and last + (self.end - self.start) > lo
+
+    def occurrence_on(self, day: date) -> Optional[Appointment]:
+        lo = datetime.combine(day, time.min)
+        for a in self.occurrences(lo, lo + timedelta(days=1)):
+            if a.start.date() == day:
+                return a
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "patient_person_id": self.patient_person_id,
+            "staff_person_id": self.staff_person_id,
+            "dept_name": self.dept_name,
+            "start": dt_to_str(self.start),
+            "end": dt_to_str(self.end),
+            "rule": self.rule.to_dict(),
+            "status": self.status,
+            "notes": self.notes,
+        }
+
+    @staticmethod
+    def from_dict(d: dict) -> "AppointmentSeries":
+        return AppointmentSeries(
+            patient_person_id=d["patient_person_id"],
+            staff_person_id=d.get("staff_person_id"),
+            dept_name=d["dept_name"],
+            start=dt_from_str(d["start"]),
+            end=dt_from_str(d["end"]),
+            rule=RecurrenceRule.from_dict(d["rule"]),
+            status=d.get("status", AppointmentStatus.SCHEDULED),
+            notes=d.get("notes", ""),
+            series_id=d.get("id"),
+        )
+
+
+class BulkGroups:
+    """Per-key slices of key-sorted bulk-load columns, each handed out once on first use."""
+
+    def __init__(self, keys: Optional[List[str]] = None, *columns: list):
+        self.keys = keys or []
+        self.columns = columns
+        self._taken = set()
+
+    def take(self, key: str) -> Optional[Tuple[list, ...]]:
+        if not self.keys or key in self._taken:
+            return None
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        if lo == hi:
+            return None
+        self._taken.add(key)
+        return tuple(col[lo:hi] for col in self.columns)
+
+
+def bulk_groups(keys: List[str], rows: List[int], *columns: list) -> BulkGroups:
+    """BulkGroups of ``rows`` by key, keeping their order within a key; empty keys are dropped."""
+    rows = sorted((i for i in rows if keys[i]), key=keys.__getitem__)
+    return BulkGroups([keys[i] for i in rows], *([col[i] for i in rows] for col in columns))
+
+
+class AppointmentGroups:
+    """person id -> {appointment id: appointment}; after ``fill`` groups are built on first use."""
+
+    def __init__(self):
+        self._groups: Dict[str, Dict[str, Appointment]] = {}
+        self._bulk = BulkGroups()
+
+    def fill(self, bulk: BulkGroups):
+        self._groups.clear()
+        self._bulk = bulk
+
+    def clear(self):
+        self.fill(BulkGroups())
+
+    def get(self, key: str, default=None) -> Optional[Dict[str, Appointment]]:
+        group = self._groups.get(key)
+        if group is None:
+            taken = self._bulk.take(key)
+            if taken is None:
+                return default
+            group = self._groups[key] = {a.id: a for a in taken[0]}
+        return group
+
+    def setdefault(self, key: str, default: Dict[str, Appointment]) -> Dict[str, Appointment]:
+        group = self.get(key)
+        if group is None:
+            group = self._groups[key] = default
+        return group
+
+    def __delitem__(self, key: str):
+        del self._groups[key]
+
+
+class IntervalIndex:
+    """Start-sorted intervals per key; overlap queries look back only as far as the key's longest span."""
+
+    def __init__(self):
+        self._starts: Dict[str, List[datetime]] = {}
+        self._items: Dict[str, List[Appointment]] = {}
+        self._max_span: Dict[str, timedelta] = {}
+        # (starts, ends, items) of keys not asked for since the last fill
+        self._bulk = BulkGroups()
+
+    def clear(self):
+        self._starts.clear()
+        self._items.clear()
+        self._max_span.clear()
+        self._bulk = BulkGroups()
+
+    def fill(self, bulk: BulkGroups):
+        self.clear()
+        self._bulk = bulk
+
+    def _pull(self, key: str) -> bool:
+        taken = self._bulk.take(key)
+        if taken is None:
+            return False
+        starts, ends, items = taken
+        self._starts[key] = starts
+        self._items[key] = items
+        self._max_span[key] = max(map(sub, ends, starts))
+        return True
+
+    def add(self, key: Optional[str], a: Appointment):
+        if not key:
+            return
+        if key not in self._starts:
+            self._pull(key)
+        starts = self._starts.setdefault(key, [])
+        items = self._items.setdefault(key, [])
+        i = bisect_right(starts, a.start)
+        starts.insert(i, a.start)
+        items.insert(i, a)
+        span = a.end - a.start
+        if span > self._max_span.get(key, timedelta(0)):
+            self._max_span[key] = span
+
+    def append(self, key: Optional[str], a: Appointment):
+        """Add ``a`` known to start no earlier than anything stored under ``key``."""
+        if not key:
+            return
+        starts = self._starts.get(key)
+        if starts is None and self._pull(key):
+            starts = self._starts[key]
+        if starts is None:
+            starts = self._starts[key] = []
+            self._items[key] = []
+        starts.append(a.start)
+        self._items[key].append(a)
+        span = a.end - a.start
+        if span > self._max_span.get(key, timedelta(0)):
+            self._max_span[key] = span
+
+    def remove(self, key: Optional[str], a: Appointment):
+        if not key or (key not in self._starts and not self._pull(key)):
+            return
+        starts = self._starts[key]
+        items = self._items[key]
+        i = bisect_left(starts, a.start)
+        while i < len(starts) and starts[i] == a.start:
+            if items[i] is a:
+                del starts[i]
+                del items[i]
+                break
+            i += 1
+        if not starts:
+            del self._starts[key]
+            del self._items[key]
+            self._max_span.pop(key, None)
+        elif a.end - a.start >= self._max_span[key]:
+            # It may have been the longest; don't keep scanning back that far for it
+            self._max_span[key] = max(x.end - x.start for x in items)
+
+    def overlapping(self, key: Optional[str], start: datetime, end: datetime) -> List[Appointment]:
+        starts = self._starts.get(key) if key else None
+        if starts is None and key and self._pull(key):
+            starts = self._starts[key]
+        if not starts:
+            return []
+        # a.end > start implies a.start > start - (longest span under this key)
+        lo = bisect_right(starts, start - self._max_span[key])
+        hi = bisect_left(starts, end)
+        return [a for a in self._items[key][lo:hi] if a.end > start]
+
+
+class SortedBucket:
+    """Appointments kept sorted by (start, insertion order)."""
+
+    def __init__(self, keys: Optional[List[Tuple[datetime, int]]] = None,
+                 items: Optional[List[Appointment]] = None):
+        self.keys: List[Tuple[datetime, int]] = keys if keys is not None else []
+        self.items: List[Appointment] = items if items is not None else []
+
+    def add(self, key: Tuple[datetime, int], a: Appointment):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, a)
+
+    def append(self, key: Tuple[datetime, int], a: Appointment):
+        self.keys.append(key)
+        self.items.append(a)
+
+    def remove(self, key: Tuple[datetime, int], a: Appointment):
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.items[i] is a:
+                del self.keys[i]
+                del self.items[i]
+                return
+            i += 1
+
+    def __len__(self):
+        return len(self.items)
+
+
+class OverlapSweep:
+    """Sweep over start-sorted appointments: ``partners(x)`` are the pushed ones overlapping ``x`` that share a person."""
+
+    def __init__(self):
+        self._live_p: Dict[str, Dict[str, Appointment]] = {}
+        self._live_s: Dict[str, Dict[str, Appointment]] = {}
+        self._ending: List[Tuple[datetime, int, Appointment]] = []
+        self._n = 0
+
+    def partners(self, x: Appointment) -> List[Tuple[Appointment, List[str]]]:
+        while self._ending and self._ending[0][0] <= x.start:
+            _, _, y = heappop(self._ending)
+            self._live_p[y.patient_person_id].pop(y.id, None)
+            if y.staff_person_id:
+                self._live_s[y.staff_person_id].pop(y.id, None)
+        live: Dict[str, Appointment] = dict(self._live_p.get(x.patient_person_id, {}))
+        if x.staff_person_id:
+            live.update(self._live_s.get(x.staff_person_id, {}))
+        out: List[Tuple[Appointment, List[str]]] = []
+        for y in live.values():
+            if not AppointmentManager._overlap(x.start, x.end, y.start, y.end):
+                continue
+            reasons: List[str] = []
+            if x.patient_person_id == y.patient_person_id:
+                reasons.append("patient")
+            if x.staff_person_id and y.staff_person_id and x.staff_person_id == y.staff_person_id:
+                reasons.append("staff")
+            out.append((y, reasons))
+        return out
+
+    def push(self, x: Appointment):
+        if x.end <= x.start:
+            return
+        self._live_p.setdefault(x.patient_person_id, {})[x.id] = x
+        if x.staff_person_id:
+            self._live_s.setdefault(x.staff_person_id, {})[x.id] = x
+        heappush(self._ending, (x.end, self._n, x))
+        self._n += 1
+
+
+class BulkRowResult:
+    """Outcome of one proposed row passed to AppointmentManager.add_many."""
+
+    def __init__(self, row: int, appt: Optional[Appointment], reasons: Optional[List[str]] = None,
+                 conflicts: Optional[List[Tuple[Appointment, List[str]]]] = None):
+        self.row = row
+        self.appt = appt
+        # "patient"/"staff" for conflicts, or "invalid"/"duplicate" for rows that could not be read
+        self.reasons: List[str] = reasons or []
+        self.conflicts: List[Tuple[Appointment, List[str]]] = conflicts or []
+
+    @property
+    def accepted(self) -> bool:
+        return not self.reasons
+
+    def __repr__(self) -> str:
+        state = "accepted" if self.accepted else "rejected: " + ", ".join(self.reasons)
+        return f"<BulkRowResult #{self.row} {state}>"
+
+
+class BulkAddReport:
+    def __init__(self, results: List[BulkRowResult]):
+        self.results = results
+
+    @property
+    def accepted(self) -> List[BulkRowResult]:
+        return [r for r in self.results if r.accepted]
+
+    @property
+    def rejected(self) -> List[BulkRowResult]:
+        return [r for r in self.results if not r.accepted]
+
+    def __repr__(self) -> str:
+        return f"<BulkAddReport: {len(self.accepted)} accepted, {len(self.rejected)} rejected>"
+
+
 class AppointmentManager:
     def __init__(self, hospital: Hospital):
         self.hospital = hospital
-        self.items: List[Appointment] = []
-        self._patient_index: Dict[str, Patient] = {}
-        self._staff_index: Dict[str, Staff] = {}
-        self.rebuild_indexes()
+        self._by_id: Dict[str, Appointment] = {}
+        # person id -> appt id -> every concrete appointment of that patient / staff member
+        self._appts_by_patient = AppointmentGroups()
+        self._appts_by_staff = AppointmentGroups()
+        self._by_patient = IntervalIndex()
+        self._by_staff = IntervalIndex()
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        # day (None = every day) -> filter key -> start-sorted bucket; used by list_filtered.
+        # The () bucket of a day is always there; the others are split off it on first use.
+        self._by_day: Dict[Optional[date], Dict[tuple, SortedBucket]] = {}
+        self.series: Dict[str, AppointmentSeries] = {}
+        self._series_by_patient: Dict[str, Dict[str, AppointmentSeries]] = {}
+        self._series_by_staff: Dict[str, Dict[str, AppointmentSeries]] = {}
+        # filter key (as in _by_day) -> series; list_filtered only expands the matching group
+        self._series_by_key: Dict[tuple, Dict[str, AppointmentSeries]] = {}
+        self.revision = 0
+        self.listener: Optional[Callable[..., None]] = None
+        # Where patients of old appointments are found once they leave the live lists
+        self.archive: Optional[PatientArchive] = None
+
+    @property
+    def items(self) -> List[Appointment]:
+        """Concrete appointments; series occurrences are not included."""
+        return list(self._by_id.values())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, appt_id: str) -> Optional[Appointment]:
+        a = self._by_id.get(appt_id)
+        if a is None:
+            a = self._virtual(appt_id)
+        return a
+
+    def _virtual(self, appt_id: str) -> Optional[Appointment]:
+        key = AppointmentSeries.split_occurrence_id(appt_id)
+        sr = self.series.get(key[0]) if key else None
+        return sr.occurrence_on(key[1]) if sr else None
 
     def bind_hospital(self, hospital: Hospital):
         self.hospital = hospital
-        self.rebuild_indexes()
 
-    def rebuild_indexes(self):
-        self._patient_index.clear()
-        self._staff_index.clear()
-        for d in self.hospital.departments.values():
-            for p in d.patients:
-                self._patient_index[p.id] = p
-            for s in d.staff:
-                self._staff_index[s.id] = s
+    # ----- interval indexes -----
+    def _touch(self):
+        self.revision += 1
+
+    def _emit(self, op: str, **objects):
+        if self.listener is not None:
+            self.listener(op, **objects)
+
+    def _insert(self, a: Appointment):
+        self._by_id[a.id] = a
+        self._index_appt(a)
+
+    def _index_appt(self, a: Appointment):
+        self._seq[a.id] = self._next_seq
+        self._next_seq += 1
+        self._index_person(a)
+        if AppointmentStatus.is_active(a.status):
+            self._by_patient.add(a.patient_person_id, a)
+            self._by_staff.add(a.staff_person_id, a)
+        self._file(a)
+
+    def _unindex_appt(self, a: Appointment):
+        self._unfile(a)
+        self._seq.pop(a.id, None)
+        group = self._appts_by_patient.get(a.patient_person_id)
+        if group is not None:
+            group.pop(a.id, None)
+            if not group:
+                del self._appts_by_patient[a.patient_person_id]
+        group = self._appts_by_staff.get(a.staff_person_id) if a.staff_person_id else None
+        if group is not None:
+            group.pop(a.id, None)
+            if not group:
+                del self._appts_by_staff[a.staff_person_id]
+        if AppointmentStatus.is_active(a.status):
+            self._by_patient.remove(a.patient_person_id, a)
+            self._by_staff.remove(a.staff_person_id, a)
+
+    def _index_person(self, a: Appointment):
+        self._appts_by_patient.setdefault(a.patient_person_id, {})[a.id] = a
+        if a.staff_person_id:
+            self._appts_by_staff.setdefault(a.staff_person_id, {})[a.id] = a
+
+    @staticmethod
+    def _filter_keys(a: Appointment) -> List[tuple]:
+        return [(), ("dept", a.dept_name), ("status", a.status), ("dept+status", a.dept_name, a.status)]
+
+    @staticmethod
+    def _filter_match(fk: tuple) -> Callable[[Appointment], bool]:
+        kind = fk[0]
+        if kind == "dept":
+            return lambda a: a.dept_name == fk[1]
+        if kind == "status":
+            return lambda a: a.status == fk[1]
+        return lambda a: a.dept_name == fk[1] and a.status == fk[2]
+
+    def _file(self, a: Appointment):
+        key = (a.start, self._seq.get(a.id, 0))
+        for day in (a.start.date(), None):
+            buckets = self._by_day.get(day)
+            if buckets is None:
+                buckets = self._by_day[day] = {(): SortedBucket()}
+            for fk in self._filter_keys(a):
+                # A filtered bucket not split off yet will pick ``a`` up from () when it is
+                bucket = buckets.get(fk)
+                if bucket is not None:
+                    bucket.add(key, a)
+
+    def _unfile(self, a: Appointment):
+        key = (a.start, self._seq.get(a.id, 0))
+        for day in (a.start.date(), None):
+            buckets = self._by_day.get(day)
+            if buckets is None:
+                continue
+            for fk in self._filter_keys(a):
+                bucket = buckets.get(fk)
+                if bucket is None:
+                    continue
+                bucket.remove(key, a)
+                if not bucket:
+                    del buckets[fk]
+            if () not in buckets:
+                del self._by_day[day]
+
+    def _bucket(self, day: Optional[date], fk: tuple) -> Optional[SortedBucket]:
+        buckets = self._by_day.get(day)
+        if buckets is None:
+            return None
+        bucket = buckets.get(fk)
+        if bucket is None:
+            whole = buckets[()]
+            match = self._filter_match(fk)
+            picked = [i for i, a in enumerate(whole.items) if match(a)]
+            bucket = buckets[fk] = SortedBucket([whole.keys[i] for i in picked], [whole.items[i] for i in picked])
+        return bucket
+
+    def _rebuild_appt_indexes(self, cols: Optional[AppointmentColumns] = None):
+        """Rebuild every index in bulk; ``cols`` are the same appointments in _by_id order."""
+        items = list(self._by_id.values())
+        if cols is None or len(cols.ids) != len(items):
+            cols = AppointmentColumns.of(items)
+        n = len(items)
+        self._seq = dict(zip(cols.ids, range(n)))
+        self._next_seq = n
+        self._by_day.clear()
+        # Per-person groups in insertion order, like _index_person leaves them; built on first use
+        self._appts_by_patient.fill(bulk_groups(cols.patients, range(n), items))
+        self._appts_by_staff.fill(bulk_groups(cols.staff, range(n), items))
+        active_statuses = {st for st in set(cols.statuses) if AppointmentStatus.is_active(st)}
+        statuses = cols.statuses
+        active = [i for i in cols.order if statuses[i] in active_statuses]
+        self._by_patient.fill(bulk_groups(cols.patients, active, cols.starts, cols.ends, items))
+        self._by_staff.fill(bulk_groups(cols.staff, active, cols.starts, cols.ends, items))
+        if not n:
+            return
+        # (start, seq) order; days are contiguous runs of it and filtered buckets are split off later
+        order = [items[i] for i in cols.order]
+        starts = [cols.starts[i] for i in cols.order]
+        keys = list(zip(starts, cols.order))
+        self._by_day[None] = {(): SortedBucket(keys, order)}
+        lo = 0
+        while lo < n:
+            day = starts[lo].date()
+            hi = bisect_left(starts, datetime.combine(day + timedelta(days=1), time.min), lo)
+            self._by_day[day] = {(): SortedBucket(keys[lo:hi], order[lo:hi])}
+            lo = hi
+
+    # ----- recurring series -----
+    def add_series(self, patient: Patient, dept: Department, start: datetime, end: datetime,
+                   rule: RecurrenceRule, staff: Optional[Staff] = None, notes: str = "") -> AppointmentSeries:
+        sr = AppointmentSeries(
+            patient_person_id=patient.id,
+            staff_person_id=(staff.id if staff else None),
+            dept_name=dept.name,
+            start=start, end=end, rule=rule, notes=notes,
+        )
+        self._attach_series(sr)
+        self._touch()
+        self._emit("add_series", series=sr)
+        return sr
+
+    def remove_series(self, series_id: str):
+        sr = self.series.pop(series_id, None)
+        if sr is None:
+            return
+        self._series_by_patient.get(sr.patient_person_id, {}).pop(sr.id, None)
+        if sr.staff_person_id:
+            self._series_by_staff.get(sr.staff_person_id, {}).pop(sr.id, None)
+        self._unfile_series(sr)
+        self._touch()
+        self._emit("remove_series", series=sr)
+
+    def set_series_dept_name(self, sr: AppointmentSeries, dept_name: str):
+        if sr.dept_name == dept_name:
+            return
+        self._unfile_series(sr)
+        sr.dept_name = dept_name
+        self._file_series(sr)
+        sr.touch()
+        self._touch()
+        self._emit("series_dept", series=sr)
+
+    def set_series_until(self, sr: AppointmentSeries, until: date):
+        if sr.rule.until == until:
+            return
+        sr.rule.until = until
+        sr.touch()
+        self._touch()
+        self._emit("series_until", series=sr)
+
+    def end_series(self, sr: AppointmentSeries, after: datetime) -> bool:
+        """Drop the occurrences starting after ``after``; False if there are none."""
+        if not sr.runs_after(after):
+            return False
+        span = sr.end - sr.start
+        held = [st for st in sr.rule.starts(sr.start, span, None, after) if st <= after]
+        if held:
+            self.set_series_until(sr, held[-1].date())
+        else:
+            self.remove_series(sr.id)
+        return True
+
+    def series_of_patient(self, patient_id: str) -> List[AppointmentSeries]:
+        return list(self._series_by_patient.get(patient_id, {}).values())
+
+    def _attach_series(self, sr: AppointmentSeries):
+        self.series[sr.id] = sr
+        self._series_by_patient.setdefault(sr.patient_person_id, {})[sr.id] = sr
+        if sr.staff_person_id:
+            self._series_by_staff.setdefault(sr.staff_person_id, {})[sr.id] = sr
+        self._file_series(sr)
+
+    def _file_series(self, sr: AppointmentSeries):
+        for fk in self._filter_keys(sr):
+            self._series_by_key.setdefault(fk, {})[sr.id] = sr
+
+    def _unfile_series(self, sr: AppointmentSeries):
+        for fk in self._filter_keys(sr):
+            group = self._series_by_key.get(fk)
+            if group is not None:
+                group.pop(sr.id, None)
+                if not group:
+                    del self._series_by_key[fk]
+
+    def _materialize(self, appt_id: str) -> Optional[Appointment]:
+        """Turn a series occurrence into a concrete appointment so it can change on its own."""
+        a = self._virtual(appt_id)
+        if a is None:
+            return None
+        sr = self.series[a.series_id]
+        sr.rule.exceptions.add(a.start.date())
+        sr.touch()
+        self._by_id[a.id] = a
+        self._index_appt(a)
+        self._emit("series_skip", series=sr, day=a.start.date(), appt=a)
+        return a
+
+    def _occurrences_for(self, kind: str, key: Optional[str], lo: datetime, hi: datetime) -> List[Appointment]:
+        index = self._series_by_patient if kind == "patient" else self._series_by_staff
+        group = index.get(key) if key else None
+        if not group:
+            return []
+        out: List[Appointment] = []
+        for sr in group.values():
+            if AppointmentStatus.is_active(sr.status):
+                out.extend(sr.occurrences(lo, hi))
+        out.sort(key=lambda a: a.start)
+        return out
+
+    def _active_overlapping(self, kind: str, key: Optional[str], lo: datetime, hi: datetime) -> List[Appointment]:
+        index = self._by_patient if kind == "patient" else self._by_staff
+        found = index.overlapping(key, lo, hi)
+        virtual = self._occurrences_for(kind, key, lo, hi)
+        return list(merge(found, virtual, key=lambda a: a.start)) if virtual else found
+
+    def _report_order(self, a: Appointment):
+        # Concrete appointments in insertion order, then series occurrences by start
+        seq = self._seq.get(a.id)
+        return (0, seq, a.start) if seq is not None else (1, 0, a.start)
 
     @staticmethod
     def _overlap(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
@@ -601,22 +1449,50 @@ class AppointmentManager:
     def find_conflicts(self, patient_id: str, staff_id: Optional[str],
                        start: datetime, end: datetime, ignore_id: Optional[str] = None
                        ) -> List[Tuple[Appointment, List[str]]]:
-        conflicts: List[Tuple[Appointment, List[str]]] = []
-        for a in self.items:
+        found: Dict[str, Tuple[Appointment, List[str]]] = {}
+        for a in self._active_overlapping("patient", patient_id, start, end):
             if ignore_id and a.id == ignore_id:
                 continue
-            if not AppointmentStatus.is_active(a.status):
-                continue
-            if not self._overlap(start, end, a.start, a.end):
-                continue
-            reasons: List[str] = []
-            if patient_id == a.patient_person_id:
-                reasons.append("patient")
-            if staff_id and a.staff_person_id and staff_id == a.staff_person_id:
-                reasons.append("staff")
-            if reasons:
-                conflicts.append((a, reasons))
-        return conflicts
+            found[a.id] = (a, ["patient"])
+        if staff_id:
+            for a in self._active_overlapping("staff", staff_id, start, end):
+                if ignore_id and a.id == ignore_id:
+                    continue
+                if a.id in found:
+                    found[a.id][1].append("staff")
+                else:
+                    found[a.id] = (a, ["staff"])
+        return sorted(found.values(), key=lambda c: self._report_order(c[0]))
+
+    def conflict_map(self, items: List[Appointment]) -> Dict[str, List[Tuple[Appointment, List[str]]]]:
+        """find_conflicts(..., ignore_id=a.id) for every item of ``items``, keyed by id, in one sweep."""
+        if not items:
+            return {}
+        lo = min(a.start for a in items)
+        hi = max(a.end for a in items)
+        wanted = {a.id for a in items}
+        pool: Dict[str, Appointment] = {a.id: a for a in items}
+        # Any conflict partner shares a person with a wanted item and overlaps [lo, hi)
+        for key in {a.patient_person_id for a in items}:
+            for a in self._active_overlapping("patient", key, lo, hi):
+                pool.setdefault(a.id, a)
+        for key in {a.staff_person_id for a in items if a.staff_person_id}:
+            for a in self._active_overlapping("staff", key, lo, hi):
+                pool.setdefault(a.id, a)
+
+        found: Dict[str, Dict[str, Tuple[Appointment, List[str]]]] = {i: {} for i in wanted}
+        sweep = OverlapSweep()
+        for x in sorted(pool.values(), key=lambda a: a.start):
+            x_active = AppointmentStatus.is_active(x.status)
+            for y, reasons in sweep.partners(x):
+                if x.id in wanted and AppointmentStatus.is_active(y.status):
+                    found[x.id][y.id] = (y, reasons)
+                if y.id in wanted and x_active:
+                    found[y.id][x.id] = (x, list(reasons))
+            sweep.push(x)
+
+        return {i: sorted(f.values(), key=lambda c: self._report_order(c[0]))
+                for i, f in found.items() if f}
 
     def add(self, patient: Patient, dept: Department, start: datetime,
             end: datetime, staff: Optional[Staff] = None, notes: str = "") -> Appointment:
@@ -628,40 +1504,596 @@ class AppointmentManager:
             status=AppointmentStatus.SCHEDULED,
             notes=notes
         )
-        self.items.append(appt)
+        self._insert(appt)
+        self._touch()
+        self._emit("book", appt=appt)
         return appt
 
+    def add_many(self, rows) -> BulkAddReport:
+        """Insert the rows (Appointments or to_dict dicts) that overlap no active booking or earlier accepted row."""
+        results: List[BulkRowResult] = []
+        batch: Dict[str, BulkRowResult] = {}
+        for i, r in enumerate(rows):
+            try:
+                a = r if isinstance(r, Appointment) else Appointment.from_dict(r)
+                if a.start is None or a.end is None or a.end <= a.start:
+                    raise ValueError("end must be after start")
+            except (KeyError, TypeError, ValueError):
+                results.append(BulkRowResult(i, None, ["invalid"]))
+                continue
+            res = BulkRowResult(i, a)
+            if a.id in self._by_id or a.id in batch:
+                res.reasons.append("duplicate")
+            else:
+                batch[a.id] = res
+            results.append(res)
+
+        checked = [res for res in batch.values() if AppointmentStatus.is_active(res.appt.status)]
+        if checked:
+            lo = min(res.appt.start for res in checked)
+            hi = max(res.appt.end for res in checked)
+            pool: Dict[str, Appointment] = {}
+            for key in {res.appt.patient_person_id for res in checked}:
+                for a in self._active_overlapping("patient", key, lo, hi):
+                    pool[a.id] = a
+            for key in {res.appt.staff_person_id for res in checked if res.appt.staff_person_id}:
+                for a in self._active_overlapping("staff", key, lo, hi):
+                    pool[a.id] = a
+            order = sorted([(a.start, -1, a) for a in pool.values()] +
+                           [(res.appt.start, res.row, res.appt) for res in checked],
+                           key=lambda t: (t[0], t[1]))
+
+            sweep = OverlapSweep()
+            for _, row, x in order:
+                for y, reasons in sweep.partners(x):
+                    if row >= 0 and y.id not in batch:
+                        batch[x.id].conflicts.append((y, reasons))
+                    elif row < 0 and y.id in batch:
+                        batch[y.id].conflicts.append((x, list(reasons)))
+                sweep.push(x)
+            sweep = OverlapSweep()
+            for _, row, x in order:
+                if row < 0 or batch[x.id].conflicts:
+                    continue
+                clashes = sweep.partners(x)
+                if clashes:
+                    batch[x.id].conflicts.extend(clashes)
+                else:
+                    sweep.push(x)
+            for res in checked:
+                for _, reasons in res.conflicts:
+                    for why in reasons:
+                        if why not in res.reasons:
+                            res.reasons.append(why)
+
+        added = False
+        for res in results:
+            if res.appt is not None and res.accepted:
+                self._insert(res.appt)
+                self._emit("book", appt=res.appt)
+                added = True
+        if added:
+            self._touch()
+        return BulkAddReport(results)
+
+    def _drop(self, appt_id: str) -> Optional[Appointment]:
+        a = self._by_id.pop(appt_id, None)
+        if a is not None:
+            self._unindex_appt(a)
+            return a
+        # Deleting a series occurrence only skips that date
+        a = self._virtual(appt_id)
+        if a is not None:
+            sr = self.series[a.series_id]
+            sr.rule.exceptions.add(a.start.date())
+            sr.touch()
+            self._emit("series_skip", series=sr, day=a.start.date(), appt=None)
+        return a
+
+    def _set_status(self, a: Appointment, status: str):
+        was_active = AppointmentStatus.is_active(a.status)
+        now_active = AppointmentStatus.is_active(status)
+        if was_active and not now_active:
+            self._by_patient.remove(a.patient_person_id, a)
+            self._by_staff.remove(a.staff_person_id, a)
+        elif now_active and not was_active:
+            self._by_patient.add(a.patient_person_id, a)
+            self._by_staff.add(a.staff_person_id, a)
+        self._unfile(a)
+        a.status = status
+        a.touch()
+        self._file(a)
+
     def remove(self, appt_id: str):
-        self.items = [a for a in self.items if a.id != appt_id]
+        a = self._drop(appt_id)
+        if a is not None:
+            self._touch()
+            self._emit("remove_appts", appts=[a])
+
+    def remove_many(self, appt_ids) -> List[Appointment]:
+        removed = [a for a in (self._drop(i) for i in appt_ids) if a is not None]
+        if removed:
+            self._touch()
+            self._emit("remove_appts", appts=removed)
+        return removed
 
     def update_status(self, appt_id: str, status: str):
-        for a in self.items:
-            if a.id == appt_id:
-                a.status = status
-                return a
-        return None
+        a = self._by_id.get(appt_id) or self._materialize(appt_id)
+        if a is None:
+            return None
+        self._set_status(a, status)
+        self._touch()
+        self._emit("status", appts=[a], status=status)
+        return a
+
+    def update_status_many(self, appt_ids, status: str) -> List[Appointment]:
+        updated = []
+        for appt_id in appt_ids:
+            a = self._by_id.get(appt_id) or self._materialize(appt_id)
+            if a is not None:
+                self._set_status(a, status)
+                updated.append(a)
+        if updated:
+            self._touch()
+            self._emit("status", appts=updated, status=status)
+        return updated
+
+    def set_dept_name(self, a: Appointment, dept_name: str):
+        if a.dept_name == dept_name:
+            return
+        self._unfile(a)
+        a.dept_name = dept_name
+        a.touch()
+        self._file(a)
+        self._touch()
+        self._emit("appt_dept", appt=a)
+
+    def rename_department(self, dept: Department, new_name: str):
+        """Rename ``dept`` in the hospital and move its appointments and series along."""
+        old_name = dept.name
+        self.hospital.rename_department(dept, new_name)
+        new_name = dept.name
+        if new_name == old_name:
+            return
+        bucket = self._bucket(None, ("dept", old_name))
+        for a in list(bucket.items) if bucket else []:
+            self._unfile(a)
+            a.dept_name = new_name
+            a.touch()
+            self._file(a)
+        for sr in list(self._series_by_key.get(("dept", old_name), {}).values()):
+            self._unfile_series(sr)
+            sr.dept_name = new_name
+            sr.touch()
+            self._file_series(sr)
+        self._touch()
+
+    # ----- per-person views -----
+    def appointments_of_patient(self, patient_id: str) -> List[Appointment]:
+        return sorted(self._appts_by_patient.get(patient_id, {}).values(), key=lambda a: a.start)
+
+    def appointments_of_staff(self, staff_id: str) -> List[Appointment]:
+        return sorted(self._appts_by_staff.get(staff_id, {}).values(), key=lambda a: a.start)
+
+    def move_patient(self, patient_id: str, dept_name: str):
+        for a in list(self._appts_by_patient.get(patient_id, {}).values()):
+            if AppointmentStatus.is_active(a.status):
+                self.set_dept_name(a, dept_name)
+        for sr in self.series_of_patient(patient_id):
+            if AppointmentStatus.is_active(sr.status):
+                self.set_series_dept_name(sr, dept_name)
+
+    def upcoming(self, patient_id: str, now: Optional[datetime] = None
+                 ) -> Tuple[List[str], List[AppointmentSeries]]:
+        """Ids of the patient's active bookings after ``now`` and their active series still running then."""
+        now = now or datetime.now()
+        ids = [a.id for a in self._appts_by_patient.get(patient_id, {}).values()
+               if a.start > now and AppointmentStatus.is_active(a.status)]
+        series = [sr for sr in self.series_of_patient(patient_id)
+                  if AppointmentStatus.is_active(sr.status) and sr.runs_after(now)]
+        return ids, series
+
+    def cancel_future(self, patient_id: str, now: Optional[datetime] = None) -> int:
+        """Cancel the patient's active bookings after ``now`` and end their series; returns how many changed."""
+        now = now or datetime.now()
+        ids, series = self.upcoming(patient_id, now)
+        changed = len(self.update_status_many(ids, AppointmentStatus.CANCELLED)) if ids else 0
+        return changed + sum(self.end_series(sr, now) for sr in series)
 
     def list_filtered(self, day: Optional[date] = None,
                       dept_name: Optional[str] = None,
                       status: Optional[str] = None) -> List[Appointment]:
-        out = self.items
-        if day:
-            out = [a for a in out if a.start.date() == day]
-        if dept_name and dept_name != "__ALL__":
-            out = [a for a in out if a.dept_name == dept_name]
-        if status and status != "__ALL__":
-            out = [a for a in out if a.status == status]
-        return sorted(out, key=lambda a: a.start)
+        by_dept = bool(dept_name and dept_name != "__ALL__")
+        by_status = bool(status and status != "__ALL__")
+        if by_dept and by_status:
+            fk = ("dept+status", dept_name, status)
+        elif by_dept:
+            fk = ("dept", dept_name)
+        elif by_status:
+            fk = ("status", status)
+        else:
+            fk = ()
+        bucket = self._bucket(day or None, fk)
+        out = list(bucket.items) if bucket else []
+        lo = datetime.combine(day, time.min) if day else None
+        hi = lo + timedelta(days=1) if lo else None
+        virtual: List[Appointment] = []
+        for sr in self._series_by_key.get(fk, {}).values():
+            if day and not sr.spans(lo, hi):
+                continue
+            virtual.extend(a for a in sr.occurrences(lo, hi) if not day or a.start.date() == day)
+        if virtual:
+            virtual.sort(key=lambda a: a.start)
+            out = list(merge(out, virtual, key=lambda a: a.start))
+        return out
+
+    def free_slots(self, duration: timedelta, day: date, days: int = 1,
+                   patient_id: Optional[str] = None, staff_id: Optional[str] = None,
+                   work_start: time = time(8, 0), work_end: time = time(18, 0),
+                   not_before: Optional[datetime] = None) -> List[Tuple[datetime, datetime]]:
+        """Windows of at least ``duration`` in working hours, over ``days`` days from ``day``, free for both people."""
+        out: List[Tuple[datetime, datetime]] = []
+        for i in range(days):
+            d = day + timedelta(days=i)
+            lo = datetime.combine(d, work_start)
+            hi = datetime.combine(d, work_end)
+            if not_before and not_before > lo:
+                lo = not_before
+            if hi - lo < duration:
+                continue
+            busy = merge(self._active_overlapping("patient", patient_id, lo, hi),
+                         self._active_overlapping("staff", staff_id, lo, hi),
+                         key=lambda a: a.start)
+            cursor = lo
+            for a in busy:
+                if a.start - cursor >= duration:
+                    out.append((cursor, a.start))
+                if a.end > cursor:
+                    cursor = a.end
+                if cursor >= hi:
+                    break
+            if hi - cursor >= duration:
+                out.append((cursor, hi))
+        return out
 
     def patient_of(self, a: Appointment) -> Optional[Patient]:
-        return self._patient_index.get(a.patient_person_id)
+        p = self.hospital.patients_by_id.get(a.patient_person_id)
+        if p is None and self.archive is not None:
+            hit = self.archive.get(a.patient_person_id)
+            p = hit[1] if hit else None
+        return p
     def staff_of(self, a: Appointment) -> Optional[Staff]:
-        return self._staff_index.get(a.staff_person_id) if a.staff_person_id else None
+        return self.hospital.staff_by_id.get(a.staff_person_id) if a.staff_person_id else None
 
     def to_dict(self) -> dict:
-        return {"items": [a.to_dict() for a in self.items]}
+        return {"items": [a.to_dict() for a in self._by_id.values()],
+                "series": [sr.to_dict() for sr in self.series.values()]}
     def from_dict(self, d: dict):
-        self.items = [Appointment.from_dict(x) for x in d.get("items", [])]
+        self.restore((Appointment.from_dict(x) for x in d.get("items", [])),
+                     (AppointmentSeries.from_dict(x) for x in d.get("series", [])))
+
+    def restore(self, items, series=(), cols: Optional[AppointmentColumns] = None):
+        self._by_id = {a.id: a for a in items}
+        self.series = {}
+        self._series_by_patient.clear()
+        self._series_by_staff.clear()
+        self._series_by_key.clear()
+        for sr in series:
+            self._attach_series(sr)
+        self._rebuild_appt_indexes(cols)
+        self._touch()
+
+
+# ================= Journal =================
+def journal_entry(op: str, **objects) -> dict:
+    """JSON payload for one Hospital/AppointmentManager mutation event."""
+    if op == "add_department":
+        d = objects["dept"]
+        return {"name": d.name, "capacity": d.capacity}
+    if op == "rename_department":
+        return {"old": objects["old_name"], "new": objects["dept"].name}
+    if op == "admit":
+        return {"dept": objects["dept"].name, "patient": patient_to_dict(objects["patient"])}
+    if op == "detach_patient":
+        return {"dept": objects["dept"].name, "id": objects["patient"].id}
+    if op == "discharge":
+        p = objects["patient"]
+        return {"id": p.id, "discharge_date": dt_to_str(p.discharge_date), "note": objects["notes"]}
+    if op == "update_patient":
+        p = objects["patient"]
+        e = {"id": p.id, "name": p.name, "age": p.age}
+        if objects["record_changed"]:
+            e["medical_record"] = p.medical_record
+        return e
+    if op == "add_staff":
+        return {"dept": objects["dept"].name, "staff": staff_to_dict(objects["staff"])}
+    if op == "staff_active":
+        s = objects["staff"]
+        return {"id": s.id, "active": s.is_active}
+    if op == "book":
+        return {"appt": objects["appt"].to_dict()}
+    if op == "remove_appts":
+        return {"ids": [a.id for a in objects["appts"]]}
+    if op == "status":
+        return {"ids": [a.id for a in objects["appts"]], "status": objects["status"]}
+    if op == "appt_dept":
+        a = objects["appt"]
+        return {"id": a.id, "dept": a.dept_name}
+    if op == "add_series":
+        return {"series": objects["series"].to_dict()}
+    if op == "remove_series":
+        return {"id": objects["series"].id}
+    if op == "series_dept":
+        sr = objects["series"]
+        return {"id": sr.id, "dept": sr.dept_name}
+    if op == "series_until":
+        sr = objects["series"]
+        return {"id": sr.id, "until": sr.rule.until.isoformat()}
+    if op == "series_skip":
+        # With "appt", the occurrence became that concrete appointment instead of being deleted
+        e = {"id": objects["series"].id, "day": objects["day"].isoformat()}
+        if objects["appt"] is not None:
+            e["appt"] = objects["appt"].to_dict()
+        return e
+    raise ValueError(f"Unknown journal op {op!r}")
+
+
+class JournalRecorder:
+    """Listener for Hospital and AppointmentManager that appends to a MutationJournal."""
+    def __init__(self, journal: MutationJournal):
+        self.journal = journal
+
+    def __call__(self, op: str, **objects):
+        self.journal.append(op, journal_entry(op, **objects))
+
+
+def replay_journal(h: Hospital, ap: "AppointmentManager", entries: List[dict], after_seq: int = 0) -> int:
+    """Apply entries newer than ``after_seq``, skipping ones that no longer fit; returns the last seq."""
+    patients = h.patients_by_id
+    staff = h.staff_by_id
+    last = after_seq
+    for e in entries:
+        seq = e.get("seq", 0)
+        if seq <= after_seq:
+            continue
+        last = max(last, seq)
+        op = e.get("op")
+        try:
+            if op == "add_department":
+                if e["name"] not in h.departments:
+                    h.attach_department(Department(e["name"], int(e["capacity"])))
+            elif op == "rename_department":
+                ap.rename_department(h.departments[e["old"]], e["new"])
+            elif op == "admit":
+                p = patient_from_dict(e["patient"])
+                h.departments[e["dept"]].attach_patient(p)
+            elif op == "detach_patient":
+                h.departments[e["dept"]].detach_patient(patients[e["id"]])
+            elif op == "discharge":
+                p = patients[e["id"]]
+                if p.is_discharged:
+                    # Already in the snapshot (or a second replay); the note is there too
+                    p.discharge_date = dt_from_str(e["discharge_date"])
+                else:
+                    p.discharge(e["note"], when=dt_from_str(e["discharge_date"]))
+            elif op == "update_patient":
+                p = patients[e["id"]]
+                p.update_details(e["name"], int(e["age"]), e.get("medical_record", p.medical_record))
+            elif op == "add_staff":
+                s = staff_from_dict(e["staff"])
+                h.departments[e["dept"]].attach_staff(s)
+            elif op == "staff_active":
+                staff[e["id"]].set_active(bool(e["active"]))
+            elif op == "book":
+                a = Appointment.from_dict(e["appt"])
+                if ap.get(a.id) is None:
+                    ap._insert(a)
+            elif op == "remove_appts":
+                ap.remove_many(e["ids"])
+            elif op == "status":
+                ap.update_status_many(e["ids"], e["status"])
+            elif op == "appt_dept":
+                a = ap.get(e["id"])
+                if a is not None:
+                    ap.set_dept_name(a, e["dept"])
+            elif op == "add_series":
+                sr = AppointmentSeries.from_dict(e["series"])
+                if sr.id not in ap.series:
+                    ap._attach_series(sr)
+            elif op == "remove_series":
+                ap.remove_series(e["id"])
+            elif op == "series_dept":
+                ap.set_series_dept_name(ap.series[e["id"]], e["dept"])
+            elif op == "series_until":
+                ap.set_series_until(ap.series[e["id"]], date.fromisoformat(e["until"]))
+            elif op == "series_skip":
+                sr = ap.series[e["id"]]
+                sr.rule.exceptions.add(date.fromisoformat(e["day"]))
+                sr.touch()
+                if "appt" in e:
+                    a = Appointment.from_dict(e["appt"])
+                    if ap.get(a.id) is None:
+                        ap._insert(a)
+        except (KeyError, ValueError, TypeError):
+            continue
+    ap._touch()
+    return last
+
+
+def journal_paths(snapshot_path: str) -> Tuple[str, str]:
+    """(live journal, segment being folded into the snapshot) for a data file."""
+    return snapshot_path + ".journal", snapshot_path + ".journal.compacting"
+
+
+def json_snapshot(h: Hospital, ap: "AppointmentManager", journal_seq: int = 0) -> dict:
+    """Plain-data copy of everything that goes into the JSON file; later edits don't affect it."""
+    return {"version": 1, "journal_seq": journal_seq,
+            "hospital": hospital_to_dict(h), "appointments": ap.to_dict()}
+
+
+def write_json_file(path: str, data: dict):
+    """Write JSON atomically: temp file in the same folder, fsync, then os.replace."""
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_json_snapshot(path: str, h: Hospital, ap: "AppointmentManager", journal_seq: int = 0):
+    write_json_file(path, json_snapshot(h, ap, journal_seq))
+
+
+class SnapshotWriterSignals(QObject):
+    finished = Signal(object)  # the SnapshotWriter; its .error is "" on success
+
+
+class SnapshotWriter(QRunnable):
+    """Runs ``write(path, data)`` on the thread pool and keeps its return value in ``result``."""
+    def __init__(self, kind: str, path: str, data, write: Callable = write_json_file):
+        super().__init__()
+        self.kind = kind
+        self.path = path
+        self.data = data
+        self.write = write
+        self.error = ""
+        self.result = None
+        self.signals = SnapshotWriterSignals()
+
+    def run(self):
+        try:
+            self.result = self.write(self.path, self.data)
+        except Exception as e:
+            self.error = str(e) or e.__class__.__name__
+        self.data = None
+        self.signals.finished.emit(self)
+
+
+def read_binary_snapshot(path: str) -> Tuple[Hospital, "AppointmentManager", dict]:
+    """Load a binary snapshot; ``meta["records"]`` names the sidecar its records are read from."""
+    with open(path, "rb") as f:
+        data = f.read()
+    records = RecordSidecar.for_snapshot(path, binary_snapshot.read_meta(data).get("records"))
+    h, items, series, meta, cols = binary_snapshot.decode(data, Appointment, records)
+    ap = AppointmentManager(h)
+    ap.restore(items, [AppointmentSeries.from_dict(d) for d in series], cols)
+    return h, ap, meta
+
+
+def binary_snapshot_bytes(h: Hospital, ap: "AppointmentManager", journal_seq: int = 0,
+                          records: Optional[RecordSidecar] = None) -> bytes:
+    """Snapshot bytes; medical records go to the ``records`` sidecar (inline without one)."""
+    return binary_snapshot.encode(h, ap, {"journal_seq": journal_seq}, records)
+
+
+class BinarySnapshotWrite:
+    """SnapshotWriter ``write`` for captured rows; returns the arguments of binary_snapshot.attach_records."""
+    def __init__(self, journal_seq: int, records: RecordSidecar, compact: bool):
+        self.journal_seq = journal_seq
+        self.records = records
+        self.compact = compact
+
+    def __call__(self, path: str, rows: binary_snapshot.SnapshotRows):
+        data, records, keys = binary_snapshot.encode_rows(rows, {"journal_seq": self.journal_seq},
+                                                          self.records, self.compact)
+        binary_snapshot.write_atomic(path, data)
+        return rows, records, keys
+
+
+def compact_file_snapshot(path: str, segment_path: str):
+    """Fold a rotated journal segment into a JSON or binary data file, working on a copy read from disk."""
+    if binary_snapshot.is_binary_snapshot(path):
+        h, ap, meta = read_binary_snapshot(path)
+    else:
+        loader = HospitalStreamLoader(path)
+        h, ap = loader.load()
+        meta = loader.meta
+    seq = replay_journal(h, ap, MutationJournal.read(segment_path), int(meta.get("journal_seq", 0) or 0))
+    if binary_snapshot.is_binary_snapshot(path):
+        records = RecordSidecar.for_snapshot(path, meta.get("records"))
+        binary_snapshot.write_atomic(path, binary_snapshot_bytes(h, ap, seq, records))
+    else:
+        write_json_snapshot(path, h, ap, seq)
+    os.remove(segment_path)
+
+
+# ================= CSV Export =================
+def patient_csv_rows(depts: List[Tuple[str, List[Patient]]], status: Dict[bool, str]) -> Iterator[list]:
+    for name, patients in depts:
+        for p in patients:
+            yield [name, p.patient_id, p.name, p.age, status[p.is_discharged], fmt_dt(p.admission_date)]
+
+
+def staff_csv_rows(depts: List[Tuple[str, List[Staff]]], status: Dict[bool, str]) -> Iterator[list]:
+    for name, staff in depts:
+        for s in staff:
+            yield [name, s.staff_id, s.name, s.age, s.position, status[s.is_active]]
+
+
+def appointment_csv_rows(items: List[Appointment], ap: "AppointmentManager",
+                         status: Dict[str, str]) -> Iterator[list]:
+    for a in items:
+        p = ap.patient_of(a)
+        s = ap.staff_of(a)
+        yield [a.id, a.dept_name,
+               (p.patient_id if p else ""), (p.name if p else ""),
+               (s.staff_id if s else ""), (s.name if s else ""),
+               fmt_dt(a.start), fmt_dt(a.end), status.get(a.status, a.status), a.notes]
+
+
+class CsvExportSignals(QObject):
+    progress = Signal(int, int)  # rows written, total rows
+    finished = Signal(object)    # the CsvExportJob; .error is "" on success
+
+
+class CsvExportJob(QRunnable):
+    """Writes already formatted rows to a CSV file on the thread pool; the file appears once complete."""
+    CHUNK = 500  # rows per write; cancel is checked and progress reported after each
+
+    def __init__(self, path: str, header: List[str], rows: List[list]):
+        super().__init__()
+        self.path = path
+        self.header = header
+        self.rows = rows
+        self.total = len(rows)
+        self.error = ""
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self.signals = CsvExportSignals()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(self.header)
+                for done in range(0, self.total, self.CHUNK):
+                    if self._cancel.is_set():
+                        self.cancelled = True
+                        break
+                    w.writerows(self.rows[done:done + self.CHUNK])
+                    self.signals.progress.emit(min(done + self.CHUNK, self.total), self.total)
+            if self.cancelled:
+                os.remove(tmp)
+            else:
+                os.replace(tmp, self.path)
+        except Exception as e:
+            self.error = str(e) or e.__class__.__name__
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.rows = None
+        self.signals.finished.emit(self)
 
 
 # ================= Filter Proxy (multi-column contains) =================
@@ -816,13 +2248,25 @@ class AppointmentsTableModel(QAbstractTableModel):
         super().__init__(parent)
         self.appts = appts
         self.items: List[Appointment] = []
+        self._conflicts: Optional[Dict[str, List[Tuple[Appointment, List[str]]]]] = None
+        self._conflicts_rev = -1
         I18N.language_changed.connect(self._on_lang)
 
     def set_items(self, items: List[Appointment]):
         self.beginResetModel()
         self.items = items
+        self._conflicts = None
         self.endResetModel()
 
+    def conflicts_of(self, a: Appointment) -> List[Tuple[Appointment, List[str]]]:
+        if self._conflicts is None or self._conflicts_rev != self.appts.revision:
+            self._conflicts = self.appts.conflict_map(self.items)
+            self._conflicts_rev = self.appts.revision
+        return self._conflicts.get(a.id, [])
+
+    def has_conflict(self, a: Appointment) -> bool:
+        return AppointmentStatus.is_active(a.status) and bool(self.conflicts_of(a))
+
     def rowCount(self, parent=QModelIndex()):
         return 0 if parent.isValid() else len(self.items)
 
@@ -848,13 +2292,11 @@ class AppointmentsTableModel(QAbstractTableModel):
             if col == "status": return AppointmentStatus.label(a.status)
             if col == "notes": return a.notes or ""
             if col == "conflict":
-                has_conflict = AppointmentStatus.is_active(a.status) and \
-                               len(self.appts.find_conflicts(a.patient_person_id, a.staff_person_id, a.start, a.end, ignore_id=a.id)) > 0
-                return "⚠" if has_conflict else ""
+                return "⚠" if self.has_conflict(a) else ""
         if role == Qt.UserRole:
             return a
         if role == Qt.ToolTipRole and col == "conflict":
-            conflicts = self.appts.find_conflicts(a.patient_person_id, a.staff_person_id, a.start, a.end, ignore_id=a.id)
+            conflicts = self.conflicts_of(a)
             if conflicts:
                 lines = []
                 for c, reasons in conflicts:
@@ -866,7 +2308,7 @@ class AppointmentsTableModel(QAbstractTableModel):
                     lines.append(f"#{c.id} | {c.dept_name} | {fmt_dt(c.start, time_only=True)}-{fmt_dt(c.end, time_only=True)} | {who_s}")
                 return "\n".join(lines)
         if role == Qt.BackgroundRole:
-            if self.data(index.siblingAtColumn(self.COLS.index("conflict")), Qt.DisplayRole) == "⚠":
+            if self.has_conflict(a):
                 return QBrush(QColor(255, 235, 205))
         return None
 
@@ -891,11 +2333,31 @@ class AppointmentsTableModel(QAbstractTableModel):
         self.headerDataChanged.emit(Qt.Horizontal, 0, self.columnCount()-1)
 
 
+# ================= Patient Details Dialog =================
+def ask_cancel_upcoming(parent: QWidget, ap: "AppointmentManager", patients: List[Patient]) -> bool:
+    """Ask whether to cancel the patients' upcoming bookings and series; False when there are none."""
+    now = datetime.now()
+    n = 0
+    for p in patients:
+        ids, series = ap.upcoming(p.id, now)
+        n += len(ids) + len(series)
+    if not n:
+        return False
+    return QMessageBox.question(parent, I18N.t("confirm.discharge.title"),
+                                I18N.t("confirm.discharge.cancel_appts", n=n),
+                                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes
+
+
 # ================= Patient Details Dialog =================
 class PatientDetailsDialog(QDialog):
-    def __init__(self, patient: Patient, parent=None):
+    def __init__(self, patient: Patient, parent=None, archived: bool = False,
+                 appts: Optional["AppointmentManager"] = None):
         super().__init__(parent)
         self.patient = patient
+        self.archived = archived
+        self.appts = appts
+        # Upcoming appointments cancelled by a discharge from this dialog
+        self.cancelled = 0
         self.setLayoutDirection(Qt.RightToLeft if I18N.lang == "ar" else Qt.LeftToRight)
         try:
             self.setFont(QFont("Cairo", 11))
@@ -915,6 +2377,10 @@ class PatientDetailsDialog(QDialog):
         self.name_in = QLineEdit(patient.name)
         self.age_in = QSpinBox(); self.age_in.setRange(1, 120); self.age_in.setValue(int(patient.age))
         self.med_in = QPlainTextEdit(patient.medical_record)
+        if archived:
+            self.name_in.setReadOnly(True)
+            self.age_in.setReadOnly(True)
+            self.med_in.setReadOnly(True)
 
         form.addRow(self.lbl_patient_id_label, self.id_val)
         form.addRow(self.lbl_state_label, self.state_val)
@@ -932,6 +2398,14 @@ class PatientDetailsDialog(QDialog):
         info_form.addRow(self.lbl_dis_label, self.dis_val)
         form.addRow(info_box)
 
+        self.appts_box = QGroupBox("")
+        appts_layout = QVBoxLayout(self.appts_box)
+        self.appts_list = QListWidget()
+        self.appts_list.setMaximumHeight(140)
+        appts_layout.addWidget(self.appts_list)
+        self.appts_box.setVisible(appts is not None)
+        form.addRow(self.appts_box)
+
         buttons = QDialogButtonBox()
         self.btn_save = buttons.addButton("", QDialogButtonBox.AcceptRole)
         self.btn_close = buttons.addButton("", QDialogButtonBox.RejectRole)
@@ -942,6 +2416,7 @@ class PatientDetailsDialog(QDialog):
             self.btn_discharge = buttons.addButton("", QDialogButtonBox.DestructiveRole)
 
         self.btn_save.clicked.connect(self.handle_save)
+        self.btn_save.setVisible(not archived)
         self.btn_close.clicked.connect(self.reject)
         self.btn_print.clicked.connect(self.handle_print)
         self.btn_export_pdf.clicked.connect(self.handle_export_pdf)
@@ -964,7 +2439,10 @@ class PatientDetailsDialog(QDialog):
         self.lbl_name_label.setText(I18N.t("field.name"))
         self.lbl_age_label.setText(I18N.t("field.age"))
         self.lbl_med_label.setText(I18N.t("field.medical_record"))
-        self.state_val.setText(I18N.t("status.discharged") if self.patient.is_discharged else I18N.t("status.admitted"))
+        if self.archived:
+            self.state_val.setText(f'{I18N.t("status.discharged")} ({I18N.t("status.archived")})')
+        else:
+            self.state_val.setText(I18N.t("status.discharged") if self.patient.is_discharged else I18N.t("status.admitted"))
         self.lbl_adm_label.setText(I18N.t("label.admission_date:"))
         self.lbl_dis_label.setText(I18N.t("label.discharge_date:"))
         if self.btn_discharge:
@@ -973,6 +2451,19 @@ class PatientDetailsDialog(QDialog):
         self.btn_close.setText(I18N.t("btn.close"))
         self.btn_print.setText(I18N.t("btn.print"))
         self.btn_export_pdf.setText(I18N.t("btn.export_pdf"))
+        self.appts_box.setTitle(I18N.t("tab.appointments"))
+        self._fill_appointments()
+
+    def _fill_appointments(self):
+        self.appts_list.clear()
+        if self.appts is None:
+            return
+        pid = self.patient.id
+        for a in self.appts.appointments_of_patient(pid):
+            self.appts_list.addItem(f"{fmt_dt(a.start)} | {a.dept_name} | {AppointmentStatus.label(a.status)}")
+        for sr in self.appts.series_of_patient(pid):
+            self.appts_list.addItem(f"{fmt_dt(sr.start)} ({I18N.t('repeat.' + sr.rule.freq)}) | "
+                                    f"{sr.dept_name} | {AppointmentStatus.label(sr.status)}")
 
     def handle_save(self):
         name = self.name_in.text().strip()
@@ -981,9 +2472,7 @@ class PatientDetailsDialog(QDialog):
             QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.patient.name_required"))
             return
         try:
-            self.patient.name = name
-            self.patient.age = age
-            self.patient.medical_record = self.med_in.toPlainText().strip()
+            self.patient.update_details(name, age, self.med_in.toPlainText())
             QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.save.ok"))
             self.accept()
         except Exception as e:
@@ -1014,11 +2503,16 @@ class PatientDetailsDialog(QDialog):
                                                   I18N.t("dialog.discharge.notes_prompt"), "")
         if not ok:
             return
+        cancel = self.appts is not None and ask_cancel_upcoming(self, self.appts, [self.patient])
         try:
             self.patient.discharge(notes)
             self.state_val.setText(I18N.t("status.discharged"))
-            QMessageBox.information(self, I18N.t("msg.info.title"),
-                                    I18N.t("msg.patient.discharged", name=self.patient.name))
+            msg = I18N.t("msg.patient.discharged", name=self.patient.name)
+            if cancel:
+                self.cancelled = self.appts.cancel_future(self.patient.id)
+                if self.cancelled:
+                    msg += "\n" + I18N.t("msg.appts.cancelled", n=self.cancelled)
+            QMessageBox.information(self, I18N.t("msg.info.title"), msg)
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, I18N.t("msg.error.title"), str(e))
@@ -1108,6 +2602,41 @@ class HospitalWindow(QMainWindow):
         self.hospital = hospital
         self.appts = AppointmentManager(self.hospital)
         self.current_file_path: Optional[str] = None
+        # "json" or "sqlite"; picked in File > Storage and remembered across runs
+        self.storage_backend = QSettings("HospitalApp", "UI").value("storage_backend", "json")
+        self.store: Optional[SqliteStore] = None
+        # Record sidecar generation of a binary current_file_path (None until known)
+        self.records: Optional[RecordSidecar] = None
+        # Mutations since the last snapshot of current_file_path, flushed in batches
+        self.journal: Optional[MutationJournal] = None
+        self._compaction: Optional[threading.Thread] = None
+        self._compaction_error: Optional[Exception] = None
+        # Background JSON writes in flight (kept referenced until they report back)
+        self._writers: List[SnapshotWriter] = []
+        self._exports: List[CsvExportJob] = []
+        self._save_seq: Optional[int] = None
+        self._save_again = False
+        s = QSettings("HospitalApp", "UI")
+        self.journal_compact_every = int(s.value("journal_compact_every", 5000))
+        self._journal_timer = QTimer(self)
+        self._journal_timer.setInterval(int(s.value("journal_flush_ms", 1000)))
+        self._journal_timer.timeout.connect(self._on_journal_tick)
+        self._journal_timer.start()
+        # Edits not yet in current_file_path; drives the title-bar marker ([*]) and autosave
+        self._changes = 0
+        self._saved_changes = 0
+        self._save_changes: Optional[int] = None
+        self._compaction_changes: Optional[int] = None
+        self._recorder: Optional[JournalRecorder] = None
+        self.hospital.listener = self.appts.listener = self._on_data_changed
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setInterval(int(s.value("autosave_interval_s", 60)) * 1000)
+        self._autosave_timer.timeout.connect(self._on_autosave)
+        if s.value("autosave", "yes") == "yes":
+            self._autosave_timer.start()
+        # Discharged patients older than this many days move to <data file>.archive (0 = only on request)
+        self.archive: Optional[PatientArchive] = None
+        self.archive_after_days = int(s.value("archive_after_days", 180))
 
         self.setLayoutDirection(Qt.RightToLeft if I18N.lang == "ar" else Qt.LeftToRight)
         self.setMinimumSize(1350, 820)
@@ -1148,6 +2677,19 @@ class HospitalWindow(QMainWindow):
         self.act_open = self.file_menu.addAction("")
         self.act_save = self.file_menu.addAction("")
         self.act_save_as = self.file_menu.addAction("")
+        self.storage_menu = self.file_menu.addMenu("")
+        self.act_storage_json = self.storage_menu.addAction("")
+        self.act_storage_sqlite = self.storage_menu.addAction("")
+        self.act_storage_binary = self.storage_menu.addAction("")
+        self.act_storage_json.setCheckable(True)
+        self.act_storage_sqlite.setCheckable(True)
+        self.act_storage_binary.setCheckable(True)
+        self.act_import_json = self.file_menu.addAction("")
+        self.act_export_json = self.file_menu.addAction("")
+        self.act_autosave = self.file_menu.addAction("")
+        self.act_autosave.setCheckable(True)
+        self.act_autosave.setChecked(self._autosave_timer.isActive())
+        self.act_archive = self.file_menu.addAction("")
         self.file_menu.addSeparator()
         self.export_menu = self.file_menu.addMenu("")
         self.act_export_pat_cur = self.export_menu.addAction("")
@@ -1161,6 +2703,14 @@ class HospitalWindow(QMainWindow):
         self.act_open.triggered.connect(self.handle_open)
         self.act_save.triggered.connect(self.handle_save)
         self.act_save_as.triggered.connect(self.handle_save_as)
+        self.act_storage_json.triggered.connect(lambda: self.set_storage_backend("json"))
+        self.act_storage_sqlite.triggered.connect(lambda: self.set_storage_backend("sqlite"))
+        self.act_storage_binary.triggered.connect(lambda: self.set_storage_backend("binary"))
+        self.act_import_json.triggered.connect(self.handle_import_json)
+        self.act_export_json.triggered.connect(self.handle_export_json)
+        self.act_autosave.toggled.connect(self.set_autosave)
+        self.act_archive.triggered.connect(self.handle_archive)
+        self._sync_storage_actions()
         self.act_export_pat_cur.triggered.connect(lambda: self.page.export_patients_csv(all_depts=False))
         self.act_export_pat_all.triggered.connect(lambda: self.page.export_patients_csv(all_depts=True))
         self.act_export_stf_cur.triggered.connect(lambda: self.page.export_staff_csv(all_depts=False))
@@ -1238,12 +2788,20 @@ class HospitalWindow(QMainWindow):
         self.statusBar().showMessage("Dark theme applied" if theme=="dark" else "Light theme applied", 2000)
 
     def retranslate_ui(self):
-        self.setWindowTitle(I18N.t("app.title", name=self.hospital.name))
+        self.setWindowTitle(I18N.t("app.title", name=self.hospital.name) + " [*]")
         self.file_menu.setTitle(I18N.t("menu.file"))
         self.act_new.setText(I18N.t("menu.file.new"))
         self.act_open.setText(I18N.t("menu.file.open"))
         self.act_save.setText(I18N.t("menu.file.save"))
         self.act_save_as.setText(I18N.t("menu.file.saveas"))
+        self.storage_menu.setTitle(I18N.t("menu.file.storage"))
+        self.act_storage_json.setText(I18N.t("menu.file.storage.json"))
+        self.act_storage_sqlite.setText(I18N.t("menu.file.storage.sqlite"))
+        self.act_storage_binary.setText(I18N.t("menu.file.storage.binary"))
+        self.act_import_json.setText(I18N.t("menu.file.import_json"))
+        self.act_export_json.setText(I18N.t("menu.file.export_json"))
+        self.act_autosave.setText(I18N.t("menu.file.autosave"))
+        self.act_archive.setText(I18N.t("menu.file.archive"))
         self.export_menu.setTitle(I18N.t("menu.file.export"))
         self.act_export_pat_cur.setText(I18N.t("menu.file.export.patients_current"))
         self.act_export_pat_all.setText(I18N.t("menu.file.export.patients_all"))
@@ -1278,46 +2836,416 @@ class HospitalWindow(QMainWindow):
             return
         self.hospital = Hospital("New Hospital", "Unknown")
         self.appts = AppointmentManager(self.hospital)
-        self.current_file_path = None
+        self._set_current_file(None)
+        self._use_archive(None)
         self._reload_page()
 
+    # ----- storage backend -----
+    def set_storage_backend(self, backend: str):
+        if backend != self.storage_backend:
+            self.storage_backend = backend
+            QSettings("HospitalApp", "UI").setValue("storage_backend", backend)
+            # The open file belongs to the other backend; the next save asks for a new path
+            self._set_current_file(None, modified=True)
+        self._sync_storage_actions()
+
+    def _sync_storage_actions(self):
+        self.act_storage_json.setChecked(self.storage_backend == "json")
+        self.act_storage_sqlite.setChecked(self.storage_backend == "sqlite")
+        self.act_storage_binary.setChecked(self.storage_backend == "binary")
+
+    def _set_current_file(self, path: Optional[str], store: Optional[SqliteStore] = None, journal_seq: int = 0,
+                          modified: bool = False, records: Optional[RecordSidecar] = None):
+        if self.store is not None and self.store is not store:
+            self._release_records(self.store)
+            self.store.close()
+        self.store = store
+        self.records = records
+        self.current_file_path = path
+        self._open_journal(journal_seq)
+        # Saves and folds still running belong to the previous file
+        self._changes = 1 if modified else 0
+        self._saved_changes = 0
+        self._save_changes = self._compaction_changes = None
+        self.setWindowModified(modified)
+
+    # ----- unsaved changes / autosave -----
+    def _on_data_changed(self, op: str, **objects):
+        if self._recorder is not None:
+            self._recorder(op, **objects)
+        self._changes += 1
+        if not self.isWindowModified():
+            self.setWindowModified(True)
+
+    def _mark_saved(self, changes: Optional[int]):
+        """Everything up to the ``changes``-th edit is in the data file."""
+        if changes is None:
+            return
+        self._saved_changes = max(self._saved_changes, changes)
+        self.setWindowModified(self._changes > self._saved_changes)
+
+    def set_autosave(self, on: bool):
+        QSettings("HospitalApp", "UI").setValue("autosave", "yes" if on else "no")
+        if on:
+            self._autosave_timer.start()
+        else:
+            self._autosave_timer.stop()
+
+    def _on_autosave(self):
+        # SQLite writes only the changed rows. Folding the journal into a JSON/binary file
+        # rewrites all of it, so that waits for journal_compact_every entries (_on_journal_tick)
+        if not (self.isWindowModified() and self.current_file_path):
+            return
+        if self.storage_backend == "sqlite":
+            self.compact_journal()
+        elif self.journal is not None:
+            self.journal.flush()
+
+    # ----- archive of old discharged patients -----
+    def _use_archive(self, path: Optional[str]):
+        if self.archive is not None:
+            self.archive.close()
+        self.archive = PatientArchive(path + ".archive") if path else None
+        self.appts.archive = self.archive
+        if self.archive is not None and len(self.archive):
+            # Patients archived just before a crash can still be in the snapshot or journal
+            for d in self.hospital.departments.values():
+                stale = [p for p in d.patients if p.is_discharged and p.id in self.archive]
+                if stale:
+                    d.detach_patients(stale)
+
+    def archive_discharged(self, days: int) -> int:
+        """Move patients discharged more than ``days`` ago into the archive; returns how many."""
+        cutoff = datetime.now() - timedelta(days=days)
+        picked = {}
+        for d in self.hospital.departments.values():
+            old = d.discharged_before(cutoff)
+            if old:
+                picked[d] = old
+        if not picked:
+            return 0
+        # The archive file is replaced first, so a crash never loses the moved patients
+        self.archive.extend((d.name, p) for d, ps in picked.items() for p in ps)
+        for d, ps in picked.items():
+            d.detach_patients(ps)
+        return sum(len(ps) for ps in picked.values())
+
+    def handle_archive(self):
+        if self.archive is None:
+            QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.archive.save_first"))
+            return
+        try:
+            n = self.archive_discharged(self.archive_after_days)
+        except Exception as e:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.archive.fail", err=e))
+            return
+        if n:
+            self._reload_page()
+            self.statusBar().showMessage(I18N.t("msg.archive.done", n=n), 5000)
+        else:
+            self.statusBar().showMessage(I18N.t("msg.archive.none"), 3000)
+
+    def _release_records(self, source):
+        """Load records still read from ``source`` into memory before it closes or is deleted."""
+        for d in self.hospital.departments.values():
+            for p in d.patients:
+                if p.record_key(source) is not None:
+                    p.load_record()
+
+    # ----- mutation journal -----
+    def _open_journal(self, seq: int):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self._recorder = None
+        if self.current_file_path:
+            self.journal = MutationJournal(journal_paths(self.current_file_path)[0], seq)
+            self._recorder = JournalRecorder(self.journal)
+        self.hospital.listener = self.appts.listener = self._on_data_changed
+
+    def _on_journal_tick(self):
+        if self._compaction is not None and not self._compaction.is_alive():
+            self._compaction = None
+            if self._compaction_error is not None:
+                self.statusBar().showMessage(I18N.t("msg.journal.compact_fail", err=self._compaction_error), 5000)
+            else:
+                self._mark_saved(self._compaction_changes)
+                self.statusBar().showMessage(I18N.t("msg.journal.compacted"), 3000)
+            self._compaction_changes = None
+        if self.journal is None:
+            return
+        self.journal.flush()
+        if self.journal.count >= self.journal_compact_every:
+            self.compact_journal()
+
+    def compact_journal(self):
+        """Fold the journal into the data file: SQLite in place, JSON/binary on a worker thread."""
+        path = self.current_file_path
+        if self.journal is None or self._compaction is not None or not path or not os.path.exists(path):
+            return
+        if self._save_seq is not None:
+            # That save may land after the fold and would drop the folded segment's changes
+            return
+        if self.storage_backend == "sqlite":
+            # Only the changed rows are written, so this stays cheap on the UI thread
+            if self.store is None:
+                self.store = SqliteStore(path)
+            self.journal.flush()
+            self.store.save(self.hospital, self.appts, meta={"journal_seq": self.journal.seq})
+            self.journal.reset()
+            self._mark_saved(self._changes)
+            return
+        segment = journal_paths(path)[1]
+        self.journal.rotate(segment)
+        self._compaction_changes = self._changes
+        self._compaction_error = None
+        self._compaction = threading.Thread(target=self._run_compaction, args=(path, segment),
+                                            name="journal-compaction")
+        self._compaction.start()
+
+    def _run_compaction(self, path: str, segment: str):
+        try:
+            compact_file_snapshot(path, segment)
+        except Exception as e:
+            self._compaction_error = e
+
     def handle_open(self):
-        path, _ = QFileDialog.getOpenFileName(self, I18N.t("dialog.open.title"), "", I18N.t("dialog.json.filter"))
+        path, _ = QFileDialog.getOpenFileName(
+            self, I18N.t("dialog.open.title"), "",
+            ";;".join([I18N.t("dialog.data.filter"), I18N.t("dialog.json.filter"),
+                      I18N.t("dialog.sqlite.filter"), I18N.t("dialog.binary.filter")]))
         if not path:
             return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            h = hospital_from_dict(data["hospital"])
-            ap = AppointmentManager(h)
-            ap.from_dict(data.get("appointments", {}))
-            ap.bind_hospital(h)
+            store = None
+            records = None
+            backend = "json"
+            if is_sqlite_file(path):
+                backend = "sqlite"
+                store = SqliteStore(path)
+                try:
+                    h, data = store.load()
+                    seq = int(store.get_meta("journal_seq", 0))
+                except Exception:
+                    store.close()
+                    raise
+                ap = AppointmentManager(h)
+                ap.from_dict(data)
+                store.adopt(ap)
+            else:
+                if binary_snapshot.is_binary_snapshot(path):
+                    backend = "binary"
+                    h, ap, meta = read_binary_snapshot(path)
+                    records = RecordSidecar.for_snapshot(path, meta.get("records"))
+                else:
+                    h, ap, meta = self._load_with_progress(path)
+                seq = int(meta.get("journal_seq", 0) or 0)
+            # Changes made after that snapshot live in the journal (and a segment mid-compaction)
+            live, segment = journal_paths(path)
+            entries = MutationJournal.read(segment) + MutationJournal.read(live)
+            replayed = replay_journal(h, ap, entries, seq) if entries else seq
             self.hospital = h
             self.appts = ap
-            self.current_file_path = path
+            self.storage_backend = backend
+            self._set_current_file(path, store, journal_seq=replayed, modified=replayed > seq,
+                                   records=records)
+            self._use_archive(path)
+            if self.archive_after_days > 0:
+                archived = self.archive_discharged(self.archive_after_days)
+                if archived:
+                    self.statusBar().showMessage(I18N.t("msg.archive.done", n=archived), 5000)
+            self._sync_storage_actions()
             self._reload_page()
+            if replayed > seq:
+                self.compact_journal()
+                self.statusBar().showMessage(I18N.t("msg.journal.replayed", n=replayed - seq), 5000)
             QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.loaded_ok"))
+        except LoadCancelled:
+            self.statusBar().showMessage(I18N.t("msg.open.cancelled"), 3000)
         except Exception as e:
             QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.open.fail", err=e))
 
+    def _load_with_progress(self, path: str) -> Tuple[Hospital, AppointmentManager, dict]:
+        dlg = QProgressDialog(I18N.t("msg.open.progress"), I18N.t("btn.cancel"), 0, 1000, self)
+        dlg.setWindowTitle(I18N.t("dialog.open.title"))
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(400)
+
+        def on_progress(done: int, total: int) -> bool:
+            dlg.setValue(int(done * 1000 / total) if total else 1000)
+            QApplication.processEvents()
+            return not dlg.wasCanceled()
+
+        loader = HospitalStreamLoader(path, on_progress)
+        try:
+            h, ap = loader.load()
+            return h, ap, loader.meta
+        finally:
+            dlg.close()
+
     def handle_save(self):
         if not self.current_file_path:
             return self.handle_save_as()
         try:
-            data = {"version": 1, "hospital": hospital_to_dict(self.hospital), "appointments": self.appts.to_dict()}
-            with open(self.current_file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.statusBar().showMessage(I18N.t("msg.save.ok"), 3000)
+            seq = 0
+            if self.journal is not None:
+                self.journal.flush()
+                seq = self.journal.seq
+            if self.storage_backend == "sqlite":
+                # Incremental and tied to this thread's connection; stays synchronous
+                if self.store is None:
+                    self.store = SqliteStore(self.current_file_path)
+                n = self.store.save(self.hospital, self.appts, meta={"journal_seq": seq})
+                self.statusBar().showMessage(I18N.t("msg.save.ok_rows", n=n), 3000)
+                self._drop_saved_journal(seq)
+                self._mark_saved(self._changes)
+            elif self._save_seq is not None:
+                # One write at a time; save again with the newer data when it finishes
+                self._save_again = True
+            else:
+                self._save_seq = seq
+                self._save_changes = self._changes
+                if self.storage_backend == "binary":
+                    if self.records is None:
+                        self.records = RecordSidecar.for_snapshot(self.current_file_path)
+                    # A running fold still reads the sidecar named by the file on disk, so no compaction then.
+                    self._start_writer("save", self.current_file_path,
+                                       binary_snapshot.capture(self.hospital, self.appts),
+                                       BinarySnapshotWrite(seq, self.records, self._compaction is None))
+                else:
+                    self._start_writer("save", self.current_file_path, json_snapshot(self.hospital, self.appts, seq))
+                self.statusBar().showMessage(I18N.t("msg.save.running"))
         except Exception as e:
             QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.save.fail", err=e))
 
+    def _drop_saved_journal(self, seq: int):
+        # Only if nothing was journaled since the snapshot, and no compaction can still
+        # replace the file with an older fold
+        if self.journal is not None and self.journal.seq == seq and self._compaction is None:
+            self.journal.reset()
+
+    def _start_writer(self, kind: str, path: str, data, write: Callable = write_json_file):
+        job = SnapshotWriter(kind, path, data, write)
+        job.setAutoDelete(False)
+        job.signals.finished.connect(self._on_writer_finished)
+        self._writers.append(job)
+        QThreadPool.globalInstance().start(job)
+
+    def _on_writer_finished(self, job: SnapshotWriter):
+        self._writers.remove(job)
+        kind, path, err = job.kind, job.path, job.error
+        if kind == "save":
+            seq, self._save_seq = self._save_seq, None
+            changes, self._save_changes = self._save_changes, None
+            if err:
+                QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.save.fail", err=err))
+            else:
+                self.statusBar().showMessage(I18N.t("msg.save.ok"), 3000)
+                if path == self.current_file_path and seq is not None:
+                    if isinstance(job.write, BinarySnapshotWrite):
+                        # The worker wrote the records out; patients can drop their copies
+                        binary_snapshot.attach_records(*job.result)
+                        self.records = job.result[1]
+                    self._drop_saved_journal(seq)
+                    self._mark_saved(changes)
+                    if self.records is not None and self._compaction is None:
+                        # The file on disk now names self.records; older generations are dead
+                        RecordSidecar.discard_stale(path, self.records)
+            if self._save_again:
+                self._save_again = False
+                self.handle_save()
+        elif err:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.save.fail", err=err))
+        else:
+            self.statusBar().showMessage(I18N.t("msg.export.json_ok", path=path), 3000)
+
+    def start_csv_export(self, path: str, header: List[str], rows: Iterable[list]):
+        """Format ``rows`` here, then write them in the background behind a cancellable progress dialog."""
+        job = CsvExportJob(path, header, list(rows))
+        job.setAutoDelete(False)
+        dlg = QProgressDialog(I18N.t("msg.export.progress"), I18N.t("btn.cancel"), 0, max(job.total, 1), self)
+        dlg.setWindowTitle(I18N.t("dialog.export.csv.title"))
+        dlg.setMinimumDuration(400)
+        dlg.canceled.connect(job.cancel)
+        job.signals.progress.connect(lambda done, _total: dlg.setValue(done))
+        job.signals.finished.connect(lambda j: self._on_csv_export_finished(j, dlg))
+        self._exports.append(job)
+        QThreadPool.globalInstance().start(job)
+
+    def _on_csv_export_finished(self, job: CsvExportJob, dlg: QProgressDialog):
+        self._exports.remove(job)
+        dlg.close()
+        if job.error:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.export.fail", err=job.error))
+        elif job.cancelled:
+            self.statusBar().showMessage(I18N.t("msg.export.cancelled"), 3000)
+        else:
+            self.statusBar().showMessage(I18N.t("msg.export.ok"), 3000)
+
     def handle_save_as(self):
-        path, _ = QFileDialog.getSaveFileName(self, I18N.t("dialog.save.title"), "hospital_data.json", I18N.t("dialog.json.filter"))
+        if self.storage_backend == "sqlite":
+            default, flt = "hospital_data.sqlite", I18N.t("dialog.sqlite.filter")
+        elif self.storage_backend == "binary":
+            default, flt = "hospital_data.hosp", I18N.t("dialog.binary.filter")
+        else:
+            default, flt = "hospital_data.json", I18N.t("dialog.json.filter")
+        path, _ = QFileDialog.getSaveFileName(self, I18N.t("dialog.save.title"), default, flt)
         if not path:
             return
-        self.current_file_path = path
+        if self.storage_backend == "sqlite" and os.path.exists(path):
+            # A fresh store would only diff against an empty snapshot; start from an empty file
+            if self.store is not None and self.store.path == path:
+                self._release_records(self.store)
+                self.store.close()
+                self.store = None
+            for f in (path, path + "-wal", path + "-shm"):
+                if os.path.exists(f):
+                    os.remove(f)
+        if self.storage_backend == "binary" and path != self.current_file_path:
+            for sidecar in RecordSidecar.generations(path):
+                self._release_records(sidecar)
+                sidecar.discard()
+        for f in journal_paths(path):
+            if os.path.exists(f):
+                os.remove(f)
+        # The archive travels with the data; a stale one under the new name must go
+        archive_file = path + ".archive"
+        if self.archive is None or os.path.abspath(self.archive.path) != os.path.abspath(archive_file):
+            if self.archive is not None and len(self.archive):
+                shutil.copyfile(self.archive.path, archive_file)
+            elif os.path.exists(archive_file):
+                os.remove(archive_file)
+            self._use_archive(path)
+        self._set_current_file(path, modified=True)
         self.handle_save()
 
+    def handle_import_json(self):
+        path, _ = QFileDialog.getOpenFileName(self, I18N.t("dialog.open.title"), "", I18N.t("dialog.json.filter"))
+        if not path:
+            return
+        try:
+            h, ap, _ = self._load_with_progress(path)
+            self.hospital = h
+            self.appts = ap
+            self._set_current_file(None, modified=True)
+            self._use_archive(None)
+            self._reload_page()
+            QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.loaded_ok"))
+        except LoadCancelled:
+            self.statusBar().showMessage(I18N.t("msg.open.cancelled"), 3000)
+        except Exception as e:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.open.fail", err=e))
+
+    def handle_export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, I18N.t("dialog.save.title"), "hospital_data.json", I18N.t("dialog.json.filter"))
+        if not path:
+            return
+        try:
+            self._start_writer("export", path, json_snapshot(self.hospital, self.appts))
+            self.statusBar().showMessage(I18N.t("msg.save.running"))
+        except Exception as e:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.save.fail", err=e))
+
     def _reload_page(self):
         self.page.save_layouts()
         self.page.setParent(None)
@@ -1343,6 +3271,9 @@ class HospitalWindow(QMainWindow):
         try:
             self.page.save_layouts()
             self._save_window_state()
+            QThreadPool.globalInstance().waitForDone()
+            if self.journal is not None:
+                self.journal.close()
         except Exception:
             pass
         super().closeEvent(e)
@@ -1355,9 +3286,13 @@ class MainPage(QWidget):
         self.hospital = hospital
         self.appts = appts
         self.win = win
+        self.dash_refresh_delay_ms = int(QSettings("HospitalApp", "UI").value("dashboard_refresh_delay_ms", 150))
+        self._dash_timer = QTimer(self)
+        self._dash_timer.setSingleShot(True)
+        self._dash_timer.timeout.connect(self.refresh_dashboard)
         self._build_ui()
         I18N.language_changed.connect(self._on_lang)
-        THEME.theme_changed.connect(lambda _: self.refresh_dashboard())
+        THEME.theme_changed.connect(lambda _: self.request_dashboard_refresh())
         self.retranslate_ui()
 
     # ---------- UI build ----------
@@ -1374,6 +3309,8 @@ class MainPage(QWidget):
         self.dept_list = DepartmentListWidget()
         self.dept_list.currentItemChanged.connect(self.on_dept_changed)
         self.dept_list.patients_dropped.connect(self.on_patients_dropped_to_dept)
+        self.dept_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.dept_list.customContextMenuRequested.connect(self.on_dept_context)
 
         self.add_dept_group = QGroupBox("")
         self.add_dept_form = QFormLayout(self.add_dept_group)
@@ -1466,6 +3403,18 @@ class MainPage(QWidget):
 
         if HAS_QTCHARTS:
             self.chart = QChart()
+            self.chart_series = QBarSeries()
+            self.chart_set = QBarSet("")
+            self.chart_set.append([0] * len(AppointmentStatus.all()))
+            self.chart_series.append(self.chart_set)
+            self.chart.addSeries(self.chart_series)
+            self.chart_axis_x = QBarCategoryAxis()
+            self.chart_axis_y = QValueAxis()
+            self.chart.addAxis(self.chart_axis_x, Qt.AlignBottom)
+            self.chart.addAxis(self.chart_axis_y, Qt.AlignLeft)
+            self.chart_series.attachAxis(self.chart_axis_x)
+            self.chart_series.attachAxis(self.chart_axis_y)
+            self._chart_theme = None
             self.chart_view = QChartView(self.chart)
             v.addWidget(self.chart_view, 1)
         else:
@@ -1478,13 +3427,22 @@ class MainPage(QWidget):
 
         self.tab_idx_dashboard = self.tabs.addTab(tab, "")
 
+    def request_dashboard_refresh(self):
+        """Refresh the dashboard after a short delay, merging requests that arrive meanwhile."""
+        if self.dash_refresh_delay_ms <= 0:
+            self.refresh_dashboard()
+            return
+        self._dash_timer.start(self.dash_refresh_delay_ms)
+
     def refresh_dashboard(self):
+        self._dash_timer.stop()
         total_depts = len(self.hospital.departments)
-        total_patients = sum(len(d.patients) for d in self.hospital.departments.values())
-        active_patients = sum(len(d.get_active_patients()) for d in self.hospital.departments.values())
-        total_staff = sum(len(d.staff) for d in self.hospital.departments.values())
+        total_patients = self.hospital.patient_count
+        active_patients = self.hospital.active_patient_count
+        total_staff = self.hospital.staff_count
         today = date.today()
-        appts_today = sum(1 for a in self.appts.items if a.start.date() == today)
+        todays = self.appts.list_filtered(day=today)
+        appts_today = len(todays)
         self.dash_val_total_depts.setText(str(total_depts))
         self.dash_val_total_patients.setText(str(total_patients))
         self.dash_val_active_patients.setText(str(active_patients))
@@ -1495,31 +3453,23 @@ class MainPage(QWidget):
             return
         statuses = AppointmentStatus.all()
         counts = {s: 0 for s in statuses}
-        for a in self.appts.items:
-            if a.start.date() == today:
-                counts[a.status] = counts.get(a.status, 0) + 1
-
-        series = QBarSeries()
-        set0 = QBarSet("")
-        set0.append([counts[s] for s in statuses])
-        series.append(set0)
-
-        chart = QChart()
-        chart.addSeries(series)
-        axis_x = QBarCategoryAxis()
-        axis_x.append([AppointmentStatus.label(s) for s in statuses])
-        axis_y = QValueAxis()
-        axis_y.setRange(0, max([0] + list(counts.values())))
-        chart.addAxis(axis_x, Qt.AlignBottom)
-        chart.addAxis(axis_y, Qt.AlignLeft)
-        series.attachAxis(axis_x); series.attachAxis(axis_y)
-        chart.setTitle(I18N.t("dash.chart.appts_by_status"))
-        try:
-            chart.setTheme(QChart.ChartThemeDark if THEME.theme == "dark" else QChart.ChartThemeLight)
-        except Exception:
-            pass
-        self.chart = chart
-        self.chart_view.setChart(self.chart)
+        for a in todays:
+            counts[a.status] = counts.get(a.status, 0) + 1
+
+        for i, s in enumerate(statuses):
+            self.chart_set.replace(i, counts[s])
+        labels = [AppointmentStatus.label(s) for s in statuses]
+        if list(self.chart_axis_x.categories()) != labels:
+            self.chart_axis_x.clear()
+            self.chart_axis_x.append(labels)
+        self.chart_axis_y.setRange(0, max([0] + list(counts.values())))
+        self.chart.setTitle(I18N.t("dash.chart.appts_by_status"))
+        if self._chart_theme != THEME.theme:
+            try:
+                self.chart.setTheme(QChart.ChartThemeDark if THEME.theme == "dark" else QChart.ChartThemeLight)
+            except Exception:
+                pass
+            self._chart_theme = THEME.theme
 
     # ---------- Patients tab ----------
     def _build_patients_tab(self):
@@ -1591,10 +3541,12 @@ class MainPage(QWidget):
             return
         p = self.p_proxy.index(idx.row(), 0).data(Qt.UserRole)
         if p:
-            dlg = PatientDetailsDialog(p, self)
+            dlg = PatientDetailsDialog(p, self, appts=self.appts)
             if dlg.exec():
                 self.p_model.layoutChanged.emit()
                 self.refresh_patients_table_related()
+                if dlg.cancelled:
+                    self.refresh_appt_table()
 
     def on_patients_context(self, pos):
         idxs = self.p_table.selectionModel().selectedRows()
@@ -1614,9 +3566,11 @@ class MainPage(QWidget):
         if not act: return
         patients = [self.p_proxy.index(i.row(),0).data(Qt.UserRole) for i in idxs]
         if act == a_details and len(patients)==1:
-            dlg = PatientDetailsDialog(patients[0], self)
+            dlg = PatientDetailsDialog(patients[0], self, appts=self.appts)
             if dlg.exec():
                 self.p_model.layoutChanged.emit(); self.refresh_patients_table_related()
+                if dlg.cancelled:
+                    self.refresh_appt_table()
         elif act == a_discharge:
             self.discharge_patients(patients)
         elif act == a_move:
@@ -1652,14 +3606,22 @@ class MainPage(QWidget):
         if not patients: return
         if not self._confirm_discharge_if_needed(len(patients)):
             return
+        cancel = ask_cancel_upcoming(self, self.appts, [p for p in patients if not p.is_discharged])
+        cancelled = 0
         for p in patients:
             if not p.is_discharged:
                 try:
                     p.discharge("")
                 except Exception:
-                    pass
+                    continue
+                if cancel:
+                    cancelled += self.appts.cancel_future(p.id)
         self.refresh_patients_table_related()
-        QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("btn.discharge_selected"))
+        msg = I18N.t("btn.discharge_selected")
+        if cancelled:
+            self.refresh_appt_table()
+            msg += "\n" + I18N.t("msg.appts.cancelled", n=cancelled)
+        QMessageBox.information(self, I18N.t("msg.info.title"), msg)
 
     def move_patients_dialog(self, patients: List[Patient]):
         if not patients: return
@@ -1671,35 +3633,28 @@ class MainPage(QWidget):
         self.move_patients_to_department_by_objs(patients, dept_to)
 
     def on_patients_dropped_to_dept(self, patient_ids: List[str], dept: Department):
-        patients = []
-        for d in self.hospital.departments.values():
-            for p in d.patients:
-                if p.id in patient_ids:
-                    patients.append(p)
+        registry = self.hospital.patients_by_id
+        patients = [registry[pid] for pid in patient_ids if pid in registry]
         self.move_patients_to_department_by_objs(patients, dept)
 
     def move_patients_to_department_by_objs(self, patients: List[Patient], dept_to: Department):
         for p in patients:
             if p.is_discharged: continue
-            dept_from = None
-            for d in self.hospital.departments.values():
-                if p in d.patients: dept_from = d; break
+            dept_from = p._dept
             if not dept_from or dept_from is dept_to: continue
-            if len(dept_to.patients) >= dept_to.capacity:
+            if not dept_to.has_room():
                 QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.dept.full_with_name", name=dept_to.name))
                 continue
-            dept_from.patients = [x for x in dept_from.patients if x is not p]
-            dept_to.patients.append(p)
-            for a in self.appts.items:
-                if a.patient_person_id == p.id and AppointmentStatus.is_active(a.status):
-                    a.dept_name = dept_to.name
+            dept_from.detach_patient(p)
+            dept_to.attach_patient(p)
+            self.appts.move_patient(p.id, dept_to.name)
         self.refresh_patients_table_related()
         QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("btn.refresh"))
 
     def refresh_patients_table_related(self):
         self.p_model.layoutChanged.emit()
         self.update_dept_info()
-        self.refresh_dashboard()
+        self.request_dashboard_refresh()
         self.update_empty_overlays()
 
     # ---------- Staff tab ----------
@@ -1779,8 +3734,8 @@ class MainPage(QWidget):
         if not act: return
         staff_list = [self.s_proxy.index(i.row(),0).data(Qt.UserRole) for i in idxs]
         if act == a_toggle:
-            for s in staff_list: s.is_active = not s.is_active
-            self.s_model.layoutChanged.emit(); self.refresh_dashboard(); self.update_empty_overlays()
+            for s in staff_list: s.set_active(not s.is_active)
+            self.s_model.layoutChanged.emit(); self.request_dashboard_refresh(); self.update_empty_overlays()
         elif a_copy and act == a_copy:
             QApplication.clipboard().setText(staff_list[0].staff_id)
 
@@ -1876,20 +3831,28 @@ class MainPage(QWidget):
         self.ap_end_dt = QDateTimeEdit(QDateTime.currentDateTime().addSecs(1800)); self.ap_end_dt.setCalendarPopup(True)
         self.ap_notes_in = QLineEdit()
         self.ap_notes_in.setPlaceholderText(I18N.t("ph.appt_notes"))
+        self.ap_repeat_combo = QComboBox()
+        self.ap_repeat_count = QSpinBox(); self.ap_repeat_count.setRange(2, 104); self.ap_repeat_count.setValue(4)
         self.btn_add_appt = QPushButton("")
         self.btn_add_appt.clicked.connect(self.handle_add_appointment)
+        self.btn_find_slot = QPushButton("")
+        self.btn_find_slot.clicked.connect(self.handle_find_free_slot)
         self.ap_label_dept = QLabel("")
         self.ap_label_patient = QLabel("")
         self.ap_label_staff = QLabel("")
         self.ap_label_start = QLabel("")
         self.ap_label_end = QLabel("")
         self.ap_label_notes = QLabel("")
+        self.ap_label_repeat = QLabel("")
+        self.ap_label_repeat_count = QLabel("")
         self.ap_label_dept.setBuddy(self.ap_dept_combo)
         self.ap_label_patient.setBuddy(self.ap_patient_combo)
         self.ap_label_staff.setBuddy(self.ap_staff_combo)
         self.ap_label_start.setBuddy(self.ap_start_dt)
         self.ap_label_end.setBuddy(self.ap_end_dt)
         self.ap_label_notes.setBuddy(self.ap_notes_in)
+        self.ap_label_repeat.setBuddy(self.ap_repeat_combo)
+        self.ap_label_repeat_count.setBuddy(self.ap_repeat_count)
 
         form.addRow(self.ap_label_dept, self.ap_dept_combo)
         form.addRow(self.ap_label_patient, self.ap_patient_combo)
@@ -1897,6 +3860,9 @@ class MainPage(QWidget):
         form.addRow(self.ap_label_start, self.ap_start_dt)
         form.addRow(self.ap_label_end, self.ap_end_dt)
         form.addRow(self.ap_label_notes, self.ap_notes_in)
+        form.addRow(self.ap_label_repeat, self.ap_repeat_combo)
+        form.addRow(self.ap_label_repeat_count, self.ap_repeat_count)
+        form.addRow(self.btn_find_slot)
         form.addRow(self.btn_add_appt)
 
         self.appt_list_group = QGroupBox("")
@@ -1957,6 +3923,7 @@ class MainPage(QWidget):
 
         self._fill_dept_combos()
         self._ap_on_dept_changed()
+        self._fill_repeat_combo()
         self._fill_appt_filter_combos()
         self.refresh_appt_table()
 
@@ -1972,7 +3939,7 @@ class MainPage(QWidget):
         act = menu.exec(self.ap_table.viewport().mapToGlobal(pos))
         if not act: return
         appts = [self.ap_proxy.index(i.row(),0).data(Qt.UserRole) for i in idxs]
-        if act == a_status and len(appts)==1:
+        if act == a_status:
             self.handle_change_appt_status()
         elif act == a_delete:
             self.handle_delete_appt()
@@ -2037,7 +4004,10 @@ class MainPage(QWidget):
         self.ap_label_start.setText(I18N.t("field.start"))
         self.ap_label_end.setText(I18N.t("field.end"))
         self.ap_label_notes.setText(I18N.t("field.notes"))
+        self.ap_label_repeat.setText(I18N.t("field.repeat"))
+        self.ap_label_repeat_count.setText(I18N.t("field.repeat_count"))
         self.btn_add_appt.setText(I18N.t("btn.add_appt"))
+        self.btn_find_slot.setText(I18N.t("btn.find_slot"))
         # Appt list
         self.appt_list_group.setTitle(I18N.t("group.appt_list"))
         self.ap_filter_label_date.setText(I18N.t("filter.date"))
@@ -2070,6 +4040,7 @@ class MainPage(QWidget):
         self.s_model.layoutChanged.emit()
         self._fill_dept_combos()
         self._ap_on_dept_changed()
+        self._fill_repeat_combo()
         self._fill_appt_filter_combos()
         self.refresh_appt_table()
         self.refresh_dashboard()
@@ -2089,6 +4060,34 @@ class MainPage(QWidget):
         if self.dept_list.count() > 0 and self.dept_list.currentRow() == -1:
             self.dept_list.setCurrentRow(0)
 
+    def on_dept_context(self, pos):
+        item = self.dept_list.itemAt(pos)
+        if not item: return
+        menu = QMenu(self)
+        a_rename = menu.addAction(I18N.t("ctx.d.rename"))
+        act = menu.exec(self.dept_list.viewport().mapToGlobal(pos))
+        if act == a_rename:
+            self.rename_department_dialog(item.data(Qt.UserRole))
+
+    def rename_department_dialog(self, dept: Department):
+        name, ok = QInputDialog.getText(self, I18N.t("dialog.rename_dept.title"),
+                                        I18N.t("dialog.rename_dept.prompt"), QLineEdit.Normal, dept.name)
+        if not ok or not name.strip() or name.strip() == dept.name: return
+        try:
+            self.appts.rename_department(dept, name)
+        except ValueError as e:
+            QMessageBox.critical(self, I18N.t("msg.error.title"), str(e))
+            return
+        row = self.dept_list.currentRow()
+        self.refresh_department_list()
+        self.dept_list.setCurrentRow(row)
+        self._fill_dept_combos()
+        self._ap_on_dept_changed()
+        self._fill_appt_filter_combos()
+        self.s_model.layoutChanged.emit()
+        self.refresh_appt_table()
+        self.refresh_dashboard()
+
     def current_department(self) -> Optional[Department]:
         it = self.dept_list.currentItem()
         return it.data(Qt.UserRole) if it else None
@@ -2111,8 +4110,8 @@ class MainPage(QWidget):
         self.lbl_dept_name.setText(dept.name)
         self.lbl_dept_code.setText(dept.dept_code)
         self.lbl_dept_capacity.setText(str(dept.capacity))
-        self.lbl_patients_count.setText(f"{len(dept.patients)} ({I18N.t('chk.only_active')}: {len(dept.get_active_patients())})")
-        self.lbl_staff_count.setText(str(len(dept.staff)))
+        self.lbl_patients_count.setText(f"{dept.patient_count} ({I18N.t('chk.only_active')}: {dept.active_patient_count})")
+        self.lbl_staff_count.setText(str(dept.staff_count))
 
     # ---------- Toolbar glue ----------
     def set_global_filter(self, text: str):
@@ -2159,30 +4158,18 @@ class MainPage(QWidget):
             return
         if not path.lower().endswith(".csv"):
             path += ".csv"
-        try:
-            rows = []
-            if all_depts:
-                for d in self.hospital.departments.values():
-                    for p in d.patients:
-                        rows.append([d.name, p.patient_id, p.name, p.age,
-                                     I18N.t("status.discharged") if p.is_discharged else I18N.t("status.admitted"),
-                                     fmt_dt(getattr(p, "admission_date", None))])
-            else:
-                d = self.current_department()
-                if not d:
-                    QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_department_first"))
-                    return
-                for p in d.patients:
-                    rows.append([d.name, p.patient_id, p.name, p.age,
-                                 I18N.t("status.discharged") if p.is_discharged else I18N.t("status.admitted"),
-                                 fmt_dt(getattr(p, "admission_date", None))])
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["Department", "Patient ID", "Name", "Age", "Status", "Admission"])
-                w.writerows(rows)
-            self.win.statusBar().showMessage(I18N.t("msg.export.ok"), 3000)
-        except Exception as e:
-            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.export.fail", err=e))
+        if all_depts:
+            depts = list(self.hospital.departments.values())
+        else:
+            d = self.current_department()
+            if not d:
+                QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_department_first"))
+                return
+            depts = [d]
+        snapshot = [(d.name, d.patients) for d in depts]
+        status = {True: I18N.t("status.discharged"), False: I18N.t("status.admitted")}
+        self.win.start_csv_export(path, ["Department", "Patient ID", "Name", "Age", "Status", "Admission"],
+                                  patient_csv_rows(snapshot, status))
 
     def export_staff_csv(self, all_depts: bool):
         path, _ = QFileDialog.getSaveFileName(self, I18N.t("dialog.export.csv.title"),
@@ -2191,28 +4178,18 @@ class MainPage(QWidget):
             return
         if not path.lower().endswith(".csv"):
             path += ".csv"
-        try:
-            rows = []
-            if all_depts:
-                for d in self.hospital.departments.values():
-                    for s in d.staff:
-                        rows.append([d.name, s.staff_id, s.name, s.age, s.position,
-                                     I18N.t("staff.active") if s.is_active else I18N.t("staff.inactive")])
-            else:
-                d = self.current_department()
-                if not d:
-                    QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_department_first"))
-                    return
-                for s in d.staff:
-                    rows.append([d.name, s.staff_id, s.name, s.age, s.position,
-                                 I18N.t("staff.active") if s.is_active else I18N.t("staff.inactive")])
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["Department", "Staff ID", "Name", "Age", "Position", "Status"])
-                w.writerows(rows)
-            self.win.statusBar().showMessage(I18N.t("msg.export.ok"), 3000)
-        except Exception as e:
-            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.export.fail", err=e))
+        if all_depts:
+            depts = list(self.hospital.departments.values())
+        else:
+            d = self.current_department()
+            if not d:
+                QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_department_first"))
+                return
+            depts = [d]
+        snapshot = [(d.name, d.staff) for d in depts]
+        status = {True: I18N.t("staff.active"), False: I18N.t("staff.inactive")}
+        self.win.start_csv_export(path, ["Department", "Staff ID", "Name", "Age", "Position", "Status"],
+                                  staff_csv_rows(snapshot, status))
 
     def export_appts_csv_filtered(self):
         path, _ = QFileDialog.getSaveFileName(self, I18N.t("dialog.export.csv.title"),
@@ -2221,27 +4198,12 @@ class MainPage(QWidget):
             return
         if not path.lower().endswith(".csv"):
             path += ".csv"
-        try:
-            rows = []
-            for r in range(self.ap_proxy.rowCount()):
-                a: Appointment = self.ap_proxy.index(r, 0).data(Qt.UserRole)
-                p = self.appts.patient_of(a)
-                s = self.appts.staff_of(a)
-                rows.append([
-                    a.id, a.dept_name,
-                    (p.patient_id if p else ""), (p.name if p else ""),
-                    (s.staff_id if s else ""), (s.name if s else ""),
-                    fmt_dt(a.start), fmt_dt(a.end),
-                    AppointmentStatus.label(a.status), a.notes
-                ])
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["#", "Department", "Patient ID", "Patient Name", "Staff ID", "Staff Name",
-                            "Start", "End", "Status", "Notes"])
-                w.writerows(rows)
-            self.win.statusBar().showMessage(I18N.t("msg.export.ok"), 3000)
-        except Exception as e:
-            QMessageBox.critical(self, I18N.t("msg.error.title"), I18N.t("msg.export.fail", err=e))
+        items: List[Appointment] = [self.ap_proxy.index(r, 0).data(Qt.UserRole)
+                                    for r in range(self.ap_proxy.rowCount())]
+        status = {st: AppointmentStatus.label(st) for st in AppointmentStatus.all()}
+        self.win.start_csv_export(path, ["#", "Department", "Patient ID", "Patient Name", "Staff ID",
+                                         "Staff Name", "Start", "End", "Status", "Notes"],
+                                  appointment_csv_rows(items, self.appts, status))
 
     # ---------- Departments ops ----------
     def handle_add_department(self):
@@ -2252,10 +4214,9 @@ class MainPage(QWidget):
             self.win.statusBar().showMessage(I18N.t("msg.validation.fix_fields"), 3000)
             return
         try:
-            if name in self.hospital.departments:
-                raise ValueError(f"Department {name} already exists")
+            self.hospital.check_department_name(name)
             d = Department(name, cap)
-            self.hospital.departments[name] = d
+            self.hospital.attach_department(d)
             self.dept_name_in.clear(); self.dept_cap_in.setValue(50)
             self.refresh_department_list()
             QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("btn.add") + " ✓")
@@ -2276,9 +4237,9 @@ class MainPage(QWidget):
             return
         try:
             patient = Patient(name, age, med)
-            if len(dept.patients) >= dept.capacity:
+            if not dept.has_room():
                 QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.dept.full", name=name)); return
-            dept.patients.append(patient)
+            dept.attach_patient(patient)
             self.p_name_in.clear(); self.p_age_in.setValue(1); self.p_med_rec_in.clear()
             self.refresh_patients_table_related()
             QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.patient.added", pid=patient.patient_id))
@@ -2305,10 +4266,10 @@ class MainPage(QWidget):
             return
         try:
             staff = Staff(name, age, position, dept.name)
-            dept.staff.append(staff)
+            dept.attach_staff(staff)
             self.s_name_in.clear(); self.s_age_in.setValue(18); self.s_position_in.clear()
             self.s_model.layoutChanged.emit()
-            self.refresh_dashboard()
+            self.request_dashboard_refresh()
             self.update_empty_overlays()
             QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.staff.added", sid=staff.staff_id))
         except Exception as e:
@@ -2323,20 +4284,25 @@ class MainPage(QWidget):
             status_filter = self.cb_pat_status.currentData()
             age_min = self.spin_age_min.value()
             age_max = self.spin_age_max.value()
+            discharged = {"admitted": False, "discharged": True}.get(status_filter)
             for dept in self.hospital.departments.values():
-                for p in dept.patients:
+                for p in dept.find_patients(discharged, age_min, age_max):
                     if term and (term not in f"{p.name} {p.patient_id}".lower()):
                         continue
-                    if status_filter == "admitted" and p.is_discharged:
-                        continue
-                    if status_filter == "discharged" and not p.is_discharged:
-                        continue
-                    if not (age_min <= p.age <= age_max):
-                        continue
                     status = I18N.t("status.admitted") if not p.is_discharged else I18N.t("status.discharged")
                     it = QListWidgetItem(f"[{dept.name}] {p.patient_id} | {p.name} | {status}")
                     it.setData(Qt.UserRole, (dept, p))
                     self.search_results.addItem(it)
+            # Archived patients are all discharged; they are only listed for a search term
+            archive = self.win.archive
+            if archive is not None and term and status_filter != "admitted":
+                status = f'{I18N.t("status.discharged")} ({I18N.t("status.archived")})'
+                for dept_name, p in archive.search(term):
+                    if not (age_min <= p.age <= age_max):
+                        continue
+                    it = QListWidgetItem(f"[{dept_name}] {p.patient_id} | {p.name} | {status}")
+                    it.setData(Qt.UserRole, (None, p))
+                    self.search_results.addItem(it)
         else:
             st_filter = self.cb_staff_status.currentData()
             pos_term = self.in_staff_pos.text().strip().lower()
@@ -2360,6 +4326,9 @@ class MainPage(QWidget):
         data = item.data(Qt.UserRole)
         if not data: return
         dept, obj = data
+        if dept is None:
+            PatientDetailsDialog(obj, self, archived=True, appts=self.appts).exec()
+            return
         for i in range(self.dept_list.count()):
             if self.dept_list.item(i).data(Qt.UserRole) is dept:
                 self.dept_list.setCurrentRow(i)
@@ -2405,6 +4374,15 @@ class MainPage(QWidget):
             if s.is_active:
                 self.ap_staff_combo.addItem(f"{s.staff_id} - {s.name} ({s.position})", s)
 
+    def _fill_repeat_combo(self):
+        current = self.ap_repeat_combo.currentData()
+        self.ap_repeat_combo.clear()
+        self.ap_repeat_combo.addItem(I18N.t("repeat.none"), None)
+        self.ap_repeat_combo.addItem(I18N.t("repeat.daily"), RecurrenceRule.DAILY)
+        self.ap_repeat_combo.addItem(I18N.t("repeat.weekly"), RecurrenceRule.WEEKLY)
+        idx = self.ap_repeat_combo.findData(current)
+        self.ap_repeat_combo.setCurrentIndex(max(0, idx))
+
     def _fill_appt_filter_combos(self):
         self.ap_filter_dept.blockSignals(True)
         self.ap_filter_status.blockSignals(True)
@@ -2427,18 +4405,23 @@ class MainPage(QWidget):
         if not p:
             QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_patient_for_appt")); return
 
-        def to_py(dt: QDateTime) -> datetime:
-            try:
-                return dt.toPython()
-            except Exception:
-                return datetime.fromtimestamp(dt.toSecsSinceEpoch())
-
-        start = to_py(self.ap_start_dt.dateTime())
-        end = to_py(self.ap_end_dt.dateTime())
+        start = qdt_to_py(self.ap_start_dt.dateTime())
+        end = qdt_to_py(self.ap_end_dt.dateTime())
         if end <= start:
             QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.end_after_start")); return
 
-        conflicts = self.appts.find_conflicts(p.id, (s.id if s else None), start, end)
+        freq = self.ap_repeat_combo.currentData()
+        rule = RecurrenceRule(freq, count=int(self.ap_repeat_count.value())) if freq else None
+        if rule:
+            proposed = AppointmentSeries(p.id, (s.id if s else None), dept.name, start, end, rule)
+            # One sweep over all occurrences, which also catches steps overlapping each other
+            partners: Dict[str, Tuple[Appointment, List[str]]] = {}
+            for found in self.appts.conflict_map(proposed.occurrences()).values():
+                for a, reasons in found:
+                    partners.setdefault(a.id, (a, reasons))
+            conflicts = list(partners.values())
+        else:
+            conflicts = self.appts.find_conflicts(p.id, (s.id if s else None), start, end)
         if conflicts:
             details = []
             for a, reasons in conflicts:
@@ -2453,12 +4436,32 @@ class MainPage(QWidget):
                                  I18N.t("msg.appt.conflict.body", details="\n".join(details)))
             return
 
-        a = self.appts.add(p, dept, start, end, s, self.ap_notes_in.text().strip())
+        if rule:
+            a = self.appts.add_series(p, dept, start, end, rule, s, self.ap_notes_in.text().strip())
+        else:
+            a = self.appts.add(p, dept, start, end, s, self.ap_notes_in.text().strip())
         self.ap_notes_in.clear()
         self.refresh_appt_table()
-        self.refresh_dashboard()
+        self.request_dashboard_refresh()
         QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.appt.created", id=a.id))
 
+    def handle_find_free_slot(self):
+        p: Patient = self.ap_patient_combo.currentData()
+        s: Optional[Staff] = self.ap_staff_combo.currentData()
+        if not p:
+            QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_patient_for_appt")); return
+        start = qdt_to_py(self.ap_start_dt.dateTime())
+        end = qdt_to_py(self.ap_end_dt.dateTime())
+        duration = end - start if end > start else timedelta(minutes=30)
+        slots = self.appts.free_slots(duration, start.date(), days=7, patient_id=p.id,
+                                      staff_id=(s.id if s else None), not_before=start)
+        if not slots:
+            QMessageBox.information(self, I18N.t("msg.info.title"), I18N.t("msg.appt.no_free_slot")); return
+        slot_start = slots[0][0]
+        self.ap_start_dt.setDateTime(py_to_qdt(slot_start))
+        self.ap_end_dt.setDateTime(py_to_qdt(slot_start + duration))
+        self.win.statusBar().showMessage(I18N.t("msg.appt.free_slot", start=fmt_dt(slot_start)), 5000)
+
     def refresh_appt_table(self):
         if hasattr(self.ap_filter_date.date(), "toPython"):
             day = self.ap_filter_date.date().toPython()
@@ -2494,10 +4497,15 @@ class MainPage(QWidget):
                 s.setValue("confirm_delete_appt", "no")
         return True
 
+    def _selected_appts(self) -> List[Appointment]:
+        idxs = self.ap_table.selectionModel().selectedRows()
+        return [self.ap_proxy.index(i.row(), 0).data(Qt.UserRole) for i in idxs]
+
     def handle_change_appt_status(self):
         a = self._current_selected_appt()
         if not a:
             QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_appt")); return
+        selected = self._selected_appts() or [a]
         choices = [AppointmentStatus.label(s) for s in AppointmentStatus.all()]
         current_label = AppointmentStatus.label(a.status)
         label, ok = QInputDialog.getItem(self, I18N.t("dialog.change_status.title"),
@@ -2505,9 +4513,9 @@ class MainPage(QWidget):
                                          choices, choices.index(current_label) if current_label in choices else 0, False)
         if not ok: return
         new_status = AppointmentStatus.from_label(label)
-        self.appts.update_status(a.id, new_status)
+        self.appts.update_status_many([x.id for x in selected], new_status)
         self.refresh_appt_table()
-        self.refresh_dashboard()
+        self.request_dashboard_refresh()
 
     def handle_delete_appt(self):
         idxs = self.ap_table.selectionModel().selectedRows()
@@ -2515,11 +4523,9 @@ class MainPage(QWidget):
             QMessageBox.warning(self, I18N.t("msg.warning.title"), I18N.t("msg.select_appt")); return
         if not self._confirm_delete_appts_if_needed(len(idxs)):
             return
-        for i in idxs:
-            a = self.ap_proxy.index(i.row(), 0).data(Qt.UserRole)
-            self.appts.remove(a.id)
+        self.appts.remove_many([a.id for a in self._selected_appts()])
         self.refresh_appt_table()
-        self.refresh_dashboard()
+        self.request_dashboard_refresh()
 
     # ---------- Empty states ----------
     def update_empty_overlays(self):
@@ -2600,15 +4606,17 @@ def main():
     I18N.set_language(I18N.lang)
     THEME.apply(app)
 
+    Department.columnar = QSettings("HospitalApp", "UI").value("columnar_store", "no") == "yes"
     hospital = Hospital("City General Hospital", "123 Main St")
     cardio = hospital.find_department("Cardiology")
     if cardio:
         try:
             p1 = Patient("Alice Johnson", 35, "Hypertension monitoring")
             p2 = Patient("Bob Smith", 52, "Post-operative care")
-            cardio.patients.extend([p1, p2])
-            cardio.staff.append(Staff("Dr. Sarah Miller", 42, "Cardiologist", "Cardiology"))
-            cardio.staff.append(Staff("Emma Wilson", 28, "Head Nurse", "Cardiology"))
+            cardio.attach_patient(p1)
+            cardio.attach_patient(p2)
+            cardio.attach_staff(Staff("Dr. Sarah Miller", 42, "Cardiologist", "Cardiology"))
+            cardio.attach_staff(Staff("Emma Wilson", 28, "Head Nurse", "Cardiology"))
         except Exception:
             pass
 
@@ -0,0 +1,73 @@
+"""Make core/ importable and keep Qt off the display before ui.py is loaded."""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core")
+if CORE_DIR not in sys.path:
+    sys.path.insert(0, CORE_DIR)
+
+BASE = datetime(2030, 3, 4, 8, 0)
+
+
+@pytest.fixture(scope="session")
+def ui():
+    """ui.py holds the appointment and storage code; it needs PySide6."""
+    pytest.importorskip("PySide6")
+    import ui
+    return ui
+
+
+def build_sample(ui, seed: int = 0, n_patients: int = 40, n_appts: int = 300):
+    """Small hospital with overlapping appointments (all statuses) and a few series."""
+    from department import Department
+    from hospital import Hospital
+    from patient import Patient
+    from staff import Staff
+
+    rng = random.Random(seed)
+    h = Hospital("General", "Cairo", with_defaults=False)
+    depts = [Department(name, 100) for name in ("Cardiology", "Surgery", "الأطفال")]
+    for d in depts:
+        h.attach_department(d)
+    for i in range(n_patients):
+        p = Patient(f"Patient {i}", rng.randint(1, 99), f"record {i}\nline two")
+        depts[i % 3].add_patient(p)
+        if rng.random() < 0.3:
+            p.discharge(f"note {i}", when=BASE - timedelta(days=rng.randint(1, 400)))
+    for i in range(6):
+        depts[i % 3].add_staff(Staff(f"Staff {i}", 30 + i, "Doctor", depts[i % 3].name))
+    ap = ui.AppointmentManager(h)
+    for _ in range(n_appts):
+        d = rng.choice(depts)
+        p = rng.choice(d.patients)
+        s = rng.choice(d.staff) if rng.random() < 0.8 else None
+        start = BASE + timedelta(days=rng.randrange(10), minutes=15 * rng.randrange(40))
+        a = ap.add(p, d, start, start + timedelta(minutes=15 * rng.randint(1, 8)), s, notes=f"n{rng.random():.3f}")
+        if rng.random() < 0.3:
+            ap.update_status(a.id, rng.choice(ui.AppointmentStatus.all()))
+    for freq, n in (("daily", 8), ("weekly", 3), ("daily", 5)):
+        d = rng.choice(depts)
+        start = BASE + timedelta(days=rng.randrange(3), hours=rng.randrange(8))
+        ap.add_series(rng.choice(d.patients), d, start, start + timedelta(minutes=45),
+                      ui.RecurrenceRule(freq, count=n), staff=rng.choice(d.staff))
+    return h, ap
+
+
+def state(ui, h, ap) -> dict:
+    """Everything a save keeps, in a form that compares equal across backends"""
+    data = ui.json_snapshot(h, ap)
+    data["appointments"]["items"].sort(key=lambda a: a["id"])
+    data["appointments"]["series"].sort(key=lambda s: s["id"])
+    del data["journal_seq"]
+    return data
+
+
+@pytest.fixture
+def sample(ui):
+    return build_sample(ui)
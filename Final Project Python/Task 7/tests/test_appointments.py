@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import BASE, build_sample
+
+
+def everything(ap):
+    """Concrete appointments plus every series occurrence"""
+    return ap.items + [o for sr in ap.series.values() for o in sr.occurrences()]
+
+
+def brute_conflicts(ui, ap, patient_id, staff_id, start, end, ignore_id=None):
+    found = {}
+    for a in everything(ap):
+        if a.id == ignore_id or not ui.AppointmentStatus.is_active(a.status):
+            continue
+        if not (a.start < end and a.end > start):
+            continue
+        reasons = []
+        if a.patient_person_id == patient_id:
+            reasons.append("patient")
+        if staff_id and a.staff_person_id == staff_id:
+            reasons.append("staff")
+        if reasons:
+            found[a.id] = reasons
+    return found
+
+
+def as_dict(conflicts):
+    return {a.id: reasons for a, reasons in conflicts}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_find_conflicts_matches_brute_force(ui, seed):
+    h, ap = build_sample(ui, seed)
+    for a in everything(ap)[::3]:
+        got = ap.find_conflicts(a.patient_person_id, a.staff_person_id, a.start, a.end, ignore_id=a.id)
+        assert as_dict(got) == brute_conflicts(ui, ap, a.patient_person_id, a.staff_person_id,
+                                               a.start, a.end, a.id)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_conflict_map_matches_find_conflicts(ui, seed):
+    h, ap = build_sample(ui, seed)
+    items = everything(ap)[::2]
+    got = ap.conflict_map(items)
+    for a in items:
+        want = brute_conflicts(ui, ap, a.patient_person_id, a.staff_person_id, a.start, a.end, a.id)
+        assert as_dict(got.get(a.id, [])) == want
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_list_filtered_matches_brute_force(ui, seed):
+    h, ap = build_sample(ui, seed)
+    days = [None] + [(BASE + timedelta(days=i)).date() for i in range(-1, 12)]
+    depts = [None, "__ALL__"] + list(h.departments)
+    statuses = [None, "__ALL__"] + ui.AppointmentStatus.all()
+    for day in days:
+        for dept in depts:
+            for status in statuses:
+                got = ap.list_filtered(day, dept, status)
+                want = [a for a in everything(ap)
+                        if (day is None or a.start.date() == day)
+                        and (dept in (None, "__ALL__") or a.dept_name == dept)
+                        and (status in (None, "__ALL__") or a.status == status)]
+                assert sorted(a.id for a in got) == sorted(a.id for a in want)
+                assert [a.start for a in got] == sorted(a.start for a in got)
+
+
+def test_filters_follow_status_change_and_rename(ui, sample):
+    h, ap = sample
+    a = ap.items[0]
+    ap.update_status(a.id, ui.AppointmentStatus.CANCELLED)
+    assert a in ap.list_filtered(a.start.date(), a.dept_name, ui.AppointmentStatus.CANCELLED)
+    assert a not in [c for c, _ in ap.find_conflicts(a.patient_person_id, None, a.start, a.end)]
+    old = a.dept_name
+    ap.rename_department(h.departments[old], "Renamed")
+    assert a in ap.list_filtered(a.start.date(), "Renamed", ui.AppointmentStatus.CANCELLED)
+    assert ap.list_filtered(None, old) == []
+
+
+def test_removed_long_appointment_stops_widening_queries(ui, sample):
+    h, ap = sample
+    d = h.departments["Cardiology"]
+    p = d.patients[0]
+    long_one = ap.add(p, d, BASE - timedelta(days=30), BASE + timedelta(days=30))
+    ap.remove(long_one.id)
+    index = ap._by_patient
+    assert index._max_span[p.id] < timedelta(days=1)
+
+
+# ----- recurrence -----
+def test_daily_count_and_interval(ui):
+    rule = ui.RecurrenceRule("daily", interval=2, count=4)
+    first = datetime(2030, 1, 1, 9)
+    assert rule.starts(first, timedelta(hours=1)) == [first + timedelta(days=2 * k) for k in range(4)]
+    assert rule.last_start(first) == first + timedelta(days=6)
+
+
+def test_weekly_until_is_inclusive(ui):
+    rule = ui.RecurrenceRule("weekly", until=date(2030, 1, 29))
+    first = datetime(2030, 1, 1, 23, 30)
+    assert [s.date() for s in rule.starts(first, timedelta(minutes=30))] == \
+        [date(2030, 1, d) for d in (1, 8, 15, 22, 29)]
+
+
+def test_until_and_count_take_the_shorter(ui):
+    rule = ui.RecurrenceRule("daily", until=date(2030, 1, 10), count=3)
+    assert len(rule.starts(datetime(2030, 1, 1, 9), timedelta(hours=1))) == 3
+
+
+def test_exceptions_are_skipped_but_still_count(ui):
+    rule = ui.RecurrenceRule("daily", count=5, exceptions=[date(2030, 1, 2), date(2030, 1, 4)])
+    first = datetime(2030, 1, 1, 9)
+    assert [s.day for s in rule.starts(first, timedelta(hours=1))] == [1, 3, 5]
+
+
+def test_window_bounds_select_overlapping_steps(ui):
+    rule = ui.RecurrenceRule("daily", count=10)
+    first = datetime(2030, 1, 1, 9)
+    span = timedelta(hours=2)
+    lo, hi = datetime(2030, 1, 3, 10), datetime(2030, 1, 5, 9)
+    brute = [s for s in rule.starts(first, span) if s < hi and s + span > lo]
+    assert rule.starts(first, span, lo, hi) == brute == [datetime(2030, 1, 3, 9), datetime(2030, 1, 4, 9)]
+
+
+def test_rule_round_trips_through_dict(ui):
+    rule = ui.RecurrenceRule("weekly", interval=3, until=date(2031, 5, 1), exceptions=[date(2030, 6, 1)])
+    again = ui.RecurrenceRule.from_dict(rule.to_dict())
+    assert again.to_dict() == rule.to_dict()
+
+
+@pytest.mark.parametrize("kwargs", [dict(freq="monthly", count=2), dict(freq="daily", interval=0, count=2),
+                                    dict(freq="daily")])
+def test_invalid_rules_are_rejected(ui, kwargs):
+    with pytest.raises(ValueError):
+        ui.RecurrenceRule(**kwargs)
+
+
+def test_series_occurrences_on_a_day(ui, sample):
+    h, ap = sample
+    sr = next(iter(ap.series.values()))
+    day = sr.start.date()
+    occ = sr.occurrence_on(day)
+    assert occ is not None and occ.id == sr.occurrence_id(day) and occ.series_id == sr.id
+    assert occ.end - occ.start == sr.end - sr.start
+    assert sr.occurrence_on(day - timedelta(days=1)) is None
@@ -0,0 +1,64 @@
+import pytest
+
+from department import Department
+from hospital import Hospital, department_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Cardiology", "cardiology"),
+    ("Intensive  Care", " intensive care "),
+    ("ＩＣＵ", "ICU"),                      # full-width (NFKC)
+    ("الأطفال", "الاطفال"),                  # hamza on alef
+    ("إسعاف", "اسعاف"),
+    ("مستشفى", "مستشفي"),                    # alef maksura / yeh
+    ("جراحة", "جراحه"),                      # teh marbuta / heh
+    ("الطِّبّ", "الطب"),                      # harakat
+])
+def test_spelling_variants_share_a_key(a, b):
+    assert department_key(a) == department_key(b)
+
+
+@pytest.mark.parametrize("a, b", [("Cardiology", "Cardiology 2"), ("جراحة", "جراحة عامة"), ("ICU", "CCU")])
+def test_different_names_keep_different_keys(a, b):
+    assert department_key(a) != department_key(b)
+
+
+def empty_hospital() -> Hospital:
+    return Hospital("H", "L", with_defaults=False)
+
+
+def test_new_colliding_names_are_refused():
+    h = empty_hospital()
+    h.add_department(Department("Pediatrics"))
+    with pytest.raises(ValueError):
+        h.add_department(Department("PEDIATRICS"))
+    with pytest.raises(ValueError):
+        h.check_department_name(" pediatrics")
+    assert h.find_department("pediatrics ") is h.departments["Pediatrics"]
+
+
+def test_rename_refuses_another_departments_key_but_allows_its_own():
+    h = empty_hospital()
+    h.add_department(Department("Surgery"))
+    h.add_department(Department("ICU"))
+    with pytest.raises(ValueError):
+        h.rename_department(h.departments["ICU"], "surgery")
+    icu = h.departments["ICU"]
+    h.rename_department(icu, "icu")
+    assert list(h.departments) == ["Surgery", "icu"]
+    assert h.find_department("ICU") is icu
+
+
+def test_loaded_collisions_are_kept_and_the_first_wins():
+    h = empty_hospital()
+    lab, upper = Department("Lab"), Department("LAB")
+    h.attach_department(lab)
+    h.attach_department(upper)
+    assert list(h.departments) == ["Lab", "LAB"]
+    assert h.find_department("lab") is lab
+    with pytest.raises(ValueError):
+        h.attach_department(Department("Lab"))
+    # Renaming the first away hands the key to the one left
+    h.rename_department(lab, "Pathology")
+    assert h.find_department("lab") is upper
+    assert h.find_department("pathology") is lab
@@ -0,0 +1,128 @@
+from conftest import state
+from journal import MutationJournal
+
+
+def test_append_after_torn_tail_is_read_back(tmp_path):
+    path = str(tmp_path / "data.json.journal")
+    j = MutationJournal(path)
+    j.append("add_patient", {"id": "p1"})
+    j.close()
+    # A crash in the middle of the next batch
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq":2,"op":"add_pat')
+
+    j = MutationJournal(path, seq=1)
+    assert j.count == 1
+    j.append("add_patient", {"id": "p2"})
+    j.append("remove_patient", {"id": "p1"})
+    j.close()
+
+    entries = MutationJournal.read(path)
+    assert [(e["seq"], e["op"]) for e in entries] == [(1, "add_patient"), (2, "add_patient"), (3, "remove_patient")]
+
+
+def test_read_skips_unreadable_lines(tmp_path):
+    path = tmp_path / "data.json.journal"
+    path.write_bytes(b'{"seq":1,"op":"a"}\n{"seq":2,\xff\n{"seq":3,"op":"b"}\n')
+    assert [e["seq"] for e in MutationJournal.read(str(path))] == [1, 3]
+
+
+# ----- replay -----
+def copy_of(ui, snapshot: dict):
+    h = ui.hospital_from_dict(snapshot["hospital"])
+    ap = ui.AppointmentManager(h)
+    ap.from_dict(snapshot["appointments"])
+    return h, ap
+
+
+def edit_everything(ui, h, ap):
+    from datetime import date, timedelta
+    from department import Department
+    from patient import Patient
+    from staff import Staff
+
+    h.attach_department(Department("Radiology", 30))
+    ap.rename_department(h.departments["Surgery"], "General Surgery")
+    rad = h.departments["Radiology"]
+    p = Patient("New Patient", 50, "first visit")
+    rad.add_patient(p)
+    s = Staff("New Staff", 40, "Nurse", rad.name)
+    rad.add_staff(s)
+    s.set_active(False)
+    card = h.departments["Cardiology"]
+    old = card.patients[1]
+    old.update_details("Renamed Patient", old.age + 1, old.medical_record)
+    old.update_details(old.name, old.age, "rewritten record")
+    admitted = [x for x in card.patients if not x.is_discharged]
+    admitted[0].discharge("went home")
+    moved = card.patients[3]
+    card.detach_patient(moved)
+    rad.attach_patient(moved)
+    ap.move_patient(moved.id, rad.name)
+    a = ap.add(p, rad, ui.dt_from_str("2030-03-05T10:00:00"), ui.dt_from_str("2030-03-05T10:30:00"), s)
+    ap.update_status(a.id, ui.AppointmentStatus.CHECKED_IN)
+    ap.remove(ap.items[0].id)
+    ap.update_status_many([x.id for x in ap.items[5:9]], ui.AppointmentStatus.CANCELLED)
+    ap.set_dept_name(ap.items[10], rad.name)
+    series = list(ap.series.values())
+    sr = series[0]
+    first, second = (sr.start + timedelta(days=k * sr.rule.step.days) for k in (1, 2))
+    ap.update_status(sr.occurrence_id(first.date()), ui.AppointmentStatus.COMPLETED)
+    ap.remove(sr.occurrence_id(second.date()))
+    ap.set_series_until(series[1], series[1].start.date() + timedelta(days=7))
+    ap.set_series_dept_name(series[1], rad.name)
+    ap.remove_series(series[2].id)
+    new_sr = ap.add_series(p, rad, ui.dt_from_str("2030-04-01T09:00:00"), ui.dt_from_str("2030-04-01T09:20:00"),
+                           ui.RecurrenceRule("weekly", until=date(2030, 6, 1)), s)
+    ap.end_series(new_sr, ui.dt_from_str("2030-05-01T00:00:00"))
+    ap.cancel_future(card.patients[0].id, ui.dt_from_str("2030-03-06T00:00:00"))
+
+
+def record(ui, h, ap, path):
+    journal = MutationJournal(path)
+    recorder = ui.JournalRecorder(journal)
+    h.listener = ap.listener = recorder
+    return journal
+
+
+def test_replay_rebuilds_every_edit(ui, sample, tmp_path):
+    h, ap = sample
+    before = ui.json_snapshot(h, ap)
+    path = str(tmp_path / "data.json.journal")
+    journal = record(ui, h, ap, path)
+    edit_everything(ui, h, ap)
+    journal.close()
+
+    h2, ap2 = copy_of(ui, before)
+    entries = MutationJournal.read(path)
+    assert ui.replay_journal(h2, ap2, entries) == entries[-1]["seq"]
+    assert state(ui, h2, ap2) == state(ui, h, ap)
+
+
+def test_replay_skips_entries_already_in_the_snapshot(ui, sample, tmp_path):
+    h, ap = sample
+    path = str(tmp_path / "data.json.journal")
+    journal = record(ui, h, ap, path)
+    edit_everything(ui, h, ap)
+    journal.close()
+    entries = MutationJournal.read(path)
+
+    h2, ap2 = copy_of(ui, ui.json_snapshot(h, ap))
+    assert ui.replay_journal(h2, ap2, entries, after_seq=entries[-1]["seq"]) == entries[-1]["seq"]
+    assert state(ui, h2, ap2) == state(ui, h, ap)
+
+
+def test_replay_after_a_snapshot_mid_session(ui, sample, tmp_path):
+    h, ap = sample
+    path = str(tmp_path / "data.json.journal")
+    journal = record(ui, h, ap, path)
+    d = h.departments["Cardiology"]
+    d.get_active_patients()[-1].discharge("early")
+    journal.flush()
+    middle = ui.json_snapshot(h, ap, journal.seq)
+    edit_everything(ui, h, ap)
+    journal.close()
+
+    h2, ap2 = copy_of(ui, middle)
+    ui.replay_journal(h2, ap2, MutationJournal.read(path), middle["journal_seq"])
+    assert state(ui, h2, ap2) == state(ui, h, ap)